@@ -10,8 +10,11 @@ from sports_data import (
     check_games_in_progress
 )
 from llm_interface import (
-    generate_game_summary, 
-    infer_image_contents
+    preload_dependencies,
+    refresh_game_summary,
+    infer_image_contents,
+    image_analysis_key,
+    show_image_analysis
 )
 from utils.utils_functions import (
     initialize_session_state,
@@ -22,9 +25,16 @@ from utils.utils_functions import (
     image_upload,
     user_prompt,
     temperature_broadcast,
+    enrich_updates_toggle,
     handle_broadcast_start,
-    process_new_plays
+    process_new_plays,
+    start_metrics_endpoint,
+    start_update_feed_endpoint,
+    metrics_debug_panel,
+    llm_budget_notice,
+    profile_feed_address
 )
+from utils.redzone import redzone_broadcast
 
 # Add the logo to the top of the sidebar
 st.sidebar.image("assets/logo.png", use_container_width=True)
@@ -34,8 +44,24 @@ st.title("Specta AI")
 st.header("Your AI Sports Viewing Companion")
 st.divider()
 
+preload_dependencies()
 initialize_session_state()
 
+# Optional Prometheus-style /metrics endpoint (set `metrics.port` in secrets.toml)
+metrics_config = st.secrets.get("metrics", {})
+if metrics_config.get("port"):
+    start_metrics_endpoint(int(metrics_config["port"]), metrics_config.get("host", "127.0.0.1"))
+
+# Optional server-sent events feed of the updates (set `update_feed.port` in secrets.toml)
+update_feed_config = st.secrets.get("update_feed", {})
+if update_feed_config.get("port"):
+    start_update_feed_endpoint(
+        int(update_feed_config["port"]),
+        update_feed_config.get("host", "127.0.0.1"),
+        update_feed_config.get("token"),
+        update_feed_config.get("profile_secret"),
+    )
+
 # Trigger login dialog if not logged in
 if not st.session_state.logged_in:
     login_dialog()
@@ -65,6 +91,13 @@ if st.session_state.logged_in:
             help="Click the link for details on generating a new replay API key [here](https://sportsdata.io/members/replays).",
             )
 
+        llm_budget_notice()
+        profile_feed_address()
+
+        # Debug panel with per-stage timings, upstream error rates, token usage and cache hit rates
+        if st.sidebar.toggle("Show debug metrics", value=False):
+            metrics_debug_panel()
+
 # Main Content After Login
 if st.session_state.logged_in:
     st.sidebar.header("Game Selection")
@@ -83,7 +116,16 @@ if st.session_state.logged_in:
             game for game in nfl_schedule if game["Date"] != None and datetime.strptime(game["Date"], "%Y-%m-%dT%H:%M:%S").date() == selected_date
         ]
 
-        if games_on_date:
+        broadcast_mode = st.sidebar.radio(
+            "Broadcast Mode:",
+            options=["Single Game", "RedZone"],
+            index=0,
+            help="RedZone follows several games (or every game of your fantasy roster) in one broadcast.",
+        )
+
+        if games_on_date and broadcast_mode == "RedZone":
+            redzone_broadcast(games_on_date, season_code)
+        elif games_on_date:
             game_keys = {game["ScoreID"]: f"{game['AwayTeam']} vs {game['HomeTeam']}" for game in games_on_date}
             options = ["Select a Game"] + list(game_keys.keys())
 
@@ -116,23 +158,17 @@ if st.session_state.logged_in:
                         if games_in_progress:
                             # Initialize user selection variables
                             st.session_state.selected_players = player_selections(home_players, away_players)
-                            uploaded_image = image_upload()
-                            if uploaded_image: # Process uploaded image with LLM
-                                # Prevent duplicate image processing
-                                if st.session_state.image_results['image_name'] != uploaded_image.name:
-                                    st.session_state.image_results = infer_image_contents(uploaded_image, players)
+                            uploaded_images = image_upload()
+                            if uploaded_images: # Process uploaded images with LLM (cached across sessions by image content)
+                                # Don't re-run a completed analysis on every rerun of this session
+                                if st.session_state.image_results_key != image_analysis_key(uploaded_images, players):
+                                    st.session_state.image_results = infer_image_contents(uploaded_images, players)
                                 else:
-                                    st.success(
-                                        f"""
-                                        Image analysis complete!
-                                        - `Image type detected: {st.session_state.image_results['image_type']}`
-                                        - `Players detected: {list(st.session_state.image_results['players'].keys())}`
-                                        - `Description: {st.session_state.image_results['description']}`
-                                        """
-                                    )
+                                    show_image_analysis(st.session_state.image_results, "already analyzed")
                                 st.session_state.selected_players.update(st.session_state.image_results['players']) # add players from image to user selections
                             st.session_state.input_prompt = user_prompt()
                             st.session_state.broadcast_temp = temperature_broadcast()
+                            st.session_state.enrich_updates = enrich_updates_toggle()
                             
                             # Sandbox for editing prompt templates
                             sandbox_toggle()
@@ -187,7 +223,8 @@ if st.session_state.logged_in:
                         if game_data["Score"]["IsInProgress"] or game_data["Score"]["IsOver"]:
                             if st.button("Refresh Game Summary", key="refresh_summary"):
                                 with st.spinner("Generating game summary..."):
-                                    basic_details, game_summary = generate_game_summary(
+                                    # Only sends what changed since the last refresh (or skips the LLM if nothing did)
+                                    basic_details, game_summary = refresh_game_summary(
                                         game_data, temperature_summary
                                     )
                                     st.session_state.game_summary = (basic_details, game_summary)
@@ -0,0 +1,78 @@
+"""
+Streamlit script driven by `benchmarks/play_to_update.py` through AppTest.
+
+Starts a broadcast against the stand-in server and keeps processing plays until the
+recording is exhausted. Stage timings come from the app's own instrumentation
+(`utils/metrics.py`). Reads its configuration from `st.session_state.bench_config`
+and leaves its report in `st.session_state.bench_report`.
+"""
+
+import time
+
+import requests
+import streamlit as st
+
+import utils.utils_functions as uf
+from benchmarks.harness import registry_report
+from llm_interface import preload_dependencies
+from sports_data import get_players_by_team
+from utils import metrics
+from utils.redzone import build_game_feeds, fetch_team_rosters, poll_redzone, start_redzone_broadcast
+
+config = st.session_state.bench_config
+
+# A real session starts broadcasting long after the preload finished (see benchmarks/startup.py)
+preload = preload_dependencies()
+if preload is not None:
+    preload.result()
+uf.initialize_session_state()
+st.session_state.api_mode = "Replay"
+st.session_state.input_prompt = config["input_prompt"]
+st.session_state.broadcast_temp = 0.7
+uf.POLL_INTERVAL_SECONDS = config.get("poll_interval", 0)
+
+home_players = get_players_by_team(config["home_team"])
+away_players = get_players_by_team(config["away_team"])
+players = {p["Name"]: p["PlayerID"] for p in home_players + away_players}
+skill_players = [p for p in home_players + away_players if p["Position"] in ("QB", "RB", "WR", "TE")]
+st.session_state.selected_players = {
+    f"{p['Name']} ({p['Position']}, {p['Team']})": p["PlayerID"] for p in skill_players[: config["priority_players"]]
+}
+
+# Only count traffic and timings generated by the broadcast itself
+requests.post(f"{config['standin_url']}/_standin/reset_stats")
+metrics.REGISTRY.reset()
+
+container = st.container()
+redzone_games = config.get("redzone_games")
+if redzone_games:
+    # RedZone mode: one scheduler follows every game
+    feeds = build_game_feeds(redzone_games, fetch_team_rosters([config["home_team"], config["away_team"]]))
+    final_sequences = {game["ScoreID"]: game["final_sequence"] for game in redzone_games}
+    start_redzone_broadcast(feeds, container)
+else:
+    uf.handle_broadcast_start(config["score_id"], st.session_state.replay_api_key, config["season_code"], container, players)
+
+catch_up_started = time.perf_counter()
+catch_up_plays = metrics.REGISTRY.counter_value("broadcast_plays")
+polls = 0
+while redzone_games and (
+    st.session_state.broadcasting
+    and any(feed.last_sequence < final_sequences[score_id] for score_id, feed in st.session_state.redzone_feeds.items())
+    and polls < config["max_polls"]
+):
+    poll_redzone(config["season_code"], container)
+    polls += 1
+while not redzone_games and (
+    st.session_state.broadcasting
+    and st.session_state.last_sequence < config["final_sequence"]
+    and polls < config["max_polls"]
+):
+    uf.process_new_plays(config["score_id"], st.session_state.replay_api_key, config["season_code"], container, players)
+    polls += 1
+catch_up_seconds = time.perf_counter() - catch_up_started
+
+report = registry_report(metrics.REGISTRY)
+report["polls"] = polls
+report["throughput_plays_per_second"] = (report["plays"] - catch_up_plays) / catch_up_seconds if catch_up_seconds else None
+st.session_state.bench_report = report
@@ -0,0 +1,146 @@
+"""
+Shared helpers for the benchmark suite: percentiles, stage reports from the app's metrics
+registry, running the app headless against the stand-in server, and diffing reports
+against a stored baseline.
+"""
+
+import json
+import os
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Stages are timed once per poll (replay_clock, pbp_fetch) or once per play (the rest)
+STAGE_ORDER = ("replay_clock", "pbp_fetch", "stat_fetch", "context_build", "prompt_format", "llm", "render")
+
+def percentile(values, pct):
+    """
+    Returns the pct-th percentile of values using linear interpolation.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def summarize_samples(values):
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+    }
+
+def registry_report(registry):
+    """
+    Builds the per-stage report from the app's metrics registry (see `utils/metrics.py`).
+
+    Parameters:
+        registry (MetricsRegistry): Registry the broadcast pipeline recorded into.
+
+    Returns:
+        dict: {"stages": {stage: summary}, "end_to_end": summary, "plays": int}
+    """
+    stages = {}
+    for labels, _ in sorted(registry.timer_summaries("broadcast_stage_seconds").items()):
+        stage = dict(labels)["stage"]
+        stages[stage] = summarize_samples(registry.samples("broadcast_stage_seconds", stage=stage))
+    ordered = {stage: stages.pop(stage) for stage in STAGE_ORDER if stage in stages}
+    ordered.update(stages)
+    return {
+        "stages": ordered,
+        "end_to_end": summarize_samples(registry.samples("broadcast_play_latency_seconds")),
+        "plays": registry.counter_value("broadcast_plays"),
+    }
+
+def run_app_script(script_path, secrets, session_state, timeout=600):
+    """
+    Runs a Streamlit script headless with `streamlit.testing.v1.AppTest` and returns the AppTest.
+
+    Parameters:
+        script_path (str): Path of the Streamlit script.
+        secrets (dict): Values for st.secrets.
+        session_state (dict): Values set in st.session_state before the run.
+        timeout (float): Run timeout in seconds.
+
+    Returns:
+        AppTest: The finished app run.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(REPO_ROOT)  # prompt templates are loaded relative to the repo root
+    app = AppTest.from_file(script_path, default_timeout=timeout)
+    for key, value in secrets.items():
+        app.secrets[key] = value
+    for key, value in session_state.items():
+        app.session_state[key] = value
+    app.run()
+    if app.exception:
+        raise RuntimeError(f"Benchmark app raised: {[e.value for e in app.exception]}")
+    return app
+
+def flatten_metrics(report, prefix=""):
+    """
+    Flattens the numeric leaves of a report into {"stages.llm.p95": value}.
+    """
+    flat = {}
+    for key, value in report.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_metrics(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def is_higher_better(metric):
+    return "throughput" in metric
+
+def is_latency(metric):
+    return metric.startswith(("stages.", "end_to_end."))
+
+def diff_against_baseline(report, baseline, metrics, threshold=0.10, min_latency_change=0.001):
+    """
+    Compares report metrics with a baseline report.
+
+    Parameters:
+        report (dict): Current report.
+        baseline (dict): Baseline report.
+        metrics (list): Flattened metric names to compare (prefix match, e.g. "stages.").
+        threshold (float): Relative change treated as a regression.
+        min_latency_change (float): Latency changes smaller than this (seconds) are never
+                                    flagged, so sub-millisecond stages don't report noise.
+
+    Returns:
+        list: Rows of (metric, baseline, current, relative_change, regressed).
+    """
+    current, previous = flatten_metrics(report), flatten_metrics(baseline)
+    rows = []
+    for metric in sorted(current):
+        if not any(metric.startswith(prefix) for prefix in metrics) or metric.endswith(".count"):
+            continue
+        if metric not in previous or previous[metric] in (0, None) or current[metric] is None:
+            continue
+        change = (current[metric] - previous[metric]) / previous[metric]
+        regressed = -change > threshold if is_higher_better(metric) else change > threshold
+        if is_latency(metric) and abs(current[metric] - previous[metric]) < min_latency_change:
+            regressed = False
+        rows.append((metric, previous[metric], current[metric], change, regressed))
+    return rows
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as file:
+        return json.load(file)
+
+def save_report(report, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2, sort_keys=True)
+
+def print_diff(rows):
+    print(f"{'metric':<40} {'baseline':>12} {'current':>12} {'change':>9}")
+    for metric, previous, current, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{metric:<40} {previous:>12.4f} {current:>12.4f} {change:>+8.1%}{flag}")
@@ -0,0 +1,47 @@
+"""
+Streamlit script for one simulated viewer, driven by `benchmarks/load_test.py` through AppTest.
+
+Follows one game with its own priority players and prompt for a fixed wall-clock duration, the
+way a viewer's session would: one poll every POLL_INTERVAL_SECONDS while the game is live.
+Reads its configuration from `st.session_state.load_config` and leaves a per-session summary
+in `st.session_state.load_report`.
+"""
+
+import time
+
+import streamlit as st
+
+import utils.utils_functions as uf
+from sports_data import get_players_by_team
+
+config = st.session_state.load_config
+started = time.perf_counter()
+
+uf.initialize_session_state()
+st.session_state.api_mode = "Replay"
+st.session_state.logged_in = True
+st.session_state.username = config["username"]
+st.session_state.input_prompt = config["input_prompt"]
+st.session_state.broadcast_temp = 0.7
+
+home_players = get_players_by_team(config["home_team"])
+away_players = get_players_by_team(config["away_team"])
+players = {p["Name"]: p["PlayerID"] for p in home_players + away_players}
+skill_players = [p for p in home_players + away_players if p["Position"] in ("QB", "RB", "WR", "TE")]
+# Every viewer favors a different slice of the skill players
+offset = config["player_offset"] % max(len(skill_players), 1)
+favorites = (skill_players[offset:] + skill_players[:offset])[: config["priority_players"]]
+st.session_state.selected_players = {f"{p['Name']} ({p['Position']}, {p['Team']})": p["PlayerID"] for p in favorites}
+
+container = st.container()
+uf.handle_broadcast_start(config["score_id"], st.session_state.replay_api_key, config["season_code"], container, players)
+polls = 0
+while st.session_state.broadcasting and time.perf_counter() - started < config["duration"]:
+    uf.process_new_plays(config["score_id"], st.session_state.replay_api_key, config["season_code"], container, players)
+    polls += 1
+
+st.session_state.load_report = {
+    "polls": polls,
+    "last_sequence": st.session_state.last_sequence,
+    "seconds": time.perf_counter() - started,
+}
@@ -0,0 +1,304 @@
+"""
+Load test: N concurrent viewer sessions in one app server process.
+
+Each viewer is a real app session (the broadcast pipeline run headless with AppTest, see
+`benchmarks/load_session.py`) with its own game, priority players and prompt, polling at the
+app's poll interval against the local stand-in SportsDataIO server and stubbed LLM. The
+stand-in reveals plays on a clock, so viewers of the same game see the same live game. For
+every load level (a number of sessions, each run in a fresh process so caches and memory
+start cold) it reports:
+
+- upstream calls (total, per minute and per session-minute) and LLM calls per update
+- memory: resident set size before and after the sessions, and its growth per session
+- CPU seconds used and average cores busy
+- update latency (poll start to rendered update) p50/p95/p99 and per-stage p95
+- updates rendered per second, and errors
+
+and diffs the results against a stored baseline. Run from the repo root:
+
+    python -m benchmarks.load_test                               # 1, 10, 25 and 50 sessions
+    python -m benchmarks.load_test --sessions 100,200 --games 13 # a full Sunday slate
+    python -m benchmarks.load_test --save-baseline               # record a new baseline
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.harness import (
+    REPO_ROOT,
+    diff_against_baseline,
+    load_baseline,
+    print_diff,
+    registry_report,
+    run_app_script,
+    save_report,
+    summarize_samples,
+)
+from benchmarks.recordings import synthesize_recording
+from benchmarks.standin_server import StandInServer, StandInState
+
+LOAD_SESSION = os.path.join(REPO_ROOT, "benchmarks", "load_session.py")
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "baselines", "load_test.json")
+# Relative change flagged as a regression: tail latencies and CPU per update of a 60 s run vary
+# by up to ~30% between runs of the same tree, so a tighter default flags noise
+LOAD_TEST_THRESHOLD = 0.40
+# Compared per level (levels.<sessions>.<metric>)
+COMPARED_METRICS = (
+    "throughput_updates_per_second", "upstream_calls_per_session_minute", "llm_calls_per_update",
+    "memory_per_session_mb", "cpu_seconds_per_update", "latency.",
+)
+PROMPTS = (
+    "",
+    "Keep it short and punchy.",
+    "Explain the strategy behind each play for a new fan.",
+    "Focus on fantasy football implications.",
+    "Call it like an excited radio announcer.",
+)
+
+def resident_memory_mb():
+    """
+    Current resident set size of this process in MB (peak RSS where /proc isn't available).
+    """
+    try:
+        with open("/proc/self/status", "r") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+def set_global_secrets(secrets):
+    """
+    Installs secrets for every session of this process. AppTest swaps st.secrets for the
+    duration of each run, which concurrent runs would undo for one another, so the sessions
+    are run without their own secrets and read these.
+    """
+    import streamlit as st
+    from streamlit.runtime.secrets import Secrets
+
+    installed = Secrets()
+    installed._secrets = secrets
+    st.secrets = installed
+
+def run_level(sessions, games=4, duration=60.0, seconds_per_play=6.0, llm_latency=0.5, poll_interval=3.0,
+              priority_players=3, plays=200):
+    """
+    Runs one load level in this process: starts the stand-in, runs the sessions concurrently
+    for duration seconds and measures them. Meant to run in a fresh process (see main).
+
+    Parameters:
+        sessions (int): Concurrent viewer sessions.
+        games (int): Live games; sessions are spread over them round-robin.
+        duration (float): Seconds each session broadcasts for.
+        seconds_per_play (float): Seconds between plays of each game.
+        llm_latency (float): Stub LLM latency in seconds.
+        poll_interval (float): Seconds between a session's polls.
+        priority_players (int): Priority players per session.
+        plays (int): Plays in each synthetic game (enough to outlast the duration).
+
+    Returns:
+        dict: Measurements of the level.
+    """
+    import utils.utils_functions as uf
+    from utils import metrics
+
+    recordings = [synthesize_recording(num_plays=plays, seed=7 + game, score_id=18000 + game) for game in range(games)]
+    state = StandInState(recordings, llm_latency=llm_latency, seconds_per_play=seconds_per_play)
+    server = StandInServer(state).start()
+    set_global_secrets({
+        "api_keys": {"sportsdataio_replay": "load", "sportsdataio_live": "load", "openai": "load"},
+        "api_urls": {"sportsdataio_replay": server.url, "openai": f"{server.url}/v1"},
+        # Every level starts cold so levels and runs stay comparable
+        "snapshot_store": {"enabled": False},
+    })
+    uf.POLL_INTERVAL_SECONDS = poll_interval
+
+    configs = []
+    for index in range(sessions):
+        recording = recordings[index % games]
+        score = recording["snapshots"][-1]["score"]
+        configs.append({
+            "username": f"viewer{index}",
+            "score_id": recording["score_id"],
+            "season_code": recording["season_code"],
+            "home_team": score["HomeTeam"],
+            "away_team": score["AwayTeam"],
+            "priority_players": priority_players,
+            "player_offset": index // games * priority_players,
+            "input_prompt": PROMPTS[index % len(PROMPTS)],
+            "duration": duration,
+        })
+
+    metrics.REGISTRY.reset()
+    state.reset()
+    memory_before = resident_memory_mb()
+    cpu_before = cpu_seconds()
+    started = time.perf_counter()
+
+    results = [None] * sessions
+    def run_session(index):
+        try:
+            app = run_app_script(LOAD_SESSION, {}, {"load_config": configs[index]}, timeout=duration + 300)
+            results[index] = {**app.session_state["load_report"], "errors": [element.value for element in app.error]}
+        except Exception as e:
+            results[index] = {"errors": [f"{type(e).__name__}: {e}"]}
+    threads = [threading.Thread(target=run_session, args=(index,)) for index in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    wall_seconds = time.perf_counter() - started
+    used_cpu = cpu_seconds() - cpu_before
+    memory_after = resident_memory_mb()
+    server.stop()
+
+    endpoints = state.snapshot_stats()
+    upstream_calls = sum(entry["calls"] for name, entry in endpoints.items() if name != "llm")
+    llm_calls = endpoints.get("llm", {}).get("calls", 0)
+    stages = registry_report(metrics.REGISTRY)
+    updates = stages["plays"]
+    session_minutes = sessions * wall_seconds / 60
+    errors = sorted({error for result in results for error in result["errors"]})
+    return {
+        "sessions": sessions,
+        "updates": updates,
+        "throughput_updates_per_second": updates / wall_seconds,
+        "polls_per_session": summarize_samples([result.get("polls", 0) for result in results]),
+        "upstream_calls": upstream_calls,
+        "upstream_calls_per_minute": upstream_calls / (wall_seconds / 60),
+        "upstream_calls_per_session_minute": upstream_calls / session_minutes,
+        "upstream_bytes_per_session_minute": sum(entry["bytes"] for name, entry in endpoints.items() if name != "llm") / session_minutes,
+        "llm_calls": llm_calls,
+        "llm_calls_per_update": llm_calls / updates if updates else None,
+        "memory_before_mb": memory_before,
+        "memory_after_mb": memory_after,
+        "memory_per_session_mb": (memory_after - memory_before) / sessions,
+        "cpu_seconds": used_cpu,
+        "cpu_seconds_per_update": used_cpu / updates if updates else None,
+        "cpu_cores_busy": used_cpu / wall_seconds,
+        "latency": stages["end_to_end"],
+        "stage_p95": {stage: summary["p95"] for stage, summary in stages["stages"].items()},
+        "wall_seconds": wall_seconds,
+        "endpoints": endpoints,
+        "errors": errors,
+        "failed_sessions": sum(1 for result in results if "polls" not in result),
+    }
+
+def run_level_in_subprocess(sessions, options):
+    completed = subprocess.run(
+        [sys.executable, "-W", "ignore", "-m", "benchmarks.load_test", "--run-level", str(sessions), "--level-options", json.dumps(options)],
+        cwd=REPO_ROOT,
+        env={**os.environ, "PYTHONPATH": REPO_ROOT},
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Load level {sessions} failed:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def run_benchmark(levels=(1, 10, 25, 50), **options):
+    """
+    Runs each load level in a fresh process.
+
+    Parameters:
+        levels (list): Numbers of concurrent sessions.
+        **options: run_level options shared by the levels.
+
+    Returns:
+        dict: Benchmark report, with the levels keyed by session count.
+    """
+    report = {"levels": {}, "config": {"levels": list(levels), **options, "python": sys.version.split()[0], "cpus": os.cpu_count()}}
+    for sessions in levels:
+        print(f"Running {sessions} sessions...", file=sys.stderr, flush=True)
+        report["levels"][str(sessions)] = run_level_in_subprocess(sessions, options)
+    return report
+
+def print_report(report):
+    print(
+        f"{'sessions':>8} {'updates':>8} {'upd/s':>7} {'upstream/min':>13} {'per sess-min':>13} {'llm/upd':>8} "
+        f"{'MB/sess':>8} {'cores':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}"
+    )
+    for level in report["levels"].values():
+        latency = level["latency"]
+        print(
+            f"{level['sessions']:>8} {level['updates']:>8} {level['throughput_updates_per_second']:>7.2f} "
+            f"{level['upstream_calls_per_minute']:>13.1f} {level['upstream_calls_per_session_minute']:>13.2f} "
+            f"{level['llm_calls_per_update'] or 0:>8.2f} {level['memory_per_session_mb']:>8.2f} {level['cpu_cores_busy']:>6.2f} "
+            f"{(latency['p50'] or 0) * 1000:>8.1f} {(latency['p95'] or 0) * 1000:>8.1f} {(latency['p99'] or 0) * 1000:>8.1f} "
+            f"{len(level['errors']) + level['failed_sessions']:>7}"
+        )
+    for level in report["levels"].values():
+        for error in level["errors"]:
+            print(f"  [{level['sessions']} sessions] {error}")
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sessions", default="1,10,25,50", help="Comma-separated numbers of concurrent sessions.")
+    arg_parser.add_argument("--games", type=int, default=4, help="Live games the sessions are spread over.")
+    arg_parser.add_argument("--duration", type=float, default=60.0, help="Seconds each session broadcasts for.")
+    arg_parser.add_argument("--seconds-per-play", type=float, default=6.0, help="Seconds between plays of each game.")
+    arg_parser.add_argument("--llm-latency", type=float, default=0.5, help="Stub LLM latency in seconds.")
+    arg_parser.add_argument("--poll-interval", type=float, default=3.0, help="Seconds between a session's polls.")
+    arg_parser.add_argument("--priority-players", type=int, default=3)
+    arg_parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline report to diff against.")
+    arg_parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline.")
+    arg_parser.add_argument("--output", help="Also write the report to this path.")
+    arg_parser.add_argument(
+        "--threshold", type=float, default=LOAD_TEST_THRESHOLD, help="Relative change flagged as a regression."
+    )
+    arg_parser.add_argument("--fail-on-regression", action="store_true")
+    arg_parser.add_argument("--run-level", type=int, help=argparse.SUPPRESS)
+    arg_parser.add_argument("--level-options", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args(argv)
+
+    if args.run_level:
+        # Worker process of one level: the report goes to stdout as the last line
+        print(json.dumps(run_level(args.run_level, **json.loads(args.level_options))))
+        return 0
+
+    report = run_benchmark(
+        levels=[int(level) for level in args.sessions.split(",")],
+        games=args.games,
+        duration=args.duration,
+        seconds_per_play=args.seconds_per_play,
+        llm_latency=args.llm_latency,
+        poll_interval=args.poll_interval,
+        priority_players=args.priority_players,
+    )
+    print_report(report)
+    if args.output:
+        save_report(report, args.output)
+    if args.save_baseline:
+        save_report(report, args.baseline)
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+    if baseline.get("config") != report["config"]:
+        # Levels only compare under the same load, machine and Python
+        print("\nWarning: baseline was recorded with a different configuration:", baseline.get("config"))
+    print("\n=== Diff against baseline ===")
+    compared = [f"levels.{sessions}.{metric}" for sessions in report["levels"] for metric in COMPARED_METRICS]
+    rows = diff_against_baseline(report, baseline, compared, threshold=args.threshold)
+    print_diff(rows)
+    regressed = any(row[4] for row in rows)
+    return 1 if regressed and args.fail_on_regression else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
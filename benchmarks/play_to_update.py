@@ -0,0 +1,204 @@
+"""
+End-to-end latency benchmark for the play-to-update path.
+
+Replays recorded games through the broadcast pipeline (the real app code, run headless with
+AppTest) against the local stand-in SportsDataIO server and a stubbed LLM, then reports:
+
+- p50/p95/p99 per stage (replay clock, PBP fetch, stat fetch, context build, prompt format, LLM, render)
+- play-ingest to rendered-update latency
+- throughput in plays per second while catching up
+- upstream HTTP calls and bytes per play, LLM calls per play
+
+and diffs the results against a stored baseline. Run from the repo root:
+
+    python -m benchmarks.play_to_update                     # synthetic game, compare to baseline
+    python -m benchmarks.play_to_update --save-baseline     # record a new baseline
+    python -m benchmarks.play_to_update --recording benchmarks/recordings/game.json --plays-per-poll 5
+    python -m benchmarks.play_to_update --games 13                # a full Sunday slate in RedZone mode
+    python -m benchmarks.play_to_update --fail-endpoint odds      # broadcast through an odds outage
+"""
+
+import argparse
+import os
+import sys
+
+from benchmarks.harness import (
+    REPO_ROOT,
+    diff_against_baseline,
+    load_baseline,
+    print_diff,
+    run_app_script,
+    save_report,
+)
+from benchmarks.recordings import load_recording, synthesize_recording
+from benchmarks.standin_server import StandInServer, StandInState
+
+BENCH_APP = os.path.join(REPO_ROOT, "benchmarks", "bench_app.py")
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "baselines", "play_to_update.json")
+COMPARED_METRICS = ("stages.", "end_to_end.", "throughput", "http_calls_per_play", "bytes_per_play", "llm_calls_per_play")
+
+def run_benchmark(recording, plays_per_poll=1, llm_latency=0.0, priority_players=3, input_prompt="", max_polls=1000,
+                  session_token_budget=None, poll_interval=0.0, redzone_recordings=(), failing_endpoints=()):
+    """
+    Runs one benchmark pass over a recording.
+
+    Parameters:
+        recording (dict): Recording to replay.
+        plays_per_poll (int): Plays revealed per poll (> 1 measures catch-up throughput).
+        llm_latency (float): Stub LLM latency in seconds.
+        priority_players (int): Number of priority players selected for the session.
+        input_prompt (str): User tone/storyline prompt.
+        max_polls (int): Safety cap on play-by-play polls.
+        session_token_budget (int): Optional per-session LLM token budget.
+        poll_interval (float): Idle seconds between polls (> 0 exercises the prefetch stage).
+        redzone_recordings (list): Other games followed together with the recording in RedZone
+                                   (multi-game) mode.
+        failing_endpoints (iterable): Stand-in endpoints that fail for the whole run.
+
+    Returns:
+        dict: Benchmark report.
+    """
+    state = StandInState(
+        [recording, *redzone_recordings], plays_per_poll=plays_per_poll, llm_latency=llm_latency, failing_endpoints=failing_endpoints
+    )
+    server = StandInServer(state).start()
+    try:
+        score = recording["snapshots"][-1]["score"]
+        config = {
+            "standin_url": server.url,
+            "score_id": recording["score_id"],
+            "season_code": recording["season_code"],
+            "home_team": score["HomeTeam"],
+            "away_team": score["AwayTeam"],
+            "final_sequence": recording["plays"][-1]["Sequence"],
+            "priority_players": priority_players,
+            "input_prompt": input_prompt,
+            "max_polls": max_polls,
+            "poll_interval": poll_interval,
+        }
+        if redzone_recordings:
+            config["redzone_games"] = [
+                {
+                    "ScoreID": game["score_id"],
+                    "AwayTeam": game["snapshots"][-1]["score"]["AwayTeam"],
+                    "HomeTeam": game["snapshots"][-1]["score"]["HomeTeam"],
+                    "final_sequence": game["plays"][-1]["Sequence"],
+                }
+                for game in [recording, *redzone_recordings]
+            ]
+        secrets = {
+            "api_keys": {"sportsdataio_replay": "benchmark", "sportsdataio_live": "benchmark", "openai": "benchmark"},
+            "api_urls": {"sportsdataio_replay": server.url, "openai": f"{server.url}/v1"},
+            # Every run starts cold so runs stay comparable
+            "snapshot_store": {"enabled": False},
+            # One session: every poll must reach the stand-in, which reveals plays per poll
+            "shared_backend": {"upstream_share_seconds": 0},
+        }
+        if session_token_budget:
+            secrets["llm_budget"] = {"session_tokens": session_token_budget}
+        app = run_app_script(BENCH_APP, secrets, {"bench_config": config})
+        report = dict(app.session_state["bench_report"])
+        report["errors"] = [element.value for element in app.error]
+        report["warnings"] = [element.value for element in app.warning]
+    finally:
+        server.stop()
+
+    endpoints = state.snapshot_stats()
+    plays = max(report["plays"], 1)
+    upstream = {name: entry for name, entry in endpoints.items() if name != "llm"}
+    report["endpoints"] = endpoints
+    report["http_calls_per_play"] = sum(entry["calls"] for entry in upstream.values()) / plays
+    report["bytes_per_play"] = sum(entry["bytes"] for entry in upstream.values()) / plays
+    report["llm_calls_per_play"] = endpoints.get("llm", {}).get("calls", 0) / plays
+    report["config"] = {
+        "score_id": recording["score_id"],
+        "recorded_plays": len(recording["plays"]),
+        "plays_per_poll": plays_per_poll,
+        "llm_latency": llm_latency,
+        "priority_players": priority_players,
+        "session_token_budget": session_token_budget,
+        "poll_interval": poll_interval,
+    }
+    if failing_endpoints:
+        report["config"]["failing_endpoints"] = sorted(failing_endpoints)
+    if redzone_recordings:
+        report["config"]["games"] = 1 + len(redzone_recordings)
+    return report
+
+def print_report(report):
+    print(f"Plays rendered: {report['plays']} over {report['polls']} polls, errors: {len(report['errors'])}")
+    print(f"{'stage':<16} {'count':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    rows = list(report["stages"].items()) + [("end_to_end", report["end_to_end"])]
+    for stage, summary in rows:
+        if summary["count"]:
+            print(
+                f"{stage:<16} {summary['count']:>6} {summary['p50'] * 1000:>10.2f} "
+                f"{summary['p95'] * 1000:>10.2f} {summary['p99'] * 1000:>10.2f}"
+            )
+    if report["throughput_plays_per_second"]:
+        print(f"Catch-up throughput: {report['throughput_plays_per_second']:.2f} plays/s")
+    print(f"HTTP calls per play: {report['http_calls_per_play']:.2f}")
+    print(f"Bytes per play: {report['bytes_per_play']:,.0f}")
+    print(f"LLM calls per play: {report['llm_calls_per_play']:.2f}")
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--recording", action="append", help="Recording file(s) to replay (default: synthetic game).")
+    arg_parser.add_argument("--synthetic-plays", type=int, default=120, help="Plays in the synthetic game.")
+    arg_parser.add_argument("--plays-per-poll", type=int, default=1, help="Plays revealed per poll.")
+    arg_parser.add_argument("--llm-latency", type=float, default=0.0, help="Stub LLM latency in seconds.")
+    arg_parser.add_argument("--priority-players", type=int, default=3)
+    arg_parser.add_argument("--session-token-budget", type=int, help="Per-session LLM token budget.")
+    arg_parser.add_argument("--poll-interval", type=float, default=0.0, help="Idle seconds between polls (exercises prefetching).")
+    arg_parser.add_argument("--games", type=int, default=1, help="Games followed at once in RedZone mode (adds synthetic games).")
+    arg_parser.add_argument("--fail-endpoint", action="append", default=[], help="Stand-in endpoint that fails for the whole run (e.g. odds).")
+    arg_parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline report to diff against.")
+    arg_parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline.")
+    arg_parser.add_argument("--output", help="Also write the report to this path.")
+    arg_parser.add_argument("--threshold", type=float, default=0.10, help="Relative change flagged as a regression.")
+    arg_parser.add_argument("--fail-on-regression", action="store_true")
+    args = arg_parser.parse_args(argv)
+
+    recordings = [load_recording(path) for path in args.recording or []] or [synthesize_recording(num_plays=args.synthetic_plays)]
+    reports = []
+    for recording in recordings:
+        report = run_benchmark(
+            recording,
+            plays_per_poll=args.plays_per_poll,
+            llm_latency=args.llm_latency,
+            priority_players=args.priority_players,
+            session_token_budget=args.session_token_budget,
+            poll_interval=args.poll_interval,
+            failing_endpoints=args.fail_endpoint,
+            redzone_recordings=[
+                synthesize_recording(num_plays=args.synthetic_plays, seed=7 + game, score_id=recording["score_id"] + game)
+                for game in range(1, args.games)
+            ],
+        )
+        print(f"\n=== ScoreID {recording['score_id']} ===")
+        print_report(report)
+        reports.append(report)
+
+    # Compare the first recording (the baseline is recorded for a single game)
+    report = reports[0]
+    if args.output:
+        save_report(report, args.output)
+    if args.save_baseline:
+        save_report(report, args.baseline)
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+    if baseline.get("config") != report["config"]:
+        print("\nWarning: baseline was recorded with a different configuration:", baseline.get("config"))
+    print("\n=== Diff against baseline ===")
+    rows = diff_against_baseline(report, baseline, COMPARED_METRICS, threshold=args.threshold)
+    print_diff(rows)
+    regressed = any(row[4] for row in rows)
+    return 1 if regressed and args.fail_on_regression else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
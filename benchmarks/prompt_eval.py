@@ -0,0 +1,308 @@
+"""
+Prompt A/B evaluation over recorded games.
+
+Replays a recording (the real app code, run headless with AppTest, see
+`benchmarks/prompt_eval_app.py`) against the local stand-in SportsDataIO server, builds each
+play's context once and generates its update with every prompt variant (instruction templates,
+e.g. one downloaded from the Prompt Sandbox). Generations run on a bounded pool and are cached
+by request, so re-running an evaluation only pays for new or edited variants. For each variant
+it reports:
+
+- updates, errors and cached generations
+- prompt/completion tokens (total and per update) and cost
+- LLM latency p50/p95 (uncached generations only)
+- output length in characters and sentences
+- rule violations: checks of the instruction template's hard rules, per rule and per update
+
+Run from the repo root:
+
+    python -m benchmarks.prompt_eval --variant prompt_template.txt            # sandbox prompt vs the repo's
+    python -m benchmarks.prompt_eval --variant a=a.txt --variant b=b.txt --recording benchmarks/recordings/game.json
+    python -m benchmarks.prompt_eval --variant prompt_template.txt --live     # real model (key from secrets.toml)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tomllib
+
+from benchmarks.harness import REPO_ROOT, run_app_script, save_report, summarize_samples
+from benchmarks.recordings import load_recording, synthesize_recording
+from benchmarks.standin_server import StandInServer, StandInState
+from utils.narrative_memory import SENTENCE_SPLIT, STAT_PATTERN
+from utils.play_importance import TIER_SHORT
+from utils.token_accounting import completion_cost
+
+EVAL_APP = os.path.join(REPO_ROOT, "benchmarks", "prompt_eval_app.py")
+BASELINE_PROMPT = os.path.join(REPO_ROOT, "prompts", "broadcast_instructions_prompt.txt")
+DEFAULT_CACHE = os.path.join(REPO_ROOT, ".cache", "prompt_eval.sqlite3")
+SECRETS_FILE = os.path.join(REPO_ROOT, ".streamlit", "secrets.toml")
+
+# Sentence limits from the instruction template: routine plays, big plays, plays of a priority player
+SENTENCE_LIMITS = {"short": 2, "full": 6, "priority": 8}
+GAME_STATE_PATTERNS = (
+    re.compile(r"\b(?:1st|2nd|3rd|4th|first|second|third|fourth)(?: down)?\s*(?:&|and)\s*(?:\d+|goal)\b", re.IGNORECASE),
+    re.compile(r"\b\d{1,2}:\d{2}\b"),
+)
+TIMEOUT_PATTERN = re.compile(r"\btime[- ]?outs?\b", re.IGNORECASE)
+NUMBER = re.compile(r"\d[\d,.]*")
+
+def generation_key(model, temperature, max_tokens, messages):
+    """
+    Cache key of a generation: everything that decides the request.
+    """
+    request = json.dumps([model, temperature, max_tokens, messages], sort_keys=True)
+    return "prompt_eval:" + hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+def _mentions(text, name):
+    return re.search(rf"\b{re.escape(name)}\b", text) is not None
+
+def rule_violations(text, play, tier, data_prompt, involved_player_ids, selected_players, players):
+    """
+    Checks an update against the hard rules of the broadcast instructions.
+
+    Parameters:
+        text (str): The generated update.
+        play (PlayRecord): The play it covers.
+        tier (str): The play's importance tier.
+        data_prompt (str): The data prompt the update was generated from.
+        involved_player_ids (list): PlayerIDs involved in the play.
+        selected_players (dict): Priority players ("Name (Pos, Team)" -> PlayerID).
+        players (dict): Roster of both teams (name -> PlayerID).
+
+    Returns:
+        list: Names of the violated rules (one entry per violation).
+    """
+    violations = []
+    involved = set(involved_player_ids)
+
+    # Priority players who weren't involved in the play must not be talked about
+    for label, player_id in selected_players.items():
+        name = label.split(" (")[0]
+        if player_id not in involved and (_mentions(text, name) or _mentions(text, name.split()[-1])):
+            violations.append("uninvolved_priority_player")
+
+    # Players named in the update should come from the context
+    for name in players:
+        if _mentions(text, name) and name not in data_prompt:
+            violations.append("unknown_player")
+
+    # Stats quoted in the update should be backed by a number in the context
+    for match in STAT_PATTERN.finditer(text):
+        number = NUMBER.match(match.group()).group().rstrip(".,").replace(",", "")
+        if not re.search(rf"(?<![\d.]){re.escape(number)}(?![\d])", data_prompt.replace(",", "")):
+            violations.append("ungrounded_stat")
+
+    # Score, clock and down & distance are already in the header (unless it's a scoring play)
+    if not play.is_scoring_play and any(pattern.search(text) for pattern in GAME_STATE_PATTERNS):
+        violations.append("game_state_restated")
+
+    if TIMEOUT_PATTERN.search(text) and not TIMEOUT_PATTERN.search(play.description):
+        violations.append("timeout_assumed")
+
+    limit = SENTENCE_LIMITS["short" if tier == TIER_SHORT else "priority" if involved & set(selected_players.values()) else "full"]
+    if count_sentences(text) > limit:
+        violations.append("over_length")
+    return violations
+
+def count_sentences(text):
+    return len([sentence for sentence in SENTENCE_SPLIT.split(text.strip()) if sentence])
+
+def summarize_variant(generations, model):
+    """
+    Aggregates a variant's generations into its report entry.
+    """
+    ok = [generation for generation in generations if "error" not in generation]
+    prompt_tokens = sum(generation["prompt_tokens"] for generation in ok)
+    completion_tokens = sum(generation["completion_tokens"] for generation in ok)
+    cached_tokens = sum(generation.get("cached_tokens", 0) for generation in ok)
+    violations = {}
+    for generation in ok:
+        for rule in generation["violations"]:
+            violations[rule] = violations.get(rule, 0) + 1
+    if len(ok) < len(generations):
+        violations["error"] = len(generations) - len(ok)
+    updates = max(len(ok), 1)
+    return {
+        "template_version": ok[0]["template_version"] if ok else None,
+        "updates": len(ok),
+        "errors": len(generations) - len(ok),
+        "cached": sum(1 for generation in ok if generation["cached"]),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "tokens_per_update": (prompt_tokens + completion_tokens) / updates,
+        "completion_tokens_per_update": completion_tokens / updates,
+        "cost": completion_cost(model, prompt_tokens, completion_tokens, cached_tokens),
+        "latency": summarize_samples([generation["latency"] for generation in ok if not generation["cached"]]),
+        "chars_per_update": sum(len(generation["text"]) for generation in ok) / updates,
+        "sentences_per_update": sum(count_sentences(generation["text"]) for generation in ok) / updates,
+        "violations": dict(sorted(violations.items())),
+        "updates_with_violations": sum(1 for generation in ok if generation["violations"]) / updates,
+    }
+
+def openai_api_key():
+    """
+    Returns the OpenAI key for live runs: OPENAI_API_KEY, else `api_keys.openai` in secrets.toml.
+    """
+    if os.environ.get("OPENAI_API_KEY"):
+        return os.environ["OPENAI_API_KEY"]
+    if os.path.exists(SECRETS_FILE):
+        with open(SECRETS_FILE, "rb") as f:
+            return tomllib.load(f).get("api_keys", {}).get("openai")
+    return None
+
+def run_evaluation(recording, variants, max_plays=40, priority_players=3, input_prompt="", concurrency=4,
+                   temperature=0.7, live_api_key=None, cache_path=DEFAULT_CACHE):
+    """
+    Runs one evaluation of prompt variants over a recording.
+
+    Parameters:
+        recording (dict): Recording to replay.
+        variants (dict): Instruction templates by variant name.
+        max_plays (int): LLM-tier plays evaluated (template-tier plays never reach the model).
+        priority_players (int): Number of priority players selected for the session.
+        input_prompt (str): User tone/storyline prompt.
+        concurrency (int): Generations in flight at once.
+        temperature (float): Sampling temperature.
+        live_api_key (str): OpenAI key to evaluate against the real model (default: stub LLM).
+        cache_path (str): Generation cache (SQLite), or None to always generate.
+
+    Returns:
+        tuple: The report (dict) and the generations (list of dicts).
+    """
+    from llm_interface import BROADCAST_MODEL
+
+    # Reveal the whole game up front: the driver walks it play by play from the first poll
+    state = StandInState([recording], plays_per_poll=1)
+    server = StandInServer(state).start()
+    try:
+        score = recording["snapshots"][-1]["score"]
+        config = {
+            "score_id": recording["score_id"],
+            "season_code": recording["season_code"],
+            "home_team": score["HomeTeam"],
+            "away_team": score["AwayTeam"],
+            "final_sequence": recording["plays"][-1]["Sequence"],
+            "max_plays": max_plays,
+            "priority_players": priority_players,
+            "input_prompt": input_prompt,
+            "variants": variants,
+            "concurrency": concurrency,
+            "temperature": temperature,
+            "cache_path": cache_path,
+        }
+        secrets = {
+            "api_keys": {"sportsdataio_replay": "eval", "sportsdataio_live": "eval", "openai": live_api_key or "eval"},
+            "api_urls": {"sportsdataio_replay": server.url} if live_api_key else {"sportsdataio_replay": server.url, "openai": f"{server.url}/v1"},
+            "snapshot_store": {"enabled": False},
+            "shared_backend": {"upstream_share_seconds": 0},
+        }
+        app = run_app_script(EVAL_APP, secrets, {"eval_config": config})
+        generations = list(app.session_state["eval_results"])
+        errors = [element.value for element in app.error]
+    finally:
+        server.stop()
+
+    report = {
+        "config": {
+            "score_id": recording["score_id"],
+            "model": BROADCAST_MODEL if live_api_key else "stub",
+            "plays": len({generation["play_id"] for generation in generations}),
+            "priority_players": priority_players,
+            "input_prompt": input_prompt,
+            "temperature": temperature,
+        },
+        "variants": {
+            name: summarize_variant([generation for generation in generations if generation["variant"] == name], BROADCAST_MODEL)
+            for name in variants
+        },
+        "errors": errors,
+    }
+    return report, generations
+
+def print_report(report):
+    config = report["config"]
+    print(f"Plays evaluated: {config['plays']} (ScoreID {config['score_id']}, model {config['model']})")
+    print(
+        f"{'variant':<16} {'updates':>7} {'cached':>6} {'tok/upd':>8} {'cost $':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'chars':>6} {'sents':>5} {'viol %':>6}"
+    )
+    for name, entry in report["variants"].items():
+        latency = entry["latency"]
+        print(
+            f"{name:<16} {entry['updates']:>7} {entry['cached']:>6} {entry['tokens_per_update']:>8.0f} {entry['cost']:>9.4f} "
+            f"{latency['p50'] * 1000 if latency['count'] else 0:>8.0f} {latency['p95'] * 1000 if latency['count'] else 0:>8.0f} "
+            f"{entry['chars_per_update']:>6.0f} {entry['sentences_per_update']:>5.1f} {entry['updates_with_violations']:>6.0%}"
+        )
+    rules = sorted({rule for entry in report["variants"].values() for rule in entry["violations"]})
+    if rules:
+        print(f"\n{'rule':<28}" + "".join(f"{name:>16}" for name in report["variants"]))
+        for rule in rules:
+            print(f"{rule:<28}" + "".join(f"{entry['violations'].get(rule, 0):>16}" for entry in report["variants"].values()))
+    for error in report["errors"]:
+        print(f"App error: {error}")
+
+def load_variants(specs):
+    """
+    Parses --variant values ("name=path" or "path", named after the file) into templates by name.
+    The repo's instruction template is added as "baseline" when fewer than two are given.
+    """
+    variants = {}
+    for spec in specs or []:
+        name, _, path = spec.rpartition("=")
+        name = name or os.path.splitext(os.path.basename(path))[0]
+        with open(path, "r", encoding="utf-8") as f:
+            variants[name] = f.read()
+    if len(variants) < 2:
+        with open(BASELINE_PROMPT, "r", encoding="utf-8") as f:
+            variants = {"baseline": f.read(), **variants}
+    return variants
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--variant", action="append", help="Instruction template to evaluate, as name=path or path (repeatable).")
+    arg_parser.add_argument("--recording", help="Recording to replay (default: synthetic game).")
+    arg_parser.add_argument("--synthetic-plays", type=int, default=120, help="Plays in the synthetic game.")
+    arg_parser.add_argument("--plays", type=int, default=40, help="LLM-tier plays to evaluate.")
+    arg_parser.add_argument("--priority-players", type=int, default=3)
+    arg_parser.add_argument("--input-prompt", default="", help="User tone/storyline prompt.")
+    arg_parser.add_argument("--concurrency", type=int, default=4, help="Generations in flight at once.")
+    arg_parser.add_argument("--temperature", type=float, default=0.7)
+    arg_parser.add_argument("--live", action="store_true", help="Use the real model (OPENAI_API_KEY or secrets.toml).")
+    arg_parser.add_argument("--no-cache", action="store_true", help="Regenerate every update instead of reusing cached ones.")
+    arg_parser.add_argument("--output", help="Write the report to this path.")
+    arg_parser.add_argument("--outputs", help="Write every generation to this path (JSON lines) for side-by-side reading.")
+    args = arg_parser.parse_args(argv)
+
+    live_api_key = openai_api_key() if args.live else None
+    if args.live and not live_api_key:
+        print("--live needs OPENAI_API_KEY or api_keys.openai in .streamlit/secrets.toml.")
+        return 2
+
+    recording = load_recording(args.recording) if args.recording else synthesize_recording(num_plays=args.synthetic_plays)
+    report, generations = run_evaluation(
+        recording,
+        load_variants(args.variant),
+        max_plays=args.plays,
+        priority_players=args.priority_players,
+        input_prompt=args.input_prompt,
+        concurrency=args.concurrency,
+        temperature=args.temperature,
+        live_api_key=live_api_key,
+        # Stub generations are free and identical; only cache the real model's
+        cache_path=None if args.no_cache or not args.live else DEFAULT_CACHE,
+    )
+    print_report(report)
+    if args.output:
+        save_report(report, args.output)
+    if args.outputs:
+        with open(args.outputs, "w", encoding="utf-8") as f:
+            for generation in generations:
+                f.write(json.dumps(generation) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Streamlit script driven by `benchmarks/prompt_eval.py` through AppTest.
+
+Replays a recorded game against the stand-in server to build the play contexts once (with
+the app's own tiering and context code), then generates every LLM-tier play's update with
+every prompt variant on a bounded pool, reusing cached generations. Reads its configuration
+from `st.session_state.eval_config` and leaves the generations in `st.session_state.eval_results`.
+"""
+
+import json
+import time
+
+import streamlit as st
+
+import utils.utils_functions as uf
+from benchmarks.prompt_eval import generation_key, rule_violations
+from llm_interface import BROADCAST_MODEL, broadcast_messages, preload_dependencies, request_broadcast
+from sports_data import clear_live_snapshots, filter_new_plays, get_play_by_play, get_players_by_team
+from utils.concurrency import session_executor
+from utils.game_state import digest_from_play_by_play
+from utils.play_importance import ROUTINE_PLAY_INSTRUCTIONS, TIER_SHORT, TIER_TEMPLATE, classify_play
+from utils.records import PlayRecord
+from utils.snapshot_store import SnapshotStore
+from utils.token_accounting import SHORT_UPDATE_MAX_TOKENS
+
+# Cached generations stay valid for this long (they only depend on the exact request)
+GENERATION_CACHE_SECONDS = 30 * 24 * 3600
+GENERATION_CACHE_VERSION = "1"
+
+config = st.session_state.eval_config
+
+preload = preload_dependencies()
+if preload is not None:
+    preload.result()
+uf.initialize_session_state()
+st.session_state.api_mode = "Replay"
+st.session_state.input_prompt = config["input_prompt"]
+
+home_players = get_players_by_team(config["home_team"])
+away_players = get_players_by_team(config["away_team"])
+players = {p["Name"]: p["PlayerID"] for p in home_players + away_players}
+skill_players = [p for p in home_players + away_players if p["Position"] in ("QB", "RB", "WR", "TE")]
+st.session_state.selected_players = {
+    f"{p['Name']} ({p['Position']}, {p['Team']})": p["PlayerID"] for p in skill_players[: config["priority_players"]]
+}
+
+# Contexts are built once and shared by every variant. Narrative memory stays empty, since it
+# would depend on what each variant generated.
+plays = []
+last_sequence = None
+while len(plays) < config["max_plays"] and (last_sequence or 0) < config["final_sequence"]:
+    play_data = get_play_by_play(config["score_id"])
+    if not play_data:
+        st.error("Failed to fetch play-by-play data.")
+        break
+    new_plays = filter_new_plays(play_data, last_sequence) if last_sequence is not None else play_data["Plays"][-1:]
+    if not new_plays:
+        continue
+    last_sequence = max(play["Sequence"] for play in new_plays)
+    game_data = digest_from_play_by_play(play_data)
+    for play in new_plays:
+        play = PlayRecord.from_api(play)
+        involved_player_ids = uf.get_involved_players(play, players)
+        tier = classify_play(play, involved_player_ids, uf.priority_player_ids())
+        if tier == TIER_TEMPLATE:
+            continue
+        play_context = uf.fetch_play_context(config["score_id"], play, game_data, config["season_code"], players, tier)
+        plays.append({"play": play, "tier": tier, "context": play_context, "involved_player_ids": involved_player_ids})
+    clear_live_snapshots()
+
+store = SnapshotStore(config["cache_path"]) if config["cache_path"] else None
+templates = {name: (instructions, st.session_state.broadcast_data_prompt) for name, instructions in config["variants"].items()}
+
+def generate(task):
+    entry, variant = task
+    messages, template_version = broadcast_messages(
+        entry["context"], ROUTINE_PLAY_INSTRUCTIONS if entry["tier"] == TIER_SHORT else "", templates[variant]
+    )
+    max_tokens = SHORT_UPDATE_MAX_TOKENS if entry["tier"] == TIER_SHORT else None
+    key = generation_key(BROADCAST_MODEL, config["temperature"], max_tokens, messages)
+    stored = store.get(key, GENERATION_CACHE_VERSION) if store else None
+    cached = stored is not None
+    generation = stored[0] if cached else None
+    if not cached:
+        started = time.perf_counter()
+        try:
+            completion = request_broadcast(messages, config["temperature"], max_tokens)
+        except Exception as e:
+            return {"variant": variant, "error": f"{type(e).__name__}: {e}"}
+        usage = completion.usage
+        generation = {
+            "text": completion.choices[0].message.content.strip(),
+            "latency": time.perf_counter() - started,
+            "prompt_tokens": usage.prompt_tokens if usage else 0,
+            "completion_tokens": usage.completion_tokens if usage else 0,
+            "cached_tokens": getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", 0) or 0,
+        }
+        if store:
+            store.put(key, generation, GENERATION_CACHE_SECONDS, GENERATION_CACHE_VERSION)
+    return {
+        "variant": variant,
+        "template_version": template_version,
+        "cached": cached,
+        **generation,
+        "violations": rule_violations(
+            generation["text"], entry["play"], entry["tier"], messages[1]["content"],
+            entry["involved_player_ids"], st.session_state.selected_players, players,
+        ),
+    }
+
+tasks = [(entry, variant) for entry in plays for variant in templates]
+with session_executor(config["concurrency"]) as executor:
+    generations = list(executor.map(generate, tasks))
+
+st.session_state.eval_results = json.loads(json.dumps([
+    {
+        "play_id": entry["play"].play_id,
+        "sequence": entry["play"].sequence,
+        "description": entry["play"].description,
+        "tier": entry["tier"],
+        **generation,
+    }
+    for (entry, _), generation in zip(tasks, generations)
+]))
@@ -0,0 +1,506 @@
+"""
+Recorded games for the benchmark suite.
+
+A recording captures everything the broadcast pipeline reads from SportsDataIO for one
+game, keyed by play sequence so the stand-in server can replay the game play by play:
+
+    {
+        "version": 1,
+        "score_id": 18000,
+        "season_code": "2024reg",
+        "metadata": {...},             # Replay API metadata (CurrentTime, AvailableEndpoints)
+        "schedule": [...],             # schedulesbasic payload
+        "players": {"KC": [...]},      # playersbasic payload per team
+        "season_stats": [...],         # playerseasonstats payload
+        "plays": [...],                # all plays of the game, ordered by Sequence
+        "snapshots": [                 # game state as of a play sequence
+            {"sequence": 12, "score": {...}, "box_score": {...}, "odds": [...], "props": [...]}
+        ]
+    }
+
+Recordings are either captured from the Replay API with `record_game` or generated with
+`synthesize_recording` (deterministic for a given seed) so the suite runs without network access.
+"""
+
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+import requests
+
+RECORDING_VERSION = 1
+
+FIRST_NAMES = [
+    "Patrick", "Josh", "Travis", "Stefon", "James", "Isiah", "Dawson", "Khalil", "Rashee", "Chris",
+    "Jalen", "Marquez", "Kareem", "Derrick", "Tyreek", "Justin", "Davante", "Cooper", "Mike", "Nick",
+    "Joe", "Tee", "Aaron", "Deebo", "Brandon", "Amon-Ra", "Sam", "Garrett", "Trey", "Xavier",
+]
+LAST_NAMES = [
+    "Mahomes", "Allen", "Kelce", "Diggs", "Cook", "Pacheco", "Knox", "Shakir", "Rice", "Jones",
+    "Hurts", "Valdes-Scantling", "Hunt", "Henry", "Hill", "Jefferson", "Adams", "Kupp", "Evans", "Chubb",
+    "Burrow", "Higgins", "Rodgers", "Samuel", "Aiyuk", "St. Brown", "LaPorta", "Wilson", "McBride", "Worthy",
+]
+POSITIONS = ["QB", "RB", "RB", "WR", "WR", "WR", "TE", "K", "P", "LB", "CB", "S", "DE", "DT"]
+SPORTSBOOKS = [(1, "DraftKings"), (2, "FanDuel"), (3, "BetMGM"), (4, "Caesars")]
+
+def load_recording(path):
+    """
+    Loads a recording from disk.
+
+    Parameters:
+        path (str): Path to a recording JSON file.
+
+    Returns:
+        dict: The recording.
+    """
+    with open(path, "r") as file:
+        recording = json.load(file)
+    if recording.get("version") != RECORDING_VERSION:
+        raise ValueError(f"Unsupported recording version {recording.get('version')} in {path}")
+    return recording
+
+def save_recording(recording, path):
+    with open(path, "w") as file:
+        json.dump(recording, file)
+
+def snapshot_at(recording, sequence):
+    """
+    Returns the latest snapshot taken at or before the given play sequence.
+    """
+    current = recording["snapshots"][0]
+    for snapshot in recording["snapshots"]:
+        if snapshot["sequence"] > sequence:
+            break
+        current = snapshot
+    return current
+
+def _make_roster(rng, team, player_id_start, name_offset):
+    roster = []
+    for i in range(53):
+        position = POSITIONS[i % len(POSITIONS)]
+        roster.append({
+            "PlayerID": player_id_start + i,
+            "Team": team,
+            "Number": i + 1,
+            "FirstName": FIRST_NAMES[(i + name_offset) % len(FIRST_NAMES)],
+            "LastName": LAST_NAMES[i % len(LAST_NAMES)] + ("" if i < len(LAST_NAMES) else " Jr."),
+            "Position": position,
+            "Status": "Active",
+            "Height": f"6'{rng.randint(0, 6)}\"",
+            "Weight": rng.randint(180, 320),
+            "BirthDate": "1996-05-04T00:00:00",
+            "College": "State",
+            "Experience": rng.randint(1, 12),
+            "FantasyPosition": position,
+            "Active": True,
+            "PositionCategory": "OFF" if position in ("QB", "RB", "WR", "TE") else "DEF",
+        })
+    for player in roster:
+        player["Name"] = f"{player['FirstName']} {player['LastName']}"
+    return roster
+
+def _empty_player_game(player, score_id, opponent, home_or_away):
+    return {
+        "PlayerID": player["PlayerID"],
+        "ScoreID": score_id,
+        "Name": player["Name"],
+        "Team": player["Team"],
+        "Opponent": opponent,
+        "HomeOrAway": home_or_away,
+        "Position": player["Position"],
+        "Played": 1,
+        "Started": 1,
+        "PassingAttempts": 0, "PassingCompletions": 0, "PassingYards": 0, "PassingTouchdowns": 0,
+        "PassingInterceptions": 0, "RushingAttempts": 0, "RushingYards": 0, "RushingTouchdowns": 0,
+        "ReceivingTargets": 0, "Receptions": 0, "ReceivingYards": 0, "ReceivingTouchdowns": 0,
+        "FumblesLost": 0, "FantasyPoints": 0.0, "FantasyPointsPPR": 0.0,
+    }
+
+def _season_row(rng, player, season):
+    # The synthetic game is in week 11: the season stats hold at most the 10 games before it
+    games = rng.randint(4, 10)
+    return {
+        "PlayerID": player["PlayerID"],
+        "Season": season,
+        "SeasonType": 1,
+        "Team": player["Team"],
+        "Name": player["Name"],
+        "Position": player["Position"],
+        "Played": games,
+        "Started": games,
+        "PassingYards": rng.randint(0, 4200) if player["Position"] == "QB" else 0,
+        "PassingTouchdowns": rng.randint(0, 35) if player["Position"] == "QB" else 0,
+        "RushingYards": rng.randint(0, 1300) if player["Position"] in ("QB", "RB") else 0,
+        "RushingTouchdowns": rng.randint(0, 14) if player["Position"] in ("QB", "RB") else 0,
+        "Receptions": rng.randint(0, 110) if player["Position"] in ("WR", "TE", "RB") else 0,
+        "ReceivingYards": rng.randint(0, 1500) if player["Position"] in ("WR", "TE", "RB") else 0,
+        "ReceivingTouchdowns": rng.randint(0, 14) if player["Position"] in ("WR", "TE", "RB") else 0,
+        "FantasyPoints": round(rng.uniform(0, 350), 1),
+        "FantasyPointsPPR": round(rng.uniform(0, 400), 1),
+    }
+
+def synthesize_recording(num_plays=150, seed=7, score_id=18000, season_code="2024reg", league_filler_players=1600):
+    """
+    Generates a deterministic synthetic recording shaped like SportsDataIO payloads.
+
+    Parameters:
+        num_plays (int): Number of plays in the game.
+        seed (int): Random seed.
+        score_id (int): ScoreID of the synthetic game.
+        season_code (str): Season code, e.g. "2024reg".
+        league_filler_players (int): Extra league players in the season stats payload
+                                     (keeps its size close to the real full-league payload).
+
+    Returns:
+        dict: The recording.
+    """
+    rng = random.Random(seed)
+    season = int(season_code[:4])
+    away, home = "BUF", "KC"
+    rosters = {away: _make_roster(rng, away, 20000, 0), home: _make_roster(rng, home, 30000, 13)}
+    kickoff = datetime(season, 11, 17, 16, 25)
+
+    score = {
+        "GameKey": f"{season}1{11:02d}{score_id % 100:02d}",
+        "ScoreID": score_id,
+        "GlobalGameID": score_id,
+        "Season": season,
+        "SeasonType": 1,
+        "Week": 11,
+        "Date": kickoff.strftime("%Y-%m-%dT%H:%M:%S"),
+        "AwayTeam": away,
+        "HomeTeam": home,
+        "AwayScore": 0,
+        "HomeScore": 0,
+        "Quarter": "1",
+        "TimeRemaining": "15:00",
+        "Possession": away,
+        "Down": 1,
+        "Distance": "10",
+        "YardLine": 25,
+        "YardLineTerritory": away,
+        "HasStarted": True,
+        "IsInProgress": True,
+        "IsOver": False,
+        "Channel": "CBS",
+        "PointSpread": -2.5,
+        "OverUnder": 47.5,
+        "AwayTimeouts": 3,
+        "HomeTimeouts": 3,
+        "LastPlay": "",
+        "StadiumDetails": {"StadiumID": 1, "Name": "Arrowhead Stadium", "City": "Kansas City", "State": "MO", "Country": "USA"},
+    }
+    for team_side in ("Away", "Home"):
+        for quarter in range(1, 5):
+            score[f"{team_side}ScoreQuarter{quarter}"] = 0
+
+    player_games = {}
+    for team, opponent, side in ((away, home, "AWAY"), (home, away, "HOME")):
+        for player in rosters[team]:
+            if player["Position"] in ("QB", "RB", "WR", "TE", "K"):
+                player_games[player["PlayerID"]] = _empty_player_game(player, score_id, opponent, side)
+
+    def pick(team, position):
+        return rng.choice([p for p in rosters[team] if p["Position"] == position])
+
+    plays = []
+    snapshots = []
+    odds_history = []
+    possession = away
+    yard_line, territory, down, distance = 25, away, 1, 10
+    seconds_left = 15 * 60
+    quarter = 1
+    updated = kickoff
+    for sequence in range(1, num_plays + 1):
+        opponent = home if possession == away else away
+        roll = rng.random()
+        qb, rb, wr = pick(possession, "QB"), pick(possession, "RB"), pick(possession, "WR")
+        play_stats = []
+        yards = 0
+        is_scoring = False
+        if sequence % 38 == 0 and quarter < 4:
+            play_type, description = "Period", f"END QUARTER {quarter}"
+        elif roll < 0.05 and score[f"{'Away' if possession == away else 'Home'}Timeouts"] > 0:
+            timeouts_key = f"{'Away' if possession == away else 'Home'}Timeouts"
+            score[timeouts_key] -= 1
+            play_type = "Timeout"
+            description = f"Timeout #{3 - score[timeouts_key]} by {possession} at {seconds_left // 60:02d}:{seconds_left % 60:02d}."
+        elif roll < 0.12:
+            play_type = "Penalty"
+            description = f"PENALTY on {opponent}-{pick(opponent, 'LB')['Name']}, Defensive Offside, 5 yards, enforced at {territory} {yard_line} - No Play."
+            yards = 5
+        elif roll < 0.45:
+            play_type = "Rush"
+            yards = rng.randint(-2, 14) if rng.random() > 0.03 else rng.randint(20, 60)
+            description = f"{rb['Name']} rush up the middle to {territory} {min(99, yard_line + yards)} for {yards} yards."
+            play_stats.append((rb, {"RushingAttempts": 1, "RushingYards": yards}))
+        elif roll < 0.62:
+            play_type = "PassIncomplete"
+            description = f"{qb['Name']} pass incomplete deep left intended for {wr['Name']}."
+            play_stats.append((qb, {"PassingAttempts": 1}))
+            play_stats.append((wr, {"ReceivingTargets": 1}))
+        elif roll < 0.95:
+            play_type = "PassCompleted"
+            yards = rng.randint(1, 18) if rng.random() > 0.08 else rng.randint(25, 70)
+            description = f"{qb['Name']} pass short right to {wr['Name']} for {yards} yards."
+            play_stats.append((qb, {"PassingAttempts": 1, "PassingCompletions": 1, "PassingYards": yards}))
+            play_stats.append((wr, {"ReceivingTargets": 1, "Receptions": 1, "ReceivingYards": yards}))
+        else:
+            play_type = "Punt"
+            description = f"{pick(possession, 'P')['Name']} punts 45 yards to {opponent} 20, fair catch."
+
+        yards_to_end_zone = 100 - yard_line if territory == possession else yard_line
+        if play_type in ("Rush", "PassCompleted") and yards >= yards_to_end_zone:
+            yards = yards_to_end_zone
+            is_scoring = True
+            description += " TOUCHDOWN."
+            scorer, key = (rb, "RushingTouchdowns") if play_type == "Rush" else (wr, "ReceivingTouchdowns")
+            play_stats.append((scorer, {key: 1}))
+            if play_type == "PassCompleted":
+                play_stats.append((qb, {"PassingTouchdowns": 1}))
+            side = "Away" if possession == away else "Home"
+            score[f"{side}Score"] += 7
+            score[f"{side}ScoreQuarter{min(quarter, 4)}"] += 7
+
+        seconds_left = max(0, seconds_left - rng.randint(5, 45))
+        updated += timedelta(seconds=rng.randint(20, 60))
+        play = {
+            "PlayID": score_id * 1000 + sequence,
+            "QuarterID": score_id * 10 + quarter,
+            "QuarterName": str(quarter),
+            "Sequence": sequence,
+            "TimeRemainingMinutes": seconds_left // 60,
+            "TimeRemainingSeconds": seconds_left % 60,
+            "PlayTime": updated.strftime("%Y-%m-%dT%H:%M:%S"),
+            "Updated": updated.strftime("%Y-%m-%dT%H:%M:%S"),
+            "Created": updated.strftime("%Y-%m-%dT%H:%M:%S"),
+            "Team": possession,
+            "Opponent": opponent,
+            "Down": down if play_type not in ("Period", "Timeout") else 0,
+            "Distance": distance,
+            "YardLine": yard_line,
+            "YardLineTerritory": territory,
+            "YardsToEndZone": yards_to_end_zone,
+            "Type": play_type,
+            "YardsGained": yards,
+            "Description": description,
+            "IsScoringPlay": is_scoring,
+            "ScoringPlay": {"ScoringPlayID": sequence, "Team": possession, "Description": description} if is_scoring else None,
+            "PlayStats": [],
+        }
+        for player, stats in play_stats:
+            stat_row = {
+                "PlayStatID": play["PlayID"] * 10 + len(play["PlayStats"]),
+                "PlayID": play["PlayID"],
+                "Sequence": sequence,
+                "PlayerID": player["PlayerID"],
+                "Name": player["Name"],
+                "Team": player["Team"],
+                "Opponent": opponent,
+                "HomeOrAway": "AWAY" if player["Team"] == away else "HOME",
+                "Direction": "Middle",
+            }
+            stat_row.update(stats)
+            play["PlayStats"].append(stat_row)
+            box_row = player_games.get(player["PlayerID"])
+            if box_row:
+                for key, value in stats.items():
+                    box_row[key] = box_row.get(key, 0) + value
+                box_row["FantasyPoints"] = round(
+                    box_row["PassingYards"] * 0.04 + box_row["RushingYards"] * 0.1 + box_row["ReceivingYards"] * 0.1
+                    + 6 * (box_row["RushingTouchdowns"] + box_row["ReceivingTouchdowns"]) + 4 * box_row["PassingTouchdowns"], 2
+                )
+                box_row["FantasyPointsPPR"] = round(box_row["FantasyPoints"] + box_row["Receptions"], 2)
+        plays.append(play)
+
+        # Advance the simulated game state
+        if play_type == "Period":
+            quarter += 1
+            seconds_left = 15 * 60
+        elif is_scoring or play_type == "Punt" or (down == 4 and yards < distance):
+            possession = opponent
+            yard_line, territory, down, distance = 25, possession, 1, 10
+        elif play_type not in ("Timeout",):
+            if yards >= distance:
+                down, distance = 1, 10
+            else:
+                down, distance = min(4, down + 1), distance - yards
+            if territory == possession:
+                yard_line += yards
+                if yard_line > 50:
+                    yard_line, territory = 100 - yard_line, opponent
+            else:
+                yard_line = max(1, yard_line - yards)
+
+        score.update({
+            "Quarter": str(quarter),
+            "TimeRemaining": f"{seconds_left // 60}:{seconds_left % 60:02d}",
+            "Possession": possession,
+            "Down": down,
+            "Distance": str(distance),
+            "YardLine": yard_line,
+            "YardLineTerritory": territory,
+            "LastPlay": description,
+        })
+
+        for sportsbook_id, sportsbook in SPORTSBOOKS:
+            margin = score["HomeScore"] - score["AwayScore"]
+            odds_history.append({
+                "GameOddId": len(odds_history) + 1,
+                "Sportsbook": sportsbook,
+                "SportsbookId": sportsbook_id,
+                "ScoreId": score_id,
+                "Created": play["Updated"],
+                "Updated": play["Updated"],
+                "HomeMoneyLine": -150 - 20 * margin,
+                "AwayMoneyLine": 130 + 20 * margin,
+                "HomePointSpread": -2.5 - margin,
+                "AwayPointSpread": 2.5 + margin,
+                "OverUnder": 47.5 + (score["HomeScore"] + score["AwayScore"]) / 4,
+                "OverPayout": -110,
+                "UnderPayout": -110,
+            })
+
+        props = []
+        for player_game in player_games.values():
+            for market, key in (("Receiving Yards", "ReceivingYards"), ("Rushing Yards", "RushingYards"), ("Passing Yards", "PassingYards")):
+                props.append({
+                    "PlayerPropId": len(props) + 1,
+                    "ScoreID": score_id,
+                    "PlayerID": player_game["PlayerID"],
+                    "Name": player_game["Name"],
+                    "Team": player_game["Team"],
+                    "Description": f"{market} Over/Under",
+                    "Sportsbook": "DraftKings",
+                    "OverUnder": 45.5 + player_game[key],
+                    "OverPayout": -115,
+                    "UnderPayout": -105,
+                    "Updated": play["Updated"],
+                })
+
+        snapshots.append({
+            "sequence": sequence,
+            "score": json.loads(json.dumps(score)),
+            "box_score": {
+                "Score": json.loads(json.dumps(score)),
+                "Quarters": [],
+                "PlayerGames": json.loads(json.dumps(list(player_games.values()))),
+                "TeamGames": [],
+                "ScoringPlays": [p["ScoringPlay"] for p in plays if p["IsScoringPlay"]],
+            },
+            "odds": [{"ScoreId": score_id, "LiveOdds": list(odds_history[-8 * len(SPORTSBOOKS):])}],
+            "props": props,
+        })
+
+    season_stats = [
+        _season_row(rng, player, season) for team in rosters.values() for player in team
+    ]
+    for i in range(league_filler_players):
+        filler = {"PlayerID": 40000 + i, "Team": "FA", "Name": f"League Player {i}", "Position": rng.choice(POSITIONS)}
+        season_stats.append(_season_row(rng, filler, season))
+
+    # Weeks 1-10 were played against other teams (same ScoreIDs in every recording)
+    schedule = [{
+        "GameKey": f"{season}1{week:02d}{side}9", "ScoreID": 17000 + 2 * week + side, "Season": season, "SeasonType": 1, "Week": week,
+        "Date": (kickoff - timedelta(weeks=11 - week)).strftime("%Y-%m-%dT%H:%M:%S"),
+        "AwayTeam": team if side else opponent, "HomeTeam": opponent if side else team, "Status": "Final",
+    } for week in range(1, 11) for side, (team, opponent) in enumerate(((home, "DEN"), (away, "MIA")))]
+    schedule.append({
+        "GameKey": score["GameKey"], "ScoreID": score_id, "Season": season, "SeasonType": 1, "Week": 11,
+        "Date": kickoff.strftime("%Y-%m-%dT%H:%M:%S"), "AwayTeam": away, "HomeTeam": home, "Status": "InProgress",
+    })
+    return {
+        "version": RECORDING_VERSION,
+        "score_id": score_id,
+        "season_code": season_code,
+        "metadata": {
+            "CurrentTime": (kickoff + timedelta(minutes=45)).strftime("%Y-%m-%dT%H:%M:%S"),
+            "AvailableEndpoints": [f"/api/v3/nfl/stats/json/playerseasonstats/{season_code}/"],
+        },
+        "schedule": schedule,
+        "players": rosters,
+        "season_stats": season_stats,
+        "plays": plays,
+        "snapshots": snapshots,
+    }
+
+def record_game(score_id, api_key, duration_seconds=3600, poll_interval=5, base_url="https://replay.sportsdata.io"):
+    """
+    Records a game from the SportsDataIO Replay API by polling its endpoints while the replay runs.
+
+    Parameters:
+        score_id (int): ScoreID of the game to record.
+        api_key (str): Replay API key.
+        duration_seconds (int): How long to record for.
+        poll_interval (int): Seconds between polls.
+        base_url (str): Replay API host.
+
+    Returns:
+        dict: The recording.
+    """
+    params = {"key": api_key}
+    api = f"{base_url}/api/v3/nfl/"
+
+    def get(url):
+        response = requests.get(url, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    metadata = get(f"{base_url}/api/metadata")
+    season_code = metadata["AvailableEndpoints"][0].split("/")[-2] if metadata.get("AvailableEndpoints") else None
+    box_score = get(f"{api}stats/json/boxscorebyscoreidv3/{score_id}")
+    away, home = box_score["Score"]["AwayTeam"], box_score["Score"]["HomeTeam"]
+    recording = {
+        "version": RECORDING_VERSION,
+        "score_id": score_id,
+        "season_code": season_code,
+        "metadata": metadata,
+        "schedule": get(f"{api}scores/json/schedulesbasic/{season_code}"),
+        "players": {team: get(f"{api}scores/json/playersbasic/{team.lower()}") for team in (away, home)},
+        "season_stats": get(f"{api}stats/json/playerseasonstats/{season_code}"),
+        "plays": [],
+        "snapshots": [],
+    }
+
+    plays_by_sequence = {}
+    deadline = time.time() + duration_seconds
+    while time.time() < deadline:
+        play_data = get(f"{api}pbp/json/playbyplay/{score_id}")
+        for play in play_data.get("Plays", []):
+            if play.get("Sequence") is not None:
+                plays_by_sequence[play["Sequence"]] = play
+        sequence = max(plays_by_sequence, default=0)
+        if not recording["snapshots"] or recording["snapshots"][-1]["sequence"] != sequence:
+            recording["snapshots"].append({
+                "sequence": sequence,
+                "score": play_data["Score"],
+                "box_score": get(f"{api}stats/json/boxscorebyscoreidv3/{score_id}"),
+                "odds": get(f"{api}odds/json/livegameoddslinemovement/{score_id}"),
+                "props": get(f"{api}odds/json/bettingplayerpropsbyscoreid/{score_id}"),
+            })
+        if play_data["Score"].get("IsOver"):
+            break
+        time.sleep(poll_interval)
+
+    recording["plays"] = [plays_by_sequence[s] for s in sorted(plays_by_sequence)]
+    return recording
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Record a game from the Replay API, or write a synthetic recording.")
+    arg_parser.add_argument("output", help="Path of the recording JSON file to write.")
+    arg_parser.add_argument("--score-id", type=int, help="ScoreID to record from the Replay API.")
+    arg_parser.add_argument("--api-key", help="Replay API key.")
+    arg_parser.add_argument("--duration", type=int, default=3600, help="Recording duration in seconds.")
+    arg_parser.add_argument("--synthetic-plays", type=int, default=150, help="Number of plays for a synthetic recording.")
+    arg_parser.add_argument("--seed", type=int, default=7, help="Seed for a synthetic recording.")
+    args = arg_parser.parse_args()
+
+    if args.score_id:
+        result = record_game(args.score_id, args.api_key, duration_seconds=args.duration)
+    else:
+        result = synthesize_recording(num_plays=args.synthetic_plays, seed=args.seed)
+    save_recording(result, args.output)
+    print(f"Wrote {len(result['plays'])} plays to {args.output}")
@@ -0,0 +1,115 @@
+"""
+Local stand-in for a Redis server, enough for the shared cache backend (`utils/shared_backend.py`):
+PING, AUTH, SELECT, GET, SET (with EX/PX/NX) and DEL over the Redis protocol, keeping values in
+memory. Lets several Streamlit worker processes share one cache without installing Redis:
+
+    python -m benchmarks.standin_redis --port 6379
+
+and in `.streamlit/secrets.toml`:
+
+    [shared_backend]
+    type = "redis"
+    url = "redis://127.0.0.1:6379/0"
+"""
+
+import argparse
+import socketserver
+import threading
+
+from utils.shared_backend import MemoryBackend
+
+class RedisStandInHandler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            # Inline command (e.g. typed into telnet)
+            return line.strip().split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def reply(self, value):
+        if value is None:
+            self.wfile.write(b"$-1\r\n")
+        elif isinstance(value, int):
+            self.wfile.write(b":%d\r\n" % value)
+        elif isinstance(value, bytes):
+            self.wfile.write(b"$%d\r\n%s\r\n" % (len(value), value))
+        else:
+            self.wfile.write(f"{value}\r\n".encode("utf-8"))
+
+    def execute(self, name, args):
+        store = self.server.store
+        if name == "PING":
+            return "+PONG"
+        if name in ("AUTH", "SELECT"):
+            return "+OK"
+        if name == "GET":
+            return store.get(args[0])
+        if name == "DEL":
+            deleted = sum(store.get(key) is not None for key in args)
+            for key in args:
+                store.delete(key)
+            return deleted
+        if name == "SET":
+            key, value, options = args[0], args[1], [option.upper() for option in args[2:]]
+            ttl_seconds = None
+            for unit, scale in ((b"EX", 1), (b"PX", 0.001)):
+                if unit in options:
+                    ttl_seconds = int(options[options.index(unit) + 1]) * scale
+            stored = store.set(key, value, ttl_seconds, only_if_absent=b"NX" in options)
+            return "+OK" if stored else None
+        return f"-ERR unknown command '{name}'"
+
+    def handle(self):
+        while True:
+            try:
+                command = self.read_command()
+            except (ConnectionError, ValueError):
+                return
+            if not command:
+                return
+            self.reply(self.execute(command[0].decode("utf-8").upper(), command[1:]))
+            self.wfile.flush()
+
+class StandInRedisServer(socketserver.ThreadingTCPServer):
+    """
+    Serves the stand-in on a background thread (port 0 picks a free port).
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0):
+        super().__init__((host, port), RedisStandInHandler)
+        self.store = MemoryBackend(max_entries=100_000)
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f"redis://{host}:{port}/0"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=6379)
+    args = arg_parser.parse_args(argv)
+    server = StandInRedisServer(args.host, args.port)
+    print(f"Stand-in Redis listening on {server.url}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Local stand-in for the SportsDataIO Replay API and the OpenAI chat completions API.
+
+Serves recorded games (see `benchmarks/recordings.py`) on the same paths as the Replay API,
+revealing plays progressively as the play-by-play endpoint is polled, and answers chat
+completions with a canned response after a configurable latency. Point the app at it with:
+
+    [api_urls]
+    sportsdataio_replay = "http://127.0.0.1:8765"
+    openai = "http://127.0.0.1:8765/v1"
+
+Every response is counted per endpoint (calls and bytes) so benchmarks can report upstream
+traffic per play.
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.recordings import snapshot_at
+
+ROUTES = [
+    ("metadata", re.compile(r"^/api/metadata$")),
+    ("schedule", re.compile(r"^/api/v3/nfl/scores/json/schedulesbasic/(?P<season>[^/]+)$")),
+    ("box_score", re.compile(r"^/api/v3/nfl/stats/json/boxscorebyscoreidv3/(?P<score_id>\d+)$")),
+    ("players", re.compile(r"^/api/v3/nfl/scores/json/playersbasic/(?P<team>[^/]+)$")),
+    ("games_in_progress", re.compile(r"^/api/v3/nfl/scores/json/areanygamesinprogress$")),
+    ("play_by_play", re.compile(r"^/api/v3/nfl/pbp/json/playbyplay/(?P<score_id>\d+)$")),
+    ("season_stats", re.compile(r"^/api/v3/nfl/stats/json/playerseasonstats/(?P<season>[^/]+)$")),
+    ("odds", re.compile(r"^/api/v3/nfl/odds/json/livegameoddslinemovement/(?P<score_id>\d+)$")),
+    ("props", re.compile(r"^/api/v3/nfl/odds/json/bettingplayerpropsbyscoreid/(?P<score_id>\d+)$")),
+]
+
+class StandInState:
+    """
+    Shared state of the stand-in server: recorded games, per-game play cursors and traffic counters.
+
+    Parameters:
+        recordings (list): Recordings to serve.
+        plays_per_poll (int): Plays revealed per play-by-play poll (> 1 simulates catch-up).
+        start_plays (int): Number of plays visible on the first poll.
+        llm_latency (float): Seconds to wait before answering a chat completion.
+        seconds_per_play (float): If set, plays are revealed on a clock (one every
+                                  seconds_per_play) instead of per poll, so that many sessions
+                                  polling the same game see the same live game.
+        failing_endpoints (iterable): Endpoints that answer 503 (simulates an upstream outage).
+    """
+
+    def __init__(self, recordings, plays_per_poll=1, start_plays=1, llm_latency=0.0, seconds_per_play=None, failing_endpoints=()):
+        self.games = {recording["score_id"]: recording for recording in recordings}
+        self.plays_per_poll = plays_per_poll
+        self.seconds_per_play = seconds_per_play
+        self.start_plays = start_plays
+        self.llm_latency = llm_latency
+        self.failing_endpoints = set(failing_endpoints)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            # Number of plays revealed by the next poll / by the last poll, per game
+            self.cursors = {score_id: self.start_plays for score_id in self.games}
+            self.served = {score_id: self.start_plays for score_id in self.games}
+            self.stats = {}
+            self.started = time.monotonic()
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {}
+
+    def count(self, endpoint, num_bytes):
+        with self.lock:
+            entry = self.stats.setdefault(endpoint, {"calls": 0, "bytes": 0})
+            entry["calls"] += 1
+            entry["bytes"] += num_bytes
+
+    def snapshot_stats(self):
+        with self.lock:
+            return {endpoint: dict(entry) for endpoint, entry in self.stats.items()}
+
+    def visible_sequence(self, score_id):
+        plays = self.games[score_id]["plays"]
+        return plays[max(self.served[score_id], 1) - 1]["Sequence"]
+
+    def poll_plays(self, score_id):
+        """
+        Returns the last visible play sequence and the plays visible for a game, and advances its cursor.
+        """
+        plays = self.games[score_id]["plays"]
+        with self.lock:
+            count = self.cursors[score_id]
+            if self.seconds_per_play:
+                count = min(self.start_plays + int((time.monotonic() - self.started) / self.seconds_per_play), len(plays))
+            self.served[score_id] = count
+            self.cursors[score_id] = min(count + self.plays_per_poll, len(plays))
+        return self.visible_sequence(score_id), plays[:count]
+
+    def exhausted(self, score_id):
+        return self.served[score_id] >= len(self.games[score_id]["plays"])
+
+    def find_team(self, team):
+        for recording in self.games.values():
+            for roster_team, roster in recording["players"].items():
+                if roster_team.lower() == team.lower():
+                    return roster
+        return None
+
+def _stub_completion(body):
+    """
+    Builds a canned chat completion whose usage block approximates token counts (~4 chars/token).
+    """
+    prompt_chars = 0
+    has_image = False
+    for message in body.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            prompt_chars += len(content)
+        else:
+            for part in content or []:
+                if part.get("type") == "text":
+                    prompt_chars += len(part["text"])
+                else:
+                    has_image = True
+
+    if has_image or body.get("response_format"):
+        content = json.dumps({"players": [], "image_type": "other", "description": "Stand-in image analysis."})
+    else:
+        content = (
+            "What a play! The offense keeps the chains moving and the crowd is on its feet. "
+            "That drive has the feel of a momentum shift heading into the next series."
+        )
+    prompt_tokens = prompt_chars // 4 + (85 if has_image else 0)
+    completion_tokens = len(content) // 4
+    return {
+        "id": f"chatcmpl-standin-{time.time_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4o-mini"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        },
+    }
+
+def make_handler(state):
+    class StandInHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, endpoint, payload, status=200):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            if endpoint:
+                state.count(endpoint, len(body))
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/_standin/stats":
+                return self._send_json(None, state.snapshot_stats())
+
+            for endpoint, pattern in ROUTES:
+                match = pattern.match(path)
+                if match and endpoint in state.failing_endpoints:
+                    return self._send_json(endpoint, {"error": "Simulated outage"}, status=503)
+                if match:
+                    return self._send_json(endpoint, self._resolve(endpoint, match.groupdict()))
+            self._send_json("not_found", {"error": f"Unknown endpoint {path}"}, status=404)
+
+        def do_POST(self):
+            path = self.path.split("?", 1)[0]
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if path == "/_standin/reset":
+                state.reset()
+                return self._send_json(None, {"ok": True})
+            if path == "/_standin/reset_stats":
+                state.reset_stats()
+                return self._send_json(None, {"ok": True})
+            if path.endswith("/chat/completions"):
+                if state.llm_latency:
+                    time.sleep(state.llm_latency)
+                return self._send_json("llm", _stub_completion(body))
+            self._send_json("not_found", {"error": f"Unknown endpoint {path}"}, status=404)
+
+        def _resolve(self, endpoint, args):
+            recording = next(iter(state.games.values()))
+            if "score_id" in args:
+                recording = state.games[int(args["score_id"])]
+            sequence = state.visible_sequence(recording["score_id"])
+
+            if endpoint == "metadata":
+                return recording["metadata"]
+            if endpoint == "schedule":
+                return [game for rec in state.games.values() for game in rec["schedule"]]
+            if endpoint == "players":
+                return state.find_team(args["team"]) or []
+            if endpoint == "games_in_progress":
+                return any(not state.exhausted(score_id) for score_id in state.games)
+            if endpoint == "season_stats":
+                return recording["season_stats"]
+            if endpoint == "play_by_play":
+                sequence, plays = state.poll_plays(recording["score_id"])
+                return {"Score": snapshot_at(recording, sequence)["score"], "Quarters": [], "Plays": plays}
+            snapshot = snapshot_at(recording, sequence)
+            if endpoint == "box_score":
+                return snapshot["box_score"]
+            if endpoint == "odds":
+                return snapshot["odds"]
+            if endpoint == "props":
+                return snapshot["props"]
+            return None
+
+    return StandInHandler
+
+class StandInServer:
+    """
+    Runs the stand-in server on a background thread.
+
+    Parameters:
+        state (StandInState): Server state.
+        host (str): Interface to bind.
+        port (int): Port to bind (0 picks a free port).
+    """
+
+    def __init__(self, state, host="127.0.0.1", port=0):
+        self.state = state
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(state))
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+if __name__ == "__main__":
+    import argparse
+
+    from benchmarks.recordings import load_recording, synthesize_recording
+
+    arg_parser = argparse.ArgumentParser(description="Serve recorded games on a local SportsDataIO/OpenAI stand-in.")
+    arg_parser.add_argument("recordings", nargs="*", help="Recording files to serve (defaults to a synthetic game).")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--plays-per-poll", type=int, default=1)
+    arg_parser.add_argument("--llm-latency", type=float, default=0.0)
+    args = arg_parser.parse_args()
+
+    games = [load_recording(path) for path in args.recordings] or [synthesize_recording()]
+    server = StandInServer(
+        StandInState(games, plays_per_poll=args.plays_per_poll, llm_latency=args.llm_latency), port=args.port
+    )
+    print(f"Stand-in server listening on {server.url}")
+    server.httpd.serve_forever()
@@ -0,0 +1,126 @@
+"""
+Cold-start benchmark: how long a fresh worker process takes before it can serve its first page.
+
+Each sample runs in a new interpreter (nothing cached in sys.modules) and measures:
+
+- import: importing the app's modules (sports_data, llm_interface, utils.utils_functions)
+- first_run: importing streamlit's test runner and rendering app.py once, headless with AppTest
+  (the login page, what a new container serves first)
+
+It also lists the heavy third-party packages already loaded after the imports, which should
+only be imported once a feature needs them. Run from the repo root:
+
+    python -m benchmarks.startup                    # compare to baseline
+    python -m benchmarks.startup --save-baseline    # record a new baseline
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.harness import (
+    REPO_ROOT,
+    diff_against_baseline,
+    load_baseline,
+    print_diff,
+    save_report,
+    summarize_samples,
+)
+
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "baselines", "startup.json")
+COMPARED_METRICS = ("import_seconds.", "first_run_seconds.")
+HEAVY_MODULES = ("openai", "PIL", "langchain", "pydantic", "httpx", "numpy")
+
+IMPORT_SNIPPET = """
+import json, sys, time
+started = time.perf_counter()
+import sports_data, llm_interface, utils.utils_functions
+seconds = time.perf_counter() - started
+print(json.dumps({"seconds": seconds, "loaded": [name for name in %r if name in sys.modules]}))
+"""
+
+FIRST_RUN_SNIPPET = """
+import json, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("app.py", default_timeout=120)
+app.secrets["api_keys"] = {"sportsdataio_replay": "startup", "sportsdataio_live": "startup", "openai": "startup"}
+app.secrets["snapshot_store"] = {"enabled": False}
+app.run()
+errors = [element.value for element in app.exception] + ([] if app.title else ["app.py rendered nothing (see stderr)"])
+print(json.dumps({"seconds": time.perf_counter() - started, "errors": errors}))
+"""
+
+def run_snippet(snippet):
+    completed = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", snippet],
+        cwd=REPO_ROOT,
+        env={**os.environ, "PYTHONPATH": REPO_ROOT},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def run_benchmark(samples=5):
+    """
+    Measures cold imports and first renders in fresh interpreters.
+
+    Parameters:
+        samples (int): Fresh processes per measurement.
+
+    Returns:
+        dict: Benchmark report.
+    """
+    imports = [run_snippet(IMPORT_SNIPPET % (HEAVY_MODULES,)) for _ in range(samples)]
+    first_runs = [run_snippet(FIRST_RUN_SNIPPET) for _ in range(samples)]
+    return {
+        "import_seconds": summarize_samples([sample["seconds"] for sample in imports]),
+        "first_run_seconds": summarize_samples([sample["seconds"] for sample in first_runs]),
+        "heavy_modules_at_import": imports[0]["loaded"],
+        "errors": sorted({error for sample in first_runs for error in sample["errors"]}),
+        "config": {"samples": samples, "python": sys.version.split()[0]},
+    }
+
+def print_report(report):
+    print(f"{'measurement':<18} {'count':>6} {'p50 ms':>10} {'p95 ms':>10}")
+    for name in ("import_seconds", "first_run_seconds"):
+        summary = report[name]
+        print(f"{name:<18} {summary['count']:>6} {summary['p50'] * 1000:>10.1f} {summary['p95'] * 1000:>10.1f}")
+    print(f"Heavy modules loaded at import: {', '.join(report['heavy_modules_at_import']) or 'none'}")
+    if report["errors"]:
+        print("Errors on first run:", *report["errors"], sep="\n  ")
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--samples", type=int, default=5, help="Fresh processes per measurement.")
+    arg_parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline report to diff against.")
+    arg_parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline.")
+    arg_parser.add_argument("--output", help="Also write the report to this path.")
+    arg_parser.add_argument("--threshold", type=float, default=0.10, help="Relative change flagged as a regression.")
+    arg_parser.add_argument("--fail-on-regression", action="store_true")
+    args = arg_parser.parse_args(argv)
+
+    report = run_benchmark(samples=args.samples)
+    print_report(report)
+    if args.output:
+        save_report(report, args.output)
+    if args.save_baseline:
+        save_report(report, args.baseline)
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+    print("\n=== Diff against baseline ===")
+    rows = diff_against_baseline(report, baseline, COMPARED_METRICS, threshold=args.threshold)
+    print_diff(rows)
+    regressed = any(row[4] for row in rows)
+    return 1 if regressed and args.fail_on_regression else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,65 +1,147 @@
 import os
-import io
 import base64
-from openai import OpenAI
 import streamlit as st
 import json
-from langchain.llms import OpenAI as LangChainOpenAI
-from PIL import Image
 from utils.play_context import PlayContext
+from utils.records import format_player_stat_facts
+from utils import metrics
+from utils.token_accounting import prompt_template_version, record_completion
+from utils.image_processing import format_bytes, preprocess_image
+from utils.caching import content_hash, roster_signature
+from utils.shared_backend import SharedCache
+from utils.player_matching import match_players
+from utils.concurrency import map_concurrently, submit_in_session
+from utils.game_state import (
+    diff_game_digests,
+    digest_from_box_score,
+    format_game_changes,
+    format_game_digest,
+    game_status as get_game_status,
+)
+
+# Version of the inline image analysis prompt (bump when editing it)
+IMAGE_ANALYSIS_PROMPT_VERSION = "image-v3"
+# Names/type/description read from images, shared across sessions (and worker processes, see
+# utils/shared_backend.py) and keyed by image content and prompt version
+IMAGE_ANALYSIS_CACHE = SharedCache("image_analysis", ttl_seconds=24 * 3600)
+# Game summaries keyed by their exact prompt and temperature: sessions following the same game
+# reuse a summary until the game state in the prompt changes
+GAME_SUMMARY_CACHE = SharedCache("game_summary", ttl_seconds=3600)
+# Concurrent vision calls when several images are uploaded at once
+IMAGE_ANALYSIS_WORKERS = 4
+
+# Game summary instructions by game status
+SUMMARY_INSTRUCTIONS = {
+    "not started": (
+        "Summarize the matchup, including the teams, date, location, broadcast details, "
+        "weather, and key statistics such as point spread and over/under. Highlight pregame insights."
+    ),
+    "in progress": (
+        "Summarize the current state of the game, including the score, quarter, time remaining, "
+        "and notable plays. Highlight trends or momentum shifts."
+    ),
+    "over": (
+        "Summarize the final outcome of the game, including the final score, key moments, "
+        "and standout performances. Highlight the overall impact of the game."
+    ),
+}
+
+# Most recent scoring plays included in broadcast prompts
+BROADCAST_SCORING_PLAYS = 4
+# Model generating broadcast updates
+BROADCAST_MODEL = "gpt-4o-mini"
+
+PROMPTS_DIR = "prompts"
+# Prompt templates by file name: (modification time, text), shared across sessions
+_prompt_templates = {}
+_dependencies_preloaded = False
 
-# Helper function to load prompt templates
 def load_prompt_template(template_name):
-    with open(f"prompts/{template_name}", "r") as file:
-        return file.read()
-
-def filter_relevant_game_data(game_data):
     """
-    Filters the relevant fields from the game data JSON for games in progress or over.
+    Returns a prompt template from the prompts folder, cached in memory and only reread when
+    the file's modification time changes (so edited prompts are picked up without a restart).
+    """
+    path = os.path.join(PROMPTS_DIR, template_name)
+    modified = os.stat(path).st_mtime_ns
+    cached = _prompt_templates.get(template_name)
+    metrics.record_cache_lookup("prompt_templates", hit=cached is not None and cached[0] == modified)
+    if cached is not None and cached[0] == modified:
+        return cached[1]
+    with open(path, "r") as file:
+        template = file.read()
+    _prompt_templates[template_name] = (modified, template)
+    return template
+
+def _import_openai():
+    # openai takes most of this module's import time, so it is only loaded when first needed
+    import openai
+    return openai
+
+def _import_image_extraction():
+    # pydantic is only loaded once an image is analyzed
+    from utils import image_extraction
+    return image_extraction
+
+def _preload_modules():
+    import utils.stats_engine  # NumPy, used from the first play on
+    return _import_openai()
+
+def preload_dependencies():
+    """
+    Reads the prompt templates into memory and imports the OpenAI SDK and the stats engine on a
+    background thread, so the page renders without waiting for them and the first play doesn't
+    pay for the imports. Runs once per process.
 
-    Parameters:
-        game_data (dict): Full game data JSON.
+    Returns:
+        Future: The background import (None when already preloaded).
+    """
+    global _dependencies_preloaded
+    if _dependencies_preloaded:
+        return None
+    _dependencies_preloaded = True
+    for template_name in sorted(os.listdir(PROMPTS_DIR)):
+        if template_name.endswith(".txt"):
+            load_prompt_template(template_name)
+    return submit_in_session(_preload_modules)
+
+def get_openai_client():
+    """
+    Creates an OpenAI client. The base URL can be overridden with `api_urls.openai`
+    in secrets.toml (e.g. to point at the stubbed LLM used by the benchmarks).
 
     Returns:
-        dict: Filtered game data.
+        OpenAI: Configured OpenAI client.
     """
-    return {
-        "Score": {
-            "AwayTeam": game_data["Score"]["AwayTeam"],
-            "HomeTeam": game_data["Score"]["HomeTeam"],
-            "AwayScore": game_data["Score"]["AwayScore"],
-            "HomeScore": game_data["Score"]["HomeScore"],
-            "Quarter": game_data["Score"]["Quarter"],
-            "TimeRemaining": game_data["Score"]["TimeRemaining"],
-            "Possession": game_data["Score"]["Possession"],
-            "LastPlay": game_data["Score"].get("LastPlay", ""),
-        },
-        "StadiumDetails": {
-            "Name": game_data["Score"]["StadiumDetails"]["Name"],
-            "City": game_data["Score"]["StadiumDetails"]["City"],
-            "State": game_data["Score"]["StadiumDetails"]["State"],
-        },
-    }
+    base_url = st.secrets.get("api_urls", {}).get("openai")
+    return _import_openai().OpenAI(api_key=st.secrets["api_keys"]["openai"], base_url=base_url)
 
-def summarize_game_data(filtered_game_data):
+def format_game_summary_prompt(game_data, digest=None):
     """
-    Creates a summarized string from the filtered game data for the LLM prompt.
+    Builds the full game summary prompt.
 
     Parameters:
-        filtered_game_data (dict): Filtered game data.
+        game_data (dict): Detailed box score data for the game.
+        digest (dict): The game-state digest, if already computed (see utils/game_state.py).
 
     Returns:
-        str: Summary of the game data in bullet-point format.
-    """
-    return f"""
-    - **Teams**: {filtered_game_data['Score']['AwayTeam']} vs {filtered_game_data['Score']['HomeTeam']}
-    - **Score**: {filtered_game_data['Score']['AwayScore']} - {filtered_game_data['Score']['HomeScore']}
-    - **Quarter**: {filtered_game_data['Score']['Quarter']}
-    - **Time Remaining**: {filtered_game_data['Score']['TimeRemaining']}
-    - **Current Possession**: {filtered_game_data['Score']['Possession']}
-    - **Last Play**: {filtered_game_data['Score']['LastPlay']}
-    - **Stadium**: {filtered_game_data['StadiumDetails']['Name']}, {filtered_game_data['StadiumDetails']['City']}, {filtered_game_data['StadiumDetails']['State']}
+        tuple: Basic game details (str), prompt (str) and prompt template version (str).
     """
+    # Determine the game status
+    game_status = get_game_status(game_data["Score"])
+
+    # Handle summarization based on game status
+    if game_status == "not started":
+        # Pregame details (teams, date, stadium, channel, odds, weather) all live under "Score"
+        box_score_json = json.dumps(game_data["Score"], separators=(",", ":"))
+    else:
+        box_score_json = format_game_digest(digest or digest_from_box_score(game_data))
+    dynamic_instructions = SUMMARY_INSTRUCTIONS[game_status]
+
+    # Load the game summary prompt template
+    prompt_template = load_prompt_template("game_summary_prompt.txt")
+    template_version = prompt_template_version(prompt_template)
+    prompt = prompt_template.format(box_score_json=box_score_json, dynamic_instructions=dynamic_instructions)
+    return box_score_json, prompt, template_version
 
 def generate_game_summary(game_data, temperature=0.7):
     """
@@ -72,182 +154,470 @@ def generate_game_summary(game_data, temperature=0.7):
     Returns:
         tuple: Basic game details (str) and LLM-generated game summary (str).
     """
-    client = OpenAI(api_key=st.secrets["api_keys"]["openai"])
-
-    # Determine the game status
-    game_status = (
-        "not started" if not game_data["Score"]["HasStarted"]
-        else "in progress" if game_data["Score"]["IsInProgress"]
-        else "over"
+    digest = digest_from_box_score(game_data)
+    box_score_json, prompt, template_version = format_game_summary_prompt(game_data, digest)
+    game_summary = complete_game_summary(
+        prompt, game_data, temperature, template_version, summary_cache_key(digest, template_version, temperature)
     )
+    return box_score_json, game_summary or "Error generating game summary."
 
-    # Handle summarization based on game status
-    if game_status == "not started":
-        box_score_json = json.dumps(game_data, indent=2)
-        dynamic_instructions = (
-            "Summarize the matchup, including the teams, date, location, broadcast details, "
-            "weather, and key statistics such as point spread and over/under. Highlight pregame insights."
-        )
-    else:
-        filtered_game_data = filter_relevant_game_data(game_data)
-        summarized_data = summarize_game_data(filtered_game_data)
-        box_score_json = summarized_data
-        if game_status == "in progress":
-            dynamic_instructions = (
-                "Summarize the current state of the game, including the score, quarter, time remaining, "
-                "and notable plays. Highlight trends or momentum shifts."
-            )
-        else:  # Game Over
-            dynamic_instructions = (
-                "Summarize the final outcome of the game, including the final score, key moments, "
-                "and standout performances. Highlight the overall impact of the game."
-            )
+def summary_cache_key(digest, template_version, temperature):
+    """
+    Returns the GAME_SUMMARY_CACHE key of a full summary built from a game-state digest: its
+    prompt is determined by the digest's Revision (and SchemaVersion), the template and the
+    temperature. None for pregame summaries, whose prompt is the raw score object.
+    """
+    if digest["Status"] == "not started":
+        return None
+    return f"full:{digest['ScoreID']}:{digest['SchemaVersion']}:{digest['Revision']}:{template_version}:{temperature}"
 
-    # Load the game summary prompt template
-    prompt_template = load_prompt_template("game_summary_prompt.txt")
-    prompt = prompt_template.format(box_score_json=box_score_json, dynamic_instructions=dynamic_instructions)
+def complete_game_summary(prompt, game_data, temperature, template_version, cache_key=None):
+    """
+    Sends a game summary prompt to the LLM, unless a summary of the same prompt and
+    temperature is in GAME_SUMMARY_CACHE.
+
+    Parameters:
+        cache_key (str): Cache key standing for the prompt (see summary_cache_key); by default
+                         the prompt's hash.
+
+    Returns:
+        str: The generated summary, or None on failure.
+    """
+    cache_key = cache_key or content_hash(f'{temperature}:{prompt}'.encode('utf-8'))
+    cached_summary = GAME_SUMMARY_CACHE.get(cache_key)
+    if cached_summary is not None:
+        return cached_summary
+    client = get_openai_client()
 
     # Call the OpenAI API
     try:
-        chat_completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "developer", "content": "You are a helpful assistant generating sports game summaries."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=temperature,
-            max_tokens=350,
-        )
-        return box_score_json, chat_completion.choices[0].message.content.strip()
+        with metrics.timer("llm_request_seconds", call="game_summary"):
+            chat_completion = client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "developer", "content": "You are a helpful assistant generating sports game summaries."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=temperature,
+                max_tokens=350,
+            )
+        metrics.increment("llm_requests", call="game_summary", outcome="ok")
+        record_completion("game_summary", chat_completion, game_data["Score"].get("ScoreID"), template_version)
+        game_summary = chat_completion.choices[0].message.content.strip()
+        GAME_SUMMARY_CACHE.put(cache_key, game_summary)
+        return game_summary
     except Exception as e:
+        metrics.increment("llm_requests", call="game_summary", outcome="error")
         st.error(f"Failed to generate game summary: {e}")
-        return box_score_json, "Error generating game summary."
+        return None
 
-def generate_broadcast(play_context: PlayContext, temperature: float = 0.7) -> str:
+def refresh_game_summary(game_data, temperature=0.7):
     """
-    Generates a customized play-by-play broadcast using OpenAI's API.
+    Refreshes the game summary incrementally. The last summary and the game-state digest it was
+    built from are kept in session state; on refresh only the material changes since that digest
+    (score, quarter, status, new scoring plays, new stat leaders) are sent along with the
+    previous summary, and the LLM is skipped entirely when nothing material changed.
+
+    Parameters:
+        game_data (dict): Detailed box score data for the game.
+        temperature (float): Temperature setting for the LLM.
+
+    Returns:
+        tuple: Basic game details (str) and LLM-generated game summary (str).
+    """
+    digest = digest_from_box_score(game_data)
+    previous = st.session_state.get("summary_state")
+    if previous is None or previous["digest"]["ScoreID"] != digest["ScoreID"] or digest["Status"] == "not started":
+        basic_details, prompt, template_version = format_game_summary_prompt(game_data, digest)
+        game_summary = complete_game_summary(
+            prompt, game_data, temperature, template_version, summary_cache_key(digest, template_version, temperature)
+        )
+        mode = "full"
+    else:
+        basic_details = format_game_digest(digest)
+        changes = diff_game_digests(previous["digest"], digest)
+        if not changes:
+            metrics.increment("game_summary_refreshes", mode="skipped")
+            return basic_details, previous["summary"]
+        prompt_template = load_prompt_template("game_summary_update_prompt.txt")
+        template_version = prompt_template_version(prompt_template)
+        prompt = prompt_template.format(
+            previous_summary=previous["summary"],
+            box_score_json=basic_details,
+            game_changes=format_game_changes(changes),
+            dynamic_instructions=SUMMARY_INSTRUCTIONS[digest["Status"]],
+        )
+        game_summary = complete_game_summary(prompt, game_data, temperature, template_version)
+        mode = "incremental"
+
+    if game_summary is None:
+        return basic_details, "Error generating game summary."
+    metrics.increment("game_summary_refreshes", mode=mode)
+    st.session_state.summary_state = {"digest": digest, "summary": game_summary}
+    return basic_details, game_summary
+
+def format_broadcast_prompt(play_context: PlayContext, data_prompt_template: str = None) -> str:
+    """
+    Formats the broadcast data prompt template with the play context.
 
     Parameters:
         play_context (PlayContext): Encapsulated context for the play.
-        temperature (float): Creativity level for the LLM.
+        data_prompt_template (str): Template to use instead of the session's.
 
     Returns:
-        str: Generated broadcast content.
+        str: Formatted data prompt.
     """
-    instructions_prompt = st.session_state.broadcast_instructions_prompt
-    data_prompt_template = st.session_state.broadcast_data_prompt
-    data_prompt = data_prompt_template.format(
-        game_info=play_context.game_info,
-        play_info=play_context.play_info,
+    data_prompt_template = data_prompt_template or st.session_state.broadcast_data_prompt
+    game_info = play_context.game_info
+    betting_odds = play_context.betting_odds
+    return data_prompt_template.format(
+        game_info=format_game_digest(game_info, max_scoring_plays=BROADCAST_SCORING_PLAYS),
+        play_info=play_context.play_info.to_prompt(),
         preferences=play_context.preferences,
-        player_box_scores=play_context.player_box_scores,
-        player_season_stats=play_context.player_season_stats,
-        betting_odds=play_context.betting_odds,
+        player_stats=format_player_stat_facts(play_context.player_stats),
+        betting_odds=betting_odds.to_prompt(game_info["AwayTeam"], game_info["HomeTeam"]) if betting_odds else "None available.",
+        broadcast_memory=play_context.broadcast_memory or "None yet.",
     )
 
+def broadcast_prompt_prefix():
+    """
+    Returns the static developer message of broadcast prompts with its template version, rendered
+    once per session and template edit (the prefetch stage warms it between plays). It is sent
+    byte-identical as the first message of every call, which also lets the API's prompt caching
+    reuse it.
+
+    Returns:
+        dict: "developer_message", "template_version" and the "templates" it was rendered from.
+    """
+    templates = (st.session_state.broadcast_instructions_prompt, st.session_state.broadcast_data_prompt)
+    prefix = st.session_state.get("broadcast_prompt_prefix")
+    if prefix is None or prefix["templates"] != templates:
+        prefix = render_broadcast_prefix(*templates)
+        st.session_state.broadcast_prompt_prefix = prefix
+    return prefix
+
+def render_broadcast_prefix(instructions_template, data_prompt_template):
+    return {
+        "templates": (instructions_template, data_prompt_template),
+        "developer_message": (
+            "You are a helpful assistant generating sports play-by-play broadcast updates. "
+            f"For each update, please adhere to the instructions below. {instructions_template}"
+        ),
+        "template_version": prompt_template_version(instructions_template, data_prompt_template),
+    }
+
+def broadcast_messages(play_context: PlayContext, extra_instructions: str = "", templates: tuple = None):
+    """
+    Builds the chat messages of a broadcast update.
+
+    Parameters:
+        play_context (PlayContext): Encapsulated context for the play.
+        extra_instructions (str): Optional instructions appended to the developer prompt.
+        templates (tuple): (instructions, data) templates to use instead of the session's
+                           (e.g. prompt variants under evaluation).
+
+    Returns:
+        tuple: The messages (list) and their prompt template version (str).
+    """
+    prefix = broadcast_prompt_prefix() if templates is None else render_broadcast_prefix(*templates)
+    developer_message = prefix["developer_message"]
+    if extra_instructions:
+        developer_message = f"{developer_message}\n\n{extra_instructions}"
+    with metrics.timer("broadcast_stage_seconds", stage="prompt_format"):
+        data_prompt = format_broadcast_prompt(play_context, prefix["templates"][1])
+    messages = [
+        {"role": "developer", "content": developer_message},
+        {"role": "user", "content": data_prompt},
+    ]
+    return messages, prefix["template_version"]
+
+def request_broadcast(messages, temperature: float = 0.7, max_tokens: int = None):
+    """
+    Sends broadcast messages to the model and returns the chat completion (raises on failure).
+    """
+    with metrics.timer("broadcast_stage_seconds", stage="llm"):
+        client = get_openai_client()
+        with metrics.timer("llm_request_seconds", call="broadcast"):
+            return client.chat.completions.create(
+                model=BROADCAST_MODEL,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens or _import_openai().NOT_GIVEN,
+            )
+
+def generate_broadcast(play_context: PlayContext, temperature: float = 0.7, max_tokens: int = None, extra_instructions: str = "") -> str:
+    """
+    Generates a customized play-by-play broadcast using OpenAI's API.
+
+    Parameters:
+        play_context (PlayContext): Encapsulated context for the play.
+        temperature (float): Creativity level for the LLM.
+        max_tokens (int): Optional cap on completion tokens (used when the session budget runs low).
+        extra_instructions (str): Optional instructions appended to the developer prompt.
+
+    Returns:
+        str: Generated broadcast content.
+    """
     try:
-        client = OpenAI(api_key=st.secrets["api_keys"]["openai"])
-        chat_completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "developer", "content": f"You are a helpful assistant generating sports play-by-play broadcast updates. For each update, please adhere to the instructions below. {instructions_prompt}"},
-                {"role": "user", "content": data_prompt}
-            ],
-            temperature=temperature,
-        )
-        return chat_completion.choices[0].message.content.strip()
+        return complete_broadcast(play_context, temperature, max_tokens, extra_instructions)
     except Exception as e:
         st.error(f"Failed to generate broadcast: {e}")
         return "Error generating broadcast."
+
+def complete_broadcast(play_context: PlayContext, temperature: float = 0.7, max_tokens: int = None, extra_instructions: str = "") -> str:
+    """
+    Like generate_broadcast, but raises on failure instead of showing the error, so it can run
+    on a worker thread (Streamlit elements are emitted from the script thread). Call
+    broadcast_prompt_prefix() on the script thread first, so the worker only reads it.
+
+    Returns:
+        str: Generated broadcast content.
+    """
+    messages, template_version = broadcast_messages(play_context, extra_instructions)
+    try:
+        chat_completion = request_broadcast(messages, temperature, max_tokens)
+        metrics.increment("llm_requests", call="broadcast", outcome="ok")
+        record_completion("broadcast", chat_completion, play_context.game_info.get("ScoreID"), template_version)
+        return chat_completion.choices[0].message.content.strip()
+    except Exception:
+        metrics.increment("llm_requests", call="broadcast", outcome="error")
+        raise
     
 def encode_image(uploaded_image):
     """
-    Encodes an uploaded image file to a base64 string for LLM processing.
+    Preprocesses an uploaded image file (see utils/image_processing.py) and encodes it to a
+    base64 data URL for LLM processing.
 
     Parameters:
         uploaded_image: Uploaded file object.
 
     Returns:
-        str: Base64-encoded string of the image.
+        dict: Preprocessing result with the "data_url" to send, its "mime_type" and "detail" level,
+              and the payload size before and after ("original_bytes", "processed_bytes").
+    """
+    image_bytes = uploaded_image.getvalue()  # Full content, independent of earlier reads
+    with metrics.timer("image_preprocess_seconds"):
+        processed = preprocess_image(image_bytes, fallback_mime_type=getattr(uploaded_image, "type", None) or "image/png")
+    metrics.increment("image_payload_bytes", processed["original_bytes"], stage="original")
+    metrics.increment("image_payload_bytes", processed["processed_bytes"], stage="processed")
+    processed["data_url"] = f"data:{processed['mime_type']};base64,{base64.b64encode(processed['data']).decode('utf-8')}"
+    return processed
+
+
+def image_analysis_key(uploaded_images, players):
+    """
+    Returns the key identifying an analysis of a set of images: their content, the roster and
+    the prompt version.
+    """
+    return (
+        tuple(content_hash(uploaded_image.getvalue()) for uploaded_image in uploaded_images),
+        roster_signature(players),
+        IMAGE_ANALYSIS_PROMPT_VERSION,
+    )
+
+def show_image_analysis(image_results, payload_note):
+    st.success(
+        f"""
+        Image analysis complete!
+        - `Image type detected: {image_results['image_type']}`
+        - `Players detected: {list(image_results['players'].keys())}`
+        - `Description: {image_results['description']}`
+        - `Image payload: {payload_note}`
+        """
+    )
+
+def extract_image_contents(encoded_image):
+    """
+    Asks the vision model for the player names printed in an image (as written, without a
+    roster to choose from), the image type and a short description. The response is requested
+    in the ImageExtraction JSON schema (utils/image_extraction.py); a response that still
+    doesn't parse is repaired locally or reformatted by a text-only call, never by resending
+    the image.
+
+    Parameters:
+        encoded_image (dict): Preprocessed image from encode_image.
+
+    Returns:
+        dict: {"player_names": list, "image_type": str, "description": str}
+    """
+    llm_prompt = """
+    You are an AI assistant helping with sports image analysis.
+    Given the following image, determine:
+    1. The names of all NFL players that appear in the image, written exactly as shown.
+    2. Classify the image as one of the following types: 'bet slip', 'fantasy roster', or 'other'.
+    3. Generate a brief description of the image. E.g., if it's a bet slip, describe the bets placed. 
+
+    Use OCR to extract text from the image and infer the information.
+    Respond with "players", "image_type" and "description", e.g. for a bet slip:
+    "description": "Player1 50+ yards (+250 odds, $10 wager to win $25); Player2 to score 2+ tochdowns (+150 odds, $20 wager to win $30)"
+    """
+
+    client = get_openai_client()
+
+    messages = [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": llm_prompt},
+                {"type": "image_url", "image_url": {"url": encoded_image["data_url"], "detail": encoded_image["detail"]}},
+            ],
+        }
+    ]
+
+    with metrics.timer("llm_request_seconds", call="image_analysis"):
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages,
+            response_format=_import_image_extraction().image_extraction_schema(),
+        )
+    record_completion("image_analysis", response, template_version=IMAGE_ANALYSIS_PROMPT_VERSION)
+    message = response.choices[0].message
+    if getattr(message, "refusal", None):
+        raise ValueError(f"Image analysis refused: {message.refusal}")
+    try:
+        extraction, repaired = _import_image_extraction().parse_image_extraction(message.content)
+        metrics.increment("image_analysis_parses", outcome="repaired" if repaired else "ok")
+    except ValueError:
+        # Only the parse step is retried: the image is never sent again
+        extraction = reformat_image_extraction(message.content)
+    return extraction.to_extraction()
+
+def reformat_image_extraction(analysis_text):
     """
-    image_bytes = uploaded_image.read()  # Read the content of the uploaded file
-    return base64.b64encode(image_bytes).decode("utf-8")
+    Asks the model (text only) to restate an image analysis response it couldn't parse in the
+    expected schema. Much cheaper than repeating the vision call.
 
+    Parameters:
+        analysis_text (str): The unparseable response content.
+
+    Returns:
+        ImageExtraction: The validated extraction.
 
-def infer_image_contents(uploaded_image, players):
+    Raises:
+        ValueError: If the reformatted response doesn't validate either.
     """
-    Infers player names and image type (bet slip, fantasy roster, or other) from the uploaded image.
+    client = get_openai_client()
+    with metrics.timer("llm_request_seconds", call="image_analysis_reformat"):
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "developer", "content": "Restate this analysis of a sports image as JSON with the players, image type and description it mentions. Don't add anything."},
+                {"role": "user", "content": analysis_text or ""},
+            ],
+            temperature=0,
+            response_format=_import_image_extraction().image_extraction_schema(),
+        )
+    record_completion("image_analysis", response, template_version=IMAGE_ANALYSIS_PROMPT_VERSION)
+    try:
+        extraction, _ = _import_image_extraction().parse_image_extraction(response.choices[0].message.content)
+    except ValueError:
+        metrics.increment("image_analysis_parses", outcome="failed")
+        raise
+    metrics.increment("image_analysis_parses", outcome="reformatted")
+    return extraction
+
+def analyze_image(uploaded_image):
+    """
+    Reads the player names, type and description of one image, using the cross-session cache
+    when the same image was analyzed before. Safe to run on worker threads (renders nothing).
 
     Parameters:
         uploaded_image: Uploaded file object from Streamlit.
-        players (dict): Dictionary of all players with names as keys and IDs as values.
 
     Returns:
-        dict: Dictionary with inferred player names and image type.
+        tuple: (extraction dict from extract_image_contents, payload note for display)
     """
-    with st.spinner('Analyzing your image...'):
-        if not uploaded_image:
-            return {"players": {}, "image_type": "No image uploaded.", "description": "N/A", "image_name":""}
-
-        # Encode the image
-        base64_image = encode_image(uploaded_image)
-
-        # Prepare LLM input
-        players_text = ", ".join(players.keys())
-
-        llm_prompt = f"""
-        You are an AI assistant helping with sports image analysis.
-        Given the following image, determine:
-        1. Which player names from this list are present: {players_text}.
-        2. Classify the image as one of the following types: 'bet slip', 'fantasy roster', or 'other'.
-        3. Generate a brief description of the image. E.g., if it's a bet slip, describe the bets placed. 
-
-        Use OCR to extract text from the image and infer the information.
-        Respond in valid JSON format like this:
-        {{
-            "players": ["Player1", "Player2"],
-            "image_type": "bet slip"
-            "description": "Player1 50+ yards (+250 odds, $10 wager to win $25); Player2 to score 2+ tochdowns (+150 odds, $20 wager to win $30)"
-        }}
-        """
+    cache_key = f"{content_hash(uploaded_image.getvalue())}:{IMAGE_ANALYSIS_PROMPT_VERSION}"
+    extraction = IMAGE_ANALYSIS_CACHE.get(cache_key)
+    if extraction is not None:
+        return extraction, "cached result, no vision call"
+    try:
+        # Preprocess and encode the image
+        encoded_image = encode_image(uploaded_image)
+        extraction = extract_image_contents(encoded_image)
+    except Exception:
+        metrics.increment("llm_requests", call="image_analysis", outcome="error")
+        raise
+    metrics.increment("llm_requests", call="image_analysis", outcome="ok")
+    IMAGE_ANALYSIS_CACHE.put(cache_key, extraction)
+    payload_note = (
+        f"{format_bytes(encoded_image['original_bytes'])} uploaded, {format_bytes(encoded_image['processed_bytes'])} sent "
+        f"({encoded_image['mime_type']}, {encoded_image['detail']} detail)"
+    )
+    return extraction, payload_note
 
-        client = OpenAI(api_key=st.secrets["api_keys"]["openai"])
+def merge_image_results(image_results):
+    """
+    Merges per-image results into one preferences structure: players are deduplicated, image
+    types listed once each and descriptions labelled by file name.
 
-        messages = [
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": llm_prompt},
-                    {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{base64_image}"}},
-                ],
-            }
-        ]
+    Parameters:
+        image_results (list): Per-image result dicts (players, image_type, description, image_name).
 
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=messages
-            )
-            analysis_result = response.choices[0].message.content.strip()
-            # Remove any extra backticks if present and parse as JSON
-            cleaned_response = analysis_result.strip("```json ").strip("```")
-            cleaned_response = json.loads(cleaned_response)
-
-            detected_players = {
-                player: players[player]
-                for player in cleaned_response["players"]
-                if player in players
-            }
-
-            st.success(
-                f"""
-                Image analysis complete!
-                - `Image type detected: {cleaned_response['image_type']}`
-                - `Players detected: {list(detected_players.keys())}`
-                - `Description: {cleaned_response['description']}`
-                """
-            )
-            return {"players": detected_players, "image_type": cleaned_response['image_type'], "description": cleaned_response['description'], "image_name":uploaded_image.name}
-        except Exception as e:
-            st.error(f"Failed to analyze image contents: {e}")
-            return {"players": {}, "image_type": "Error processing image", "description": "N/A", "image_name":uploaded_image.name}
+    Returns:
+        dict: Merged result in the same shape.
+    """
+    if len(image_results) == 1:
+        return dict(image_results[0])
+    players = {}
+    for result in image_results:
+        players.update(result["players"])
+    return {
+        "players": players,
+        "image_type": ", ".join(dict.fromkeys(result["image_type"] for result in image_results)),
+        "description": "; ".join(f"{result['image_name']}: {result['description']}" for result in image_results),
+        "image_name": ", ".join(result["image_name"] for result in image_results),
+    }
+
+def infer_image_contents(uploaded_images, players):
+    """
+    Infers player names and image type (bet slip, fantasy roster, or other) from the uploaded
+    image(s). Several images (e.g. multi-leg slips, multiple fantasy lineups) are analyzed
+    concurrently and merged into a single deduplicated result.
+
+    The vision model only reads the names off the image; they are matched against the roster
+    locally (utils/player_matching.py), so the prompt doesn't carry the full roster and
+    misspelled, abbreviated or nicknamed names still resolve. Extractions are cached across
+    sessions by image content, so re-uploads of the same image (under any file name, for any
+    game) skip the vision call. Once every image was analyzed, the analysis key is stored in
+    st.session_state.image_results_key so reruns don't repeat it; a failed analysis isn't
+    recorded, so the next rerun retries it.
+
+    Parameters:
+        uploaded_images: Uploaded file object(s) from Streamlit (one or a list).
+        players (dict): Dictionary of all players with names as keys and IDs as values.
+
+    Returns:
+        dict: Dictionary with inferred player names and image type.
+    """
+    if uploaded_images and not isinstance(uploaded_images, list):
+        uploaded_images = [uploaded_images]
+    if not uploaded_images:
+        return {"players": {}, "image_type": "No image uploaded.", "description": "N/A", "image_name":""}
+
+    analysis_key = image_analysis_key(uploaded_images, players)
+    spinner_text = 'Analyzing your image...' if len(uploaded_images) == 1 else f'Analyzing your {len(uploaded_images)} images...'
+    with st.spinner(spinner_text):
+        outcomes = map_concurrently(analyze_image, uploaded_images, max_workers=IMAGE_ANALYSIS_WORKERS)
+
+    image_results = []
+    payload_notes = []
+    for uploaded_image, (outcome, error) in zip(uploaded_images, outcomes):
+        if error is not None:
+            st.error(f"Failed to analyze image contents ({uploaded_image.name}): {error}")
+            continue
+        extraction, payload_note = outcome
+        image_results.append({
+            "players": match_players(extraction["player_names"], players),
+            "image_type": extraction["image_type"],
+            "description": extraction["description"],
+            "image_name": uploaded_image.name,
+        })
+        payload_notes.append(payload_note)
+
+    st.session_state.image_results_key = analysis_key if len(image_results) == len(uploaded_images) else None
+    if not image_results:
+        return {"players": {}, "image_type": "Error processing image", "description": "N/A", "image_name":", ".join(uploaded_image.name for uploaded_image in uploaded_images)}
+    merged_results = merge_image_results(image_results)
+    show_image_analysis(merged_results, "; ".join(payload_notes))
+    return merged_results
@@ -2,8 +2,90 @@ import requests
 import streamlit as st
 from dateutil import parser
 import pytz
-from datetime import datetime
+from datetime import datetime, timedelta
 import re
+import json
+import hashlib
+import threading
+import time
+from utils import metrics
+from utils.caching import TTLCache
+from utils.circuit_breaker import CircuitOpenError, breaker_for, is_upstream_failure
+from utils.concurrency import submit_in_session
+from utils.json_decoding import configured_decoder, decode_json, fields
+from utils.records import STAT_LINE_API_FIELDS, PlayRecord
+from utils.shared_backend import SharedCache
+from utils.snapshot_store import get_snapshot_store, snapshot_key
+
+DEFAULT_REPLAY_HOST = "https://replay.sportsdata.io"
+
+# Slow-changing data (replay metadata, schedule, rosters, season stats): kept in memory and in the
+# on-disk snapshot store (utils/snapshot_store.py), both shared by all sessions
+STATIC_DATA_TTL_SECONDS = 3600
+STATIC_DATA_TTLS = {
+    "metadata": 600,
+    "current_season": 3600,
+    "schedule": 300,
+    "players": 6 * 3600,
+    "season_stats": STATIC_DATA_TTL_SECONDS,
+}
+STATIC_DATA_CACHE = TTLCache("static_data", max_entries=64, ttl_seconds=STATIC_DATA_TTL_SECONDS)
+# Expired static data is served for up to this long while it is refetched in the background
+# (stale-while-revalidate), or while its endpoint is down
+STATIC_DATA_STALE_SECONDS = 24 * 3600
+STALE_STATIC_DATA = TTLCache("static_data_stale", max_entries=64, ttl_seconds=STATIC_DATA_STALE_SECONDS)
+
+# Live game endpoints read through per-session snapshots: fetched at most once per poll, or
+# ahead of the next play by the prefetch stage (utils/prefetch.py)
+LIVE_ENDPOINTS = {
+    "box_score": "stats/json/boxscorebyscoreidv3/{score_id}",
+    "odds": "odds/json/livegameoddslinemovement/{score_id}",
+    "props": "odds/json/bettingplayerpropsbyscoreid/{score_id}",
+}
+# Snapshots older than this are refetched even if the poll didn't clear them
+LIVE_SNAPSHOT_MAX_AGE_SECONDS = 10
+
+# Live payloads (play-by-play polls and live snapshots) one session fetched are reused by the
+# others, across worker processes with a shared backend (utils/shared_backend.py), for
+# `shared_backend.upstream_share_seconds`; 0 gives every session its own upstream requests
+UPSTREAM_SHARE_SECONDS = 2
+SHARED_UPSTREAM = SharedCache("shared_upstream")
+# Seconds a session waits for another one's in-flight request of the same payload before
+# making it itself, and how often it checks
+SHARED_FETCH_WAIT_SECONDS = 2
+SHARED_FETCH_CHECK_SECONDS = 0.05
+# The last good live payload is served for up to this long when its endpoint fails or its
+# circuit is open (utils/circuit_breaker.py), so an outage degrades one section of the context
+STALE_IF_ERROR_SECONDS = 300
+LAST_GOOD_LIVE = TTLCache("live_last_good", max_entries=256, ttl_seconds=STALE_IF_ERROR_SECONDS)
+# Upstream requests give up after this long (a hung endpoint counts as a failure)
+UPSTREAM_TIMEOUT_SECONDS = 10
+
+# Fields used downstream from the big payloads (decoded partially when msgspec is installed, see
+# utils/json_decoding.py): the game's Score object, the play and stat fields of utils/records.py,
+# and the scoring play fields of the game-state digest
+PARTIAL_SCHEMAS = {
+    "play_by_play": {
+        "Score": None,
+        "Plays": [{
+            **fields(*PlayRecord.API_FIELDS, "ScoringPlay"),
+            "PlayStats": [fields(*STAT_LINE_API_FIELDS)],
+        }],
+    },
+    "box_score": {
+        "Score": None,
+        "PlayerGames": [fields(*STAT_LINE_API_FIELDS)],
+        "ScoringPlays": [fields("ScoringPlayID", "Quarter", "Team", "Description")],
+    },
+    "season_stats": [fields(*STAT_LINE_API_FIELDS)],
+}
+
+def get_replay_host():
+    """
+    Returns the Replay API host. Can be overridden with `api_urls.sportsdataio_replay`
+    in secrets.toml (e.g. to point at the local stand-in server used by the benchmarks).
+    """
+    return st.secrets.get("api_urls", {}).get("sportsdataio_replay", DEFAULT_REPLAY_HOST).rstrip("/")
 
 def get_api_config():
     """
@@ -17,18 +99,248 @@ def get_api_config():
         return "https://api.sportsdata.io/v3/nfl/", st.secrets["api_keys"]["sportsdataio_live"]
     # Use user-provided Replay API key if available, otherwise fall back to default
     api_key = st.session_state.get("replay_api_key", st.secrets["api_keys"]["sportsdataio_replay"])
-    return "https://replay.sportsdata.io/api/v3/nfl/", api_key
+    return f"{get_replay_host()}/api/v3/nfl/", api_key
+
+def fetch_json(endpoint, url, params=None):
+    """
+    Shared fetch path for all SportsDataIO requests: performs the GET, raises for HTTP errors,
+    decodes the payload (partially for the endpoints in PARTIAL_SCHEMAS), and records request
+    latency, decode time, outcome and response size per endpoint. Requests to an endpoint whose
+    circuit is open fail fast with CircuitOpenError.
+
+    Parameters:
+        endpoint (str): Short endpoint name used as the metrics label.
+        url (str): Request URL.
+        params (dict): Query parameters.
+
+    Returns:
+        Parsed JSON response.
+    """
+    breaker = breaker_for(endpoint)
+    breaker.before_request()
+    with metrics.timer("upstream_request_seconds", endpoint=endpoint):
+        try:
+            response = requests.get(url, params=params, timeout=UPSTREAM_TIMEOUT_SECONDS)
+            response.raise_for_status()
+            decoder = configured_decoder()
+            with metrics.timer("json_decode_seconds", endpoint=endpoint, decoder=decoder):
+                try:
+                    payload = decode_json(response.content, PARTIAL_SCHEMAS.get(endpoint), decoder)
+                except ValueError as e:
+                    # Surface decode errors like response.json() did, as a RequestException
+                    raise requests.exceptions.InvalidJSONError(str(e), response=response) from e
+        except Exception as e:
+            metrics.increment("upstream_requests", endpoint=endpoint, outcome="error")
+            if is_upstream_failure(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+    breaker.record_success()
+    metrics.increment("upstream_requests", endpoint=endpoint, outcome="ok")
+    metrics.increment("upstream_response_bytes", len(response.content), endpoint=endpoint)
+    return payload
+
+def snapshot_version(endpoint):
+    """
+    Version of stored payloads of an endpoint: changes with its partial decoding schema, so
+    payloads stored without fields the app now reads are not served.
+    """
+    schema = json.dumps(PARTIAL_SCHEMAS.get(endpoint), sort_keys=True)
+    return hashlib.sha1(schema.encode("utf-8")).hexdigest()[:10]
+
+def fetch_static_json(endpoint, url, params=None):
+    """
+    fetch_json for data that doesn't change during a game, cached for its STATIC_DATA_TTLS entry:
+    first in this process's memory, then in the on-disk snapshot store shared with other worker
+    processes and restarts, and only then fetched from the API. Once an entry expires, the
+    previous payload keeps being served while it is refetched in the background.
+    """
+    key = snapshot_key(url, params)
+    payload = STATIC_DATA_CACHE.get(key)
+    if payload is not None:
+        return payload
+    payload = STALE_STATIC_DATA.get(key)
+    if payload is not None:
+        revalidate_static_json(endpoint, key, url, params)
+        return payload
+    return load_static_json(endpoint, key, url, params)
+
+_revalidating = set()
+_revalidating_lock = threading.Lock()
+
+def revalidate_static_json(endpoint, key, url, params):
+    """
+    Refetches an expired static payload on the background pool (once at a time per key).
+    """
+    with _revalidating_lock:
+        if key in _revalidating:
+            return
+        _revalidating.add(key)
+    metrics.increment("stale_served", endpoint=endpoint, reason="revalidating")
 
+    def revalidate():
+        try:
+            load_static_json(endpoint, key, url, params)
+        except requests.exceptions.RequestException:
+            pass  # counted by fetch_json; the stale payload is served until it succeeds
+        finally:
+            with _revalidating_lock:
+                _revalidating.discard(key)
+
+    submit_in_session(revalidate)
+
+def load_static_json(endpoint, key, url, params):
+    """
+    Reads a static payload from the snapshot store, or fetches it, and caches it in memory.
+    """
+    ttl_seconds = STATIC_DATA_TTLS.get(endpoint, STATIC_DATA_TTL_SECONDS)
+    store = get_snapshot_store()
+    stored = store.get(key, snapshot_version(endpoint)) if store else None
+    if stored is not None:
+        payload, expires_at = stored
+        STATIC_DATA_CACHE.put(key, payload, ttl_seconds=min(ttl_seconds, max(expires_at - time.time(), 0)))
+        STALE_STATIC_DATA.put(key, payload)
+        return payload
+
+    payload = fetch_json(endpoint, url, params)
+    STATIC_DATA_CACHE.put(key, payload, ttl_seconds=ttl_seconds)
+    STALE_STATIC_DATA.put(key, payload)
+    if store:
+        store.put(key, payload, ttl_seconds, snapshot_version(endpoint))
+    return payload
+
+def fetch_shared_json(endpoint, url, params=None):
+    """
+    fetch_json for live payloads many sessions poll at once: a payload fetched in the last
+    upstream_share_seconds by any session is reused, and while one session's request is in
+    flight the others wait for its result instead of sending their own. When the request fails
+    (or the endpoint's circuit is open), the last good payload of the last STALE_IF_ERROR_SECONDS
+    is served instead.
+    """
+    key = snapshot_key(url, params)
+    try:
+        payload = share_upstream_json(endpoint, key, url, params)
+    except requests.exceptions.RequestException:
+        payload = LAST_GOOD_LIVE.get(key)
+        if payload is None:
+            raise
+        metrics.increment("stale_served", endpoint=endpoint, reason="upstream_error")
+        return payload
+    LAST_GOOD_LIVE.put(key, payload)
+    return payload
+
+def share_upstream_json(endpoint, key, url, params):
+    share_seconds = st.secrets.get("shared_backend", {}).get("upstream_share_seconds", UPSTREAM_SHARE_SECONDS)
+    if not share_seconds:
+        return fetch_json(endpoint, url, params)
+
+    payload = SHARED_UPSTREAM.get(key)
+    if payload is not None:
+        return payload
+    acquired = SHARED_UPSTREAM.acquire(key, SHARED_FETCH_WAIT_SECONDS)
+    if not acquired:
+        deadline = time.monotonic() + SHARED_FETCH_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(SHARED_FETCH_CHECK_SECONDS)
+            payload = SHARED_UPSTREAM.peek(key)
+            if payload is not None:
+                metrics.increment("shared_fetch_waits", endpoint=endpoint, outcome="shared")
+                return payload
+        metrics.increment("shared_fetch_waits", endpoint=endpoint, outcome="timeout")
+    try:
+        payload = fetch_json(endpoint, url, params)
+        SHARED_UPSTREAM.put(key, payload, ttl_seconds=share_seconds)
+    finally:
+        # Only the lease holder releases it: a caller that timed out waiting must not drop the
+        # lease of the request still in flight
+        if acquired:
+            SHARED_UPSTREAM.release(key)
+    return payload
+
+def fetch_live_snapshot(endpoint, score_id):
+    """
+    Fetches a live game endpoint (one of LIVE_ENDPOINTS), bypassing the session's snapshots.
+    """
+    base_url, api_key = get_api_config()
+    return fetch_shared_json(endpoint, f"{base_url}{LIVE_ENDPOINTS[endpoint].format(score_id=score_id)}", {"key": api_key})
+
+def store_live_snapshot(endpoint, score_id, payload, as_of_sequence=None):
+    """
+    Stores the session's snapshot of a live game endpoint. as_of_sequence is the game's latest
+    play sequence when the snapshot was fetched ahead of the next plays (prefetch); None means
+    it was fetched for the plays being processed.
+    """
+    st.session_state.live_snapshots[(endpoint, score_id)] = {
+        "payload": payload, "fetched_at": time.monotonic(), "as_of_sequence": as_of_sequence,
+    }
+
+def discard_live_snapshot(endpoint, score_id):
+    st.session_state.live_snapshots.pop((endpoint, score_id), None)
+
+def live_snapshot_covers(endpoint, score_id, sequence):
+    """
+    Whether the session's snapshot of an endpoint reflects the play with this sequence (a
+    prefetched snapshot predates the plays after its as_of_sequence).
+    """
+    snapshot = st.session_state.live_snapshots.get((endpoint, score_id))
+    return snapshot is None or snapshot["as_of_sequence"] is None or snapshot["as_of_sequence"] >= sequence
+
+def clear_live_snapshots():
+    st.session_state.live_snapshots = {}
+
+def fetch_live_json(endpoint, score_id):
+    """
+    Returns the session's snapshot of a live game endpoint, fetching (and storing) it when there
+    is no snapshot younger than LIVE_SNAPSHOT_MAX_AGE_SECONDS.
+
+    Parameters:
+        endpoint (str): One of LIVE_ENDPOINTS.
+        score_id (int): The ScoreID of the game.
+
+    Returns:
+        Parsed JSON response.
+    """
+    if "live_snapshots" not in st.session_state:
+        clear_live_snapshots()
+    snapshot = st.session_state.live_snapshots.get((endpoint, score_id))
+    fresh = snapshot is not None and time.monotonic() - snapshot["fetched_at"] <= LIVE_SNAPSHOT_MAX_AGE_SECONDS
+    metrics.record_cache_lookup("live_snapshots", hit=fresh)
+    if fresh:
+        return snapshot["payload"]
+    payload = fetch_live_snapshot(endpoint, score_id)
+    store_live_snapshot(endpoint, score_id, payload)
+    return payload
+
+def report_upstream_error(message, error):
+    """
+    Shows a failed fetch: an error, or while the endpoint's circuit is open, a warning shown once
+    per outage (each poll would otherwise repeat it).
+    """
+    if not isinstance(error, CircuitOpenError):
+        st.error(f"{message}: {error}")
+        return
+    notices = st.session_state.setdefault("circuit_notices", set())
+    if (error.endpoint, error.opened_at) not in notices:
+        notices.add((error.endpoint, error.opened_at))
+        st.warning(f"{message}: {error}")
+
+def fetch_season_stats(season_code):
+    base_url, api_key = get_api_config()
+    return fetch_static_json("season_stats", f"{base_url}stats/json/playerseasonstats/{season_code}", {"key": api_key})
+
+def fetch_team_players(team):
+    base_url, api_key = get_api_config()
+    # The team parameter must be in lowercase
+    return fetch_static_json("players", f"{base_url}scores/json/playersbasic/{team.lower()}", {"key": api_key})
 
 def extract_season_code():
     base_url, api_key = get_api_config()
     if st.session_state.api_mode == "Replay":
         try:
-            url = f"https://replay.sportsdata.io/api/metadata?key={api_key}"
-            response = requests.get(url)
-            response.raise_for_status()
+            url = f"{get_replay_host()}/api/metadata"
             # Extract season codes from AvailableEndpoints
-            endpoints = response.json().get("AvailableEndpoints", [])
+            endpoints = fetch_static_json("metadata", url, {"key": api_key}).get("AvailableEndpoints", [])
             season_codes = set(re.findall(r"/(\d{4}(?:post|pre|reg))/", " ".join(endpoints)))
             return season_codes.pop() if season_codes else None
         except Exception as e:
@@ -38,9 +350,7 @@ def extract_season_code():
         try:
             url = f"{base_url}/scores/json/currentseason"
             params = {"key": api_key}
-            response = requests.get(url, params)
-            response.raise_for_status()
-            return response.json()
+            return fetch_static_json("current_season", url, params)
         except Exception as e:
             st.error(f"Error fetching season: {e}")
             return None
@@ -53,9 +363,7 @@ def get_nfl_schedule(season_code):
     url = f"{base_url}scores/json/schedulesbasic/{season_code}"
     params = {"key": api_key}  # API key as query parameter
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()  # Raise exception for HTTP errors
-        return response.json()
+        return fetch_static_json("schedule", url, params)
     except requests.exceptions.RequestException as e:
         st.error(f"Failed to fetch NFL schedule: {e}")
         return None
@@ -63,14 +371,10 @@ def get_nfl_schedule(season_code):
 def get_game_details(score_id):
     """
     Fetches detailed box score information for a specific game from the SportsDataIO Replay API.
+    Shared with the other sessions on the game like the live snapshots (see fetch_shared_json).
     """
-    base_url, api_key = get_api_config()
-    url = f"{base_url}stats/json/boxscorebyscoreidv3/{score_id}"
-    params = {"key": api_key}  # API key as query parameter
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+        return fetch_live_snapshot("box_score", score_id)
     except requests.exceptions.RequestException as e:
         st.error(f"Failed to fetch game details for ScoreID {score_id}: {e}")
         return None
@@ -78,16 +382,10 @@ def get_game_details(score_id):
 def get_players_by_team(team):
     """
     Fetches players for a specific team from the SportsDataIO Replay API.
-    The team parameter must be in lowercase.
+    Rosters are cached across sessions (see fetch_static_json).
     """
-    base_url, api_key = get_api_config()
-    team_lower = team.lower()  # Ensure the team name is lowercase
-    url = f"{base_url}scores/json/playersbasic/{team_lower}"
-    params = {"key": api_key}  # API key as query parameter
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()  # Raise exception for HTTP errors
-        return response.json()
+        return fetch_team_players(team)
     except requests.exceptions.RequestException as e:
         st.error(f"Failed to fetch players for team {team}: {e}")
         return None
@@ -100,9 +398,7 @@ def get_current_season():
     url = f"{base_url}scores/json/currentseason"
     params = {"key": api_key}  # API key as query parameter
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+        return fetch_json("current_season", url, params)
     except requests.exceptions.RequestException as e:
         st.error(f"Failed to fetch the current season: {e}")
         return None
@@ -115,9 +411,7 @@ def get_current_week():
     url = f"{base_url}scores/json/currentweek"
     params = {"key": api_key}  # API key as query parameter
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+        return fetch_json("current_week", url, params)
     except requests.exceptions.RequestException as e:
         st.error(f"Failed to fetch the current week: {e}")
         return None
@@ -136,11 +430,9 @@ def get_play_by_play(game_id):
     url = f"{base_url}pbp/json/playbyplay/{game_id}"
     params = {"key": api_key}
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+        return fetch_shared_json("play_by_play", url, params)
     except requests.exceptions.RequestException as e:
-        st.error(f"Failed to fetch play-by-play data for game ID {game_id}: {e}")
+        report_upstream_error(f"Failed to fetch play-by-play data for game ID {game_id}", e)
         return None
 
 
@@ -171,20 +463,25 @@ def get_current_replay_time():
     _, api_key = get_api_config()
     if st.session_state.api_mode == "Replay":
         try:
-            url = f"https://replay.sportsdata.io/api/metadata?key={api_key}"
-            response = requests.get(url)
-            response.raise_for_status()
-            current_time = response.json().get("CurrentTime")
+            url = f"{get_replay_host()}/api/metadata?key={api_key}"
+            current_time = fetch_json("metadata", url).get("CurrentTime")
             
             if current_time:
                 # Parse the time using dateutil and set it as Eastern Time
                 eastern_tz = pytz.timezone("US/Eastern")
                 replay_time = parser.isoparse(current_time).replace(tzinfo=eastern_tz)
+                st.session_state.replay_clock = (replay_time, time.monotonic())
                 return replay_time
             else:
                 return None
         except Exception as e:
-            st.error(f"Error fetching current replay time: {e}")
+            # Keep the replay clock running from its last reading while the metadata endpoint is down
+            replay_clock = st.session_state.get("replay_clock")
+            if replay_clock is not None:
+                metrics.increment("stale_served", endpoint="metadata", reason="upstream_error")
+                replay_time, read_at = replay_clock
+                return replay_time + timedelta(seconds=time.monotonic() - read_at)
+            report_upstream_error("Error fetching current replay time", e)
             return None
     else:
         # Get the current datetime in UTC
@@ -202,83 +499,57 @@ def check_games_in_progress():
     base_url, api_key = get_api_config()
     url = f"{base_url}scores/json/areanygamesinprogress?key={api_key}"
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()  # True if games are in progress, False otherwise
+        return fetch_json("games_in_progress", url)  # True if games are in progress, False otherwise
     except requests.exceptions.RequestException as e:
         st.error(f"Failed to check games in progress: {e}")
         return None
 
-def get_player_box_scores(score_id, player_ids):
-    """
-    Fetches player box scores from the API and filters relevant players.
+def get_game_player_stats(score_id):
     """
-    base_url, api_key = get_api_config()
-    url = f"{base_url}stats/json/boxscorebyscoreidv3/{score_id}"
-    params = {"key": api_key}
+    Fetches the player rows (PlayerGames) of a game's box score.
+    The box score is read through the session's live snapshot (see fetch_live_json).
 
+    Returns:
+        list: PlayerGames rows (empty on failure).
+    """
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-
-        # Parse response as dictionary
-        box_scores = response.json()
+        box_scores = fetch_live_json("box_score", score_id)
 
         # Ensure the structure contains player statistics
         if "PlayerGames" not in box_scores:
             st.error("Player statistics not found in the response.")
-            return {}
+            return []
 
-        # Filter relevant players from the correct key
-        return {
-            player["PlayerID"]: player 
-            for player in box_scores["PlayerGames"] 
-            if player["PlayerID"] in player_ids
-        }
+        return box_scores["PlayerGames"]
 
     except requests.exceptions.RequestException as e:
-        st.error(f"Failed to fetch player box scores: {e}")
-        return {}
+        report_upstream_error("Failed to fetch player box scores", e)
+        return []
 
 
-def get_player_season_stats(player_ids, season_code):
+def get_season_player_stats(season_code):
     """
-    Fetches player season stats from the API and filters relevant players.
+    Fetches the season stats of every player (cached across sessions, see fetch_static_json).
 
     Parameters:
-        player_ids (list): List of player IDs to filter.
-        api_key (str): API key for authentication.
+        season_code (str): Season code, e.g. "2024reg".
 
     Returns:
-        dict: Dictionary of player stats keyed by PlayerID.
+        list: Player season stats rows (empty on failure).
     """
-    base_url, api_key = get_api_config()
-    url = f"{base_url}stats/json/playerseasonstats/{season_code}"
-    params = {"key": api_key}
-
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-
-        # Parse response as a list of player stats
-        season_stats = response.json()
+        season_stats = fetch_season_stats(season_code)
 
         # Ensure the response is a list
         if not isinstance(season_stats, list):
             st.error("Unexpected format received from the API.")
-            return {}
-
-        # Filter relevant players based on provided IDs
-        filtered_stats = {
-            player["PlayerID"]: player 
-            for player in season_stats if player["PlayerID"] in player_ids
-        }
+            return []
 
-        return filtered_stats
+        return season_stats
 
     except requests.exceptions.RequestException as e:
-        st.error(f"Failed to fetch player season stats: {e}")
-        return {}
+        report_upstream_error("Failed to fetch player season stats", e)
+        return []
 
 def get_latest_in_game_odds(score_id):
     """
@@ -293,13 +564,8 @@ def get_latest_in_game_odds(score_id):
         list: A list of dictionaries containing the latest odds for each sportsbook,
               or None if no odds are available.
     """
-    base_url, api_key = get_api_config()
-    url = f"{base_url}odds/json/livegameoddslinemovement/{score_id}"
-    params = {"key": api_key}
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        odds_data = response.json()
+        odds_data = fetch_live_json("odds", score_id)
 
         if not odds_data or "LiveOdds" not in odds_data[0]:
             return None
@@ -320,7 +586,7 @@ def get_latest_in_game_odds(score_id):
         return list(latest_odds_by_sportsbook.values())
 
     except requests.exceptions.RequestException as e:
-        st.error(f"Failed to fetch in-game betting odds for ScoreId {score_id}: {e}")
+        report_upstream_error(f"Failed to fetch in-game betting odds for ScoreId {score_id}", e)
         return None
 
 def get_player_props(score_id, player_ids):
@@ -335,14 +601,8 @@ def get_player_props(score_id, player_ids):
     Returns:
         list: Filtered list of player props for the specified players.
     """
-    base_url, api_key = get_api_config()
-    url = f"{base_url}odds/json/bettingplayerpropsbyscoreid/{score_id}"
-    params = {"key": api_key}
-    
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        player_props = response.json()
+        player_props = fetch_live_json("props", score_id)
         
         # Filter props based on player IDs
         filtered_props = [
@@ -350,7 +610,7 @@ def get_player_props(score_id, player_ids):
         ]
         return filtered_props
     except requests.exceptions.RequestException as e:
-        st.error(f"Failed to fetch player props for ScoreID {score_id}: {e}")
+        report_upstream_error(f"Failed to fetch player props for ScoreID {score_id}", e)
         return []
 
 
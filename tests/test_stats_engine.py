@@ -0,0 +1,111 @@
+from utils.records import StatLine
+from utils.stats_engine import compute_player_stat_facts, _ordinal
+from utils.game_state import team_games_before
+
+QB = {"PlayerID": 1, "Name": "Josh Allen", "Team": "BUF", "Position": "QB", "Played": 1}
+WR = {"PlayerID": 2, "Name": "Khalil Shakir", "Team": "BUF", "Position": "WR", "Played": 1}
+RB = {"PlayerID": 3, "Name": "Isiah Pacheco", "Team": "KC", "Position": "RB", "Played": 1}
+DE = {"PlayerID": 4, "Name": "George Karlaftis", "Team": "KC", "Position": "DE", "Played": 1}
+
+def line(row, **stats):
+    return StatLine.from_api({**row, **stats})
+
+def facts_by_id(*args, **kwargs):
+    return {facts.player_id: facts for facts in compute_player_stat_facts(*args, **kwargs)}
+
+def test_ordinal():
+    assert [_ordinal(value) for value in (1, 2, 3, 4, 11, 12, 13, 21, 22, 101, 111)] == [
+        "1st", "2nd", "3rd", "4th", "11th", "12th", "13th", "21st", "22nd", "101st", "111th",
+    ]
+
+def test_delta_and_game_totals():
+    play = (line(QB, PassingAttempts=1, PassingCompletions=1, PassingYards=23), line(WR, Receptions=1, ReceivingYards=23))
+    game = [
+        {**QB, "PassingAttempts": 10, "PassingCompletions": 7, "PassingYards": 88},
+        {**WR, "Receptions": 3, "ReceivingYards": 41},
+    ]
+    facts = facts_by_id([1, 2], play, game)
+    assert facts[1].play == ("+1 cmp", "+1 att", "+23 pass yds")
+    assert facts[1].game == ("7 cmp", "10 att", "88 pass yds")
+    assert facts[2].play == ("+1 rec", "+23 rec yds")
+
+    # A box score prefetched before the play doesn't count it yet
+    facts = facts_by_id([1, 2], play, game, game_includes_play=False)
+    assert facts[1].game == ("8 cmp", "11 att", "111 pass yds")
+    assert facts[2].game == ("4 rec", "64 rec yds")
+
+def test_player_missing_from_box_score_uses_play():
+    play = (line(RB, RushingAttempts=1, RushingYards=4),)
+    facts = facts_by_id([3], play, [])
+    assert facts[3].name == "Isiah Pacheco"
+    assert facts[3].game == ("1 car", "4 rush yds")
+
+def test_ordinal_milestones():
+    play = (line(RB, RushingAttempts=1, RushingYards=2, RushingTouchdowns=1),)
+    game = [{**RB, "RushingAttempts": 9, "RushingYards": 40, "RushingTouchdowns": 2}]
+    season = [{**RB, "SeasonType": 1, "Played": 9, "RushingYards": 500, "RushingTouchdowns": 7}]
+    facts = facts_by_id([3], play, game, season)
+    assert facts[3].milestones == ("2nd rushing TD today, 9th of the season",)
+
+def test_half_sacks_are_counted_not_ordinal():
+    play = (line(DE, Sacks=0.5),)
+    game = [{**DE, "Sacks": 1.5}]
+    season = [{**DE, "SeasonType": 1, "Played": 9, "Sacks": 6.0}]
+    assert facts_by_id([4], play, game, season)[4].milestones == ("1.5 sacks today, 7.5 this season",)
+
+    game = [{**DE, "Sacks": 0.5}]
+    season = [{**DE, "SeasonType": 1, "Played": 9, "Sacks": 5.5}]
+    assert facts_by_id([4], play, game, season)[4].milestones == ("0.5 sacks today, 6th of the season",)
+
+def test_threshold_milestones():
+    play = (line(WR, Receptions=1, ReceivingYards=15),)
+    game = [{**WR, "Receptions": 6, "ReceivingYards": 104}]
+    season = [{**WR, "SeasonType": 1, "Played": 9, "Receptions": 40, "ReceivingYards": 410}]
+    facts = facts_by_id([2], play, game, season)
+    assert facts[2].milestones == ("passed 100 receiving yards today", "passed 500 receiving yards this season")
+
+    # Already past the threshold before the play: nothing new
+    game = [{**WR, "Receptions": 7, "ReceivingYards": 130}]
+    assert facts_by_id([2], play, game)[2].milestones == ()
+
+def test_leaders():
+    play = (line(QB, PassingYards=12), line(WR, Receptions=1, ReceivingYards=12))
+    game = [
+        {**QB, "PassingYards": 150},
+        {**WR, "Receptions": 4, "ReceivingYards": 60},
+        {**RB, "RushingYards": 70, "Receptions": 5, "ReceivingYards": 20},
+        {"PlayerID": 5, "Name": "Travis Kelce", "Team": "KC", "Position": "TE", "Receptions": 6, "ReceivingYards": 55},
+    ]
+    facts = facts_by_id([1, 2], play, game)
+    assert facts[1].leads == ("leads the game in passing yards (150)",)
+    # Travis Kelce leads the game in receptions; Shakir leads BUF
+    assert facts[2].leads == ("leads the game in receiving yards (60)", "leads BUF in receptions (4)")
+
+def test_season_totals_exclude_rows_that_already_count_the_game():
+    play = (line(WR, Receptions=1, ReceivingYards=10, ReceivingTouchdowns=1),)
+    game = [{**WR, "Receptions": 5, "ReceivingYards": 50, "ReceivingTouchdowns": 1}]
+    # Nine games before this one, the season row already counts today's game up to the play
+    season = [{**WR, "SeasonType": 1, "Played": 10, "Receptions": 44, "ReceivingYards": 440, "ReceivingTouchdowns": 3}]
+    facts = facts_by_id([2], play, game, season, games_before={"BUF": 9})
+    assert facts[2].season == ("45 rec", "450 rec yds", "4 rec TD")
+    assert facts[2].milestones == ("1st receiving TD today, 4th of the season",)
+
+    # Without the schedule the season row is taken to exclude the game
+    facts = facts_by_id([2], play, game, season)
+    assert facts[2].season == ("49 rec", "490 rec yds", "4 rec TD")
+
+    season = [{**season[0], "Played": 9, "Receptions": 40, "ReceivingYards": 400, "ReceivingTouchdowns": 3}]
+    facts = facts_by_id([2], play, game, season, games_before={"BUF": 9})
+    assert facts[2].season == ("45 rec", "450 rec yds", "4 rec TD")
+
+def test_team_games_before():
+    schedule = [
+        {"ScoreID": 1, "SeasonType": 1, "Week": 1, "AwayTeam": "BUF", "HomeTeam": "MIA", "Status": "Final"},
+        {"ScoreID": 2, "SeasonType": 1, "Week": 2, "AwayTeam": "KC", "HomeTeam": "BUF", "Status": "F/OT"},
+        {"ScoreID": 3, "SeasonType": 1, "Week": 3, "AwayTeam": "BYE", "HomeTeam": "KC", "Status": "Scheduled"},
+        {"ScoreID": 4, "SeasonType": 1, "Week": 4, "AwayTeam": "BUF", "HomeTeam": "KC", "Status": "InProgress"},
+        {"ScoreID": 5, "SeasonType": 1, "Week": 5, "AwayTeam": "BUF", "HomeTeam": "NE", "Status": "Scheduled"},
+    ]
+    assert team_games_before(schedule, 4) == {"BUF": 2, "KC": 1}
+    assert team_games_before(schedule, 99) == {}
+    assert team_games_before(None, 4) == {}
@@ -0,0 +1,89 @@
+# Process-wide caches shared by all sessions
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from utils import metrics
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache. Lookups are recorded as `cache_lookups{cache=<name>}`
+    so hit rates show up in the debug metrics panel.
+
+    Parameters:
+        name (str): Cache name used in metrics.
+        max_entries (int): Entries kept before the least recently used one is evicted.
+    """
+
+    def __init__(self, name, max_entries=256):
+        self.name = name
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key, default=None):
+        with self.lock:
+            hit = key in self.entries
+            if hit:
+                self.entries.move_to_end(key)
+                value = self.entries[key]
+        metrics.record_cache_lookup(self.name, hit=hit)
+        return value if hit else default
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                metrics.increment("cache_evictions", cache=self.name)
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+class TTLCache(LRUCache):
+    """
+    LRUCache whose entries expire ttl_seconds after they were stored (expired lookups count as misses).
+
+    Parameters:
+        name (str): Cache name used in metrics.
+        max_entries (int): Entries kept before the least recently used one is evicted.
+        ttl_seconds (float): Seconds an entry stays valid.
+    """
+
+    def __init__(self, name, max_entries=256, ttl_seconds=300):
+        super().__init__(name, max_entries)
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            hit = entry is not None and entry[0] >= time.monotonic()
+            if hit:
+                self.entries.move_to_end(key)
+            elif entry is not None:
+                del self.entries[key]
+        metrics.record_cache_lookup(self.name, hit=hit)
+        return entry[1] if hit else default
+
+    def put(self, key, value, ttl_seconds=None):
+        super().put(key, (time.monotonic() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds), value))
+
+def content_hash(data):
+    """
+    Returns a hex digest identifying raw bytes (e.g. an uploaded image).
+    """
+    return hashlib.sha256(data).hexdigest()
+
+def roster_signature(players):
+    """
+    Returns a short digest of a {player name: PlayerID} roster, independent of ordering.
+    """
+    items = "\x1e".join(f"{name}\x1f{player_id}" for name, player_id in sorted(players.items(), key=lambda item: str(item[0])))
+    return hashlib.sha1(items.encode("utf-8")).hexdigest()[:12]
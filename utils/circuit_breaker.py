@@ -0,0 +1,115 @@
+# Per-endpoint circuit breakers for the upstream APIs: once an endpoint keeps failing, its requests
+# are skipped for a cool-down instead of every session waiting on it, then a single probe decides
+# whether it recovered
+
+import threading
+import time
+import requests
+import streamlit as st
+from utils import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+# Consecutive failures that open an endpoint's circuit
+FAILURE_THRESHOLD = 5
+# Seconds an open circuit skips requests before letting a probe through
+RESET_SECONDS = 30
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """
+    Raised instead of sending a request to an endpoint whose circuit is open. A RequestException,
+    so the fetchers' existing error handling covers it.
+    """
+
+    def __init__(self, endpoint, opened_at):
+        super().__init__(f"{endpoint} is unavailable after repeated failures; retrying shortly")
+        self.endpoint = endpoint
+        self.opened_at = opened_at
+
+class CircuitBreaker:
+    """
+    Circuit breaker of one upstream endpoint, shared by every session of the process.
+
+    Parameters:
+        name (str): Endpoint name used in metrics.
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_seconds (float): Seconds the circuit stays open before a probe request.
+    """
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, reset_seconds=RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+
+    def _transition(self, state):
+        self.state = state
+        metrics.increment("circuit_breaker_transitions", endpoint=self.name, state=state)
+
+    def before_request(self):
+        """
+        Raises CircuitOpenError if the request must be skipped. While half-open, only the first
+        caller gets through (the probe); the others are skipped until it finishes.
+        """
+        with self.lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self._transition(HALF_OPEN)
+                return
+        metrics.increment("upstream_requests", endpoint=self.name, outcome="short_circuited")
+        raise CircuitOpenError(self.name, self.opened_at)
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self._transition(OPEN)
+
+def is_upstream_failure(error):
+    """
+    Whether a request error says the endpoint is unhealthy (connection errors, timeouts, 5xx,
+    429, undecodable payloads) rather than rejecting this request (other 4xx).
+    """
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return isinstance(error, (requests.exceptions.RequestException, ValueError))
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def breaker_for(endpoint):
+    """
+    Returns the process-wide breaker of an endpoint, configured with `circuit_breaker` in
+    secrets.toml (failure_threshold, reset_seconds).
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            config = st.secrets.get("circuit_breaker", {})
+            breaker = CircuitBreaker(
+                endpoint,
+                failure_threshold=config.get("failure_threshold", FAILURE_THRESHOLD),
+                reset_seconds=config.get("reset_seconds", RESET_SECONDS),
+            )
+            _breakers[endpoint] = breaker
+        return breaker
+
+def breaker_states():
+    """
+    Returns {endpoint: state} for every endpoint requested so far.
+    """
+    with _breakers_lock:
+        return {endpoint: breaker.state for endpoint, breaker in _breakers.items()}
@@ -0,0 +1,95 @@
+# Running work on background threads that still have access to the Streamlit session
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+def _attach_context(ctx):
+    if ctx is not None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+def session_executor(max_workers):
+    """
+    Creates a thread pool whose workers carry the current script run context, so code running
+    on them can read st.secrets and st.session_state (Streamlit elements should still be
+    rendered from the script thread).
+
+    Parameters:
+        max_workers (int): Number of worker threads.
+
+    Returns:
+        ThreadPoolExecutor: The executor (use as a context manager).
+    """
+    return ThreadPoolExecutor(max_workers=max_workers, initializer=_attach_context, initargs=(get_script_run_ctx(),))
+
+# Shared pool for fire-and-forget work that outlives the call that submitted it
+BACKGROUND_WORKERS = 4
+_background_executor = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix="session-background")
+# Process-wide cap on concurrent LLM calls, shared by every session and game (multi-game
+# broadcasts and update rewrites queue here instead of each opening their own connections)
+LLM_WORKERS = 8
+_llm_executor = ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix="llm")
+
+def _submit(executor, function, args, kwargs):
+    ctx = get_script_run_ctx()
+
+    def run():
+        _attach_context(ctx)
+        return function(*args, **kwargs)
+
+    return executor.submit(run)
+
+def submit_in_session(function, *args, **kwargs):
+    """
+    Runs function on the shared background pool with the current script run context attached
+    (the context is attached per call, since pooled threads serve every session).
+
+    Returns:
+        Future: Resolves to the function's result.
+    """
+    return _submit(_background_executor, function, args, kwargs)
+
+def submit_llm_call(function, *args, **kwargs):
+    """
+    Like submit_in_session, on the bounded LLM pool (LLM_WORKERS calls at a time per process).
+
+    Returns:
+        Future: Resolves to the function's result.
+    """
+    return _submit(_llm_executor, function, args, kwargs)
+
+def map_concurrently(function, items, max_workers=4, timeout=None):
+    """
+    Applies function to every item on a session-aware thread pool.
+
+    Parameters:
+        function (callable): Called with each item.
+        items (iterable): The items.
+        max_workers (int): Number of worker threads.
+        timeout (float): Seconds to wait for the results (None: no limit). Calls still running
+                         then get a TimeoutError and finish in the background, unwaited.
+
+    Returns:
+        list: (result, exception) pairs in the order of items; exactly one of the two is None.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    def capture(item):
+        try:
+            return function(item), None
+        except Exception as e:
+            return None, e
+
+    if timeout is None:
+        if len(items) == 1:
+            return [capture(items[0])]
+        with session_executor(min(max_workers, len(items))) as executor:
+            return list(executor.map(capture, items))
+
+    executor = session_executor(min(max_workers, len(items)))
+    futures = [executor.submit(capture, item) for item in items]
+    done, _ = wait(futures, timeout=max(timeout, 0))
+    executor.shutdown(wait=False, cancel_futures=True)
+    return [future.result() if future in done else (None, TimeoutError(f"Not done after {timeout:.2f}s")) for future in futures]
@@ -0,0 +1,279 @@
+# Versioned game-state digest shared by the game summary and broadcast prompts
+
+import hashlib
+import json
+
+# Bump when the digest layout changes so caches keyed on it are invalidated
+DIGEST_SCHEMA_VERSION = 1
+
+# Stat categories for top performers: (label, yards field, touchdowns field)
+PERFORMER_STATS = (
+    ("passing", "PassingYards", "PassingTouchdowns"),
+    ("rushing", "RushingYards", "RushingTouchdowns"),
+    ("receiving", "ReceivingYards", "ReceivingTouchdowns"),
+)
+# Play types that don't belong to a possession (ignored when summarizing the current drive)
+NON_DRIVE_PLAY_TYPES = {"Timeout", "Period", "TwoMinuteWarning", "Official", "Kickoff"}
+# Schedule statuses of games whose stats count in the season stats
+COMPLETED_STATUSES = {"Final", "F/OT"}
+
+def game_status(score):
+    return (
+        "not started" if not score.get("HasStarted")
+        else "in progress" if score.get("IsInProgress")
+        else "over"
+    )
+
+def team_games_before(schedule, score_id):
+    """
+    Counts the games each team of a game completed earlier in its season (the most games its
+    players' season stats can hold without the game itself).
+
+    Parameters:
+        schedule (list): The season's schedulesbasic payload.
+        score_id (int): ScoreID of the game.
+
+    Returns:
+        dict: Team -> completed games before the game (empty if the game isn't in the schedule).
+    """
+    game = next((row for row in schedule or () if row.get("ScoreID") == score_id), None)
+    if game is None:
+        return {}
+    teams = (game.get("AwayTeam"), game.get("HomeTeam"))
+    earlier = {
+        row.get("ScoreID"): row for row in schedule
+        if row.get("Status") in COMPLETED_STATUSES and row.get("SeasonType") == game.get("SeasonType")
+        and (row.get("Week") or 0) < (game.get("Week") or 0)
+    }
+    return {team: sum(team in (row.get("AwayTeam"), row.get("HomeTeam")) for row in earlier.values()) for team in teams}
+
+def _score_by_quarter(score):
+    by_quarter = {}
+    for side in ("Away", "Home"):
+        points = [score.get(f"{side}ScoreQuarter{quarter}") for quarter in range(1, 5)]
+        if score.get(f"{side}ScoreOvertime"):
+            points.append(score.get(f"{side}ScoreOvertime"))
+        by_quarter[score.get(f"{side}Team")] = [value or 0 for value in points]
+    return by_quarter
+
+def _top_performers(player_games):
+    """
+    Returns the leading player of each team per stat category, best first.
+    """
+    performers = {}
+    for label, yards_field, touchdowns_field in PERFORMER_STATS:
+        best_by_team = {}
+        for player in player_games:
+            yards = player.get(yards_field) or 0
+            team = player.get("Team")
+            if yards > 0 and yards > (best_by_team.get(team, {}).get("Yards") or 0):
+                best_by_team[team] = {
+                    "PlayerID": player.get("PlayerID"),
+                    "Name": player.get("Name"),
+                    "Team": team,
+                    "Yards": yards,
+                    "Touchdowns": player.get(touchdowns_field) or 0,
+                }
+        if best_by_team:
+            performers[label] = sorted(best_by_team.values(), key=lambda entry: entry["Yards"], reverse=True)
+    return performers
+
+def _player_totals_from_plays(plays):
+    """
+    Sums the per-play player stats of the play-by-play into box-score-like player rows.
+    """
+    fields = [field for _, yards_field, touchdowns_field in PERFORMER_STATS for field in (yards_field, touchdowns_field)]
+    totals = {}
+    for play in plays:
+        for stat in play.get("PlayStats") or []:
+            player = totals.setdefault(stat.get("PlayerID"), {"PlayerID": stat.get("PlayerID"), "Name": stat.get("Name"), "Team": stat.get("Team")})
+            for field in fields:
+                if stat.get(field):
+                    player[field] = player.get(field, 0) + stat[field]
+    return list(totals.values())
+
+def _current_drive(plays):
+    drive = []
+    for play in reversed(plays):
+        if play.get("Type") in NON_DRIVE_PLAY_TYPES or not play.get("Team"):
+            if drive:
+                break
+            continue
+        if drive and play["Team"] != drive[-1]["Team"]:
+            break
+        drive.append(play)
+    if not drive:
+        return None
+    first_play = drive[-1]
+    return {
+        "Team": first_play["Team"],
+        "Plays": len(drive),
+        "Yards": sum(play.get("YardsGained") or 0 for play in drive),
+        "Start": f"{first_play.get('YardLineTerritory') or ''} {first_play.get('YardLine') or ''}".strip(),
+    }
+
+def build_game_digest(score, plays=None, player_games=None, scoring_plays=None):
+    """
+    Builds the game-state digest: score and score by quarter, clock, possession, timeouts left,
+    the current drive, scoring plays and top performers.
+
+    Parameters:
+        score (dict): The game's "Score" object.
+        plays (list): Play-by-play plays, if available (used for the drive, scoring plays and,
+                      without player_games, top performers).
+        player_games (list): Box score player rows, if available.
+        scoring_plays (list): Box score scoring plays, if available.
+
+    Returns:
+        dict: Digest with "SchemaVersion" and a content "Revision" downstream caches can key on
+              (e.g. the game summary cache, see llm_interface.summary_cache_key).
+    """
+    plays = sorted(plays or [], key=lambda play: play.get("Sequence") or 0)
+    if scoring_plays is None:
+        scoring_plays = [
+            {**(play.get("ScoringPlay") or {}), "Quarter": play.get("QuarterName")}
+            for play in plays if play.get("IsScoringPlay")
+        ]
+    if player_games is None:
+        player_games = _player_totals_from_plays(plays)
+    stadium = score.get("StadiumDetails") or {}
+    weather = ", ".join(
+        str(part) for part in (
+            score.get("ForecastDescription"),
+            f"{score['ForecastTempHigh']}F" if score.get("ForecastTempHigh") is not None else None,
+            f"wind {score['ForecastWindSpeed']} mph" if score.get("ForecastWindSpeed") is not None else None,
+        ) if part
+    )
+
+    digest = {
+        "ScoreID": score.get("ScoreID"),
+        "Status": game_status(score),
+        "AwayTeam": score.get("AwayTeam"),
+        "HomeTeam": score.get("HomeTeam"),
+        "AwayScore": score.get("AwayScore"),
+        "HomeScore": score.get("HomeScore"),
+        "Quarter": score.get("Quarter"),
+        "TimeRemaining": score.get("TimeRemaining"),
+        "Possession": score.get("Possession"),
+        "LastPlay": score.get("LastPlay"),
+        "Stadium": ", ".join(part for part in (stadium.get("Name"), stadium.get("City"), stadium.get("State")) if part),
+        "Weather": weather or None,
+        "ScoreByQuarter": _score_by_quarter(score),
+        "TimeoutsLeft": {score.get("AwayTeam"): score.get("AwayTimeouts"), score.get("HomeTeam"): score.get("HomeTimeouts")},
+        "CurrentDrive": _current_drive(plays),
+        "ScoringPlays": [
+            {
+                "ScoringPlayID": play.get("ScoringPlayID"),
+                "Quarter": play.get("Quarter"),
+                "Team": play.get("Team"),
+                "Description": play.get("Description"),
+            }
+            for play in scoring_plays
+        ],
+        "TopPerformers": _top_performers(player_games),
+    }
+    content = json.dumps(digest, sort_keys=True, default=str)
+    digest["SchemaVersion"] = DIGEST_SCHEMA_VERSION
+    digest["Revision"] = hashlib.sha1(content.encode("utf-8")).hexdigest()[:12]
+    return digest
+
+def digest_from_box_score(game_data):
+    """
+    Builds the digest from a box score (used by the game summary).
+    """
+    return build_game_digest(
+        game_data["Score"],
+        player_games=game_data.get("PlayerGames") or [],
+        scoring_plays=game_data.get("ScoringPlays") or [],
+    )
+
+def digest_from_play_by_play(play_data):
+    """
+    Builds the digest from play-by-play data (computed once per broadcast poll).
+    """
+    return build_game_digest(play_data["Score"], plays=play_data.get("Plays") or [])
+
+def format_game_digest(digest, max_scoring_plays=None):
+    """
+    Formats the digest as bullet points for the game summary and broadcast prompts.
+
+    Parameters:
+        digest (dict): Game-state digest.
+        max_scoring_plays (int): Only list the most recent scoring plays (default: all).
+    """
+    away, home = digest["AwayTeam"], digest["HomeTeam"]
+    lines = [
+        f"- **Teams**: {away} vs {home}",
+        f"- **Score**: {digest['AwayScore']} - {digest['HomeScore']}",
+        f"- **Score by Quarter**: {away} {digest['ScoreByQuarter'].get(away)}, {home} {digest['ScoreByQuarter'].get(home)}",
+        f"- **Quarter**: {digest['Quarter']}",
+        f"- **Time Remaining**: {digest['TimeRemaining']}",
+        f"- **Current Possession**: {digest['Possession']}",
+        f"- **Last Play**: {digest['LastPlay']}",
+        f"- **Timeouts Left**: {away} {digest['TimeoutsLeft'].get(away)}, {home} {digest['TimeoutsLeft'].get(home)}",
+    ]
+    drive = digest["CurrentDrive"]
+    if drive:
+        lines.append(f"- **Current Drive**: {drive['Team']}, {drive['Plays']} plays, {drive['Yards']} yards from the {drive['Start']}")
+    scoring_plays = digest["ScoringPlays"][-max_scoring_plays:] if max_scoring_plays else digest["ScoringPlays"]
+    for play in scoring_plays:
+        quarter = f"Q{play['Quarter']}, " if play["Quarter"] else ""
+        lines.append(f"- **Scoring Play** ({quarter}{play['Team']}): {play['Description']}")
+    for label, performers in digest["TopPerformers"].items():
+        leaders = "; ".join(f"{entry['Name']} ({entry['Team']}) {entry['Yards']} yds, {entry['Touchdowns']} TD" for entry in performers)
+        lines.append(f"- **Top {label.title()}**: {leaders}")
+    lines.append(f"- **Stadium**: {digest['Stadium']}")
+    if digest["Weather"]:
+        lines.append(f"- **Weather**: {digest['Weather']}")
+    return "\n".join(lines)
+
+def _leaders(digest):
+    return {label: performers[0] for label, performers in digest["TopPerformers"].items()}
+
+def diff_game_digests(previous, current):
+    """
+    Returns the material changes between two digests of the same game (clock-only changes
+    are not material).
+
+    Returns:
+        dict: Changed fields; empty when nothing material changed.
+    """
+    changes = {}
+    if previous["Status"] != current["Status"]:
+        changes["Status"] = current["Status"]
+    if (previous["AwayScore"], previous["HomeScore"]) != (current["AwayScore"], current["HomeScore"]):
+        changes["Score"] = {
+            "from": f"{previous['AwayTeam']} {previous['AwayScore']} - {previous['HomeTeam']} {previous['HomeScore']}",
+            "to": f"{current['AwayTeam']} {current['AwayScore']} - {current['HomeTeam']} {current['HomeScore']}",
+        }
+    if previous["Quarter"] != current["Quarter"]:
+        changes["Quarter"] = current["Quarter"]
+    seen = {play["ScoringPlayID"] for play in previous["ScoringPlays"]}
+    new_scoring_plays = [play for play in current["ScoringPlays"] if play["ScoringPlayID"] not in seen]
+    if new_scoring_plays:
+        changes["NewScoringPlays"] = new_scoring_plays
+    previous_leaders = _leaders(previous)
+    new_leaders = {
+        label: leader for label, leader in _leaders(current).items()
+        if previous_leaders.get(label, {}).get("PlayerID") != leader["PlayerID"]
+    }
+    if new_leaders:
+        changes["NewLeaders"] = new_leaders
+    return changes
+
+def format_game_changes(changes):
+    """
+    Formats digest changes as bullet points for the LLM prompt.
+    """
+    lines = []
+    if "Status" in changes:
+        lines.append(f"- **Game status**: now {changes['Status']}")
+    if "Score" in changes:
+        lines.append(f"- **Score**: {changes['Score']['from']} -> {changes['Score']['to']}")
+    if "Quarter" in changes:
+        lines.append(f"- **Quarter**: now {changes['Quarter']}")
+    for play in changes.get("NewScoringPlays", []):
+        lines.append(f"- **Scoring play** ({play['Team']}): {play['Description']}")
+    for label, leader in changes.get("NewLeaders", {}).items():
+        lines.append(f"- **New {label} leader**: {leader['Name']} ({leader['Team']}), {leader['Yards']} yards")
+    return "\n".join(lines)
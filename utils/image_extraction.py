@@ -0,0 +1,90 @@
+# Structured output of the image analysis call: the response schema, its validation and local repair
+# of slightly malformed responses (so a parse error never costs another vision call)
+
+import json
+import re
+from typing import Literal
+
+from pydantic import BaseModel, ValidationError, field_validator
+
+IMAGE_TYPES = ("bet slip", "fantasy roster", "other")
+
+class ImageExtraction(BaseModel):
+    """
+    What the vision model reads off an uploaded image.
+    """
+    players: list[str]
+    image_type: Literal["bet slip", "fantasy roster", "other"]
+    description: str
+
+    @field_validator("players", mode="before")
+    @classmethod
+    def _players_list(cls, value):
+        # A single name, or names separated by commas, instead of a list
+        if isinstance(value, str):
+            return [name.strip() for name in value.split(",") if name.strip()]
+        return [str(name) for name in value or []]
+
+    @field_validator("image_type", mode="before")
+    @classmethod
+    def _known_image_type(cls, value):
+        value = str(value or "").strip().lower().replace("_", " ").replace("-", " ")
+        return next((image_type for image_type in IMAGE_TYPES if image_type in value), "other")
+
+    def to_extraction(self):
+        return {"player_names": list(self.players), "image_type": self.image_type, "description": self.description}
+
+def image_extraction_schema():
+    """
+    Returns the response_format of the image analysis call (strict JSON schema mode).
+    """
+    schema = ImageExtraction.model_json_schema()
+    schema["additionalProperties"] = False
+    return {"type": "json_schema", "json_schema": {"name": "image_extraction", "strict": True, "schema": schema}}
+
+CODE_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+def _json_candidates(text):
+    """
+    Yields the response text and progressively repaired versions of it.
+    """
+    yield text
+    text = CODE_FENCE.sub("", text)
+    yield text
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        text = text[start : end + 1]
+        yield text
+    text = TRAILING_COMMA.sub(r"\1", text)
+    yield text
+    # Smart quotes from OCR'd text
+    yield text.replace("“", '"').replace("”", '"')
+
+def parse_image_extraction(text):
+    """
+    Validates an image analysis response against ImageExtraction, repairing what it can locally
+    (code fences, text around the object, trailing commas, smart quotes, a string of player
+    names, an unlisted image type).
+
+    Parameters:
+        text (str): The model's response content.
+
+    Returns:
+        tuple: (ImageExtraction, repaired (bool))
+
+    Raises:
+        ValueError: If no repair yields a valid extraction.
+    """
+    last_error = None
+    for attempt, candidate in enumerate(_json_candidates(text or "")):
+        try:
+            data = json.loads(candidate)
+        except json.JSONDecodeError as e:
+            last_error = e
+            continue
+        try:
+            return ImageExtraction.model_validate(data), attempt > 0
+        except ValidationError as e:
+            last_error = e
+    raise ValueError(f"Invalid image analysis response: {last_error}")
@@ -0,0 +1,122 @@
+# Preprocessing for uploaded images before they are sent to the vision model
+
+import io
+# Pillow is imported by the functions that use it, keeping it off the app's startup path
+
+# The vision API downsizes high-detail images to fit 2048x2048 and then to 768px on the
+# short side, so anything larger only costs upload bytes and latency
+MAX_LONG_EDGE = 2048
+MAX_SHORT_EDGE = 768
+# Images this small fit in a single low-detail tile (fixed, lowest token cost)
+LOW_DETAIL_EDGE = 512
+# Pixels differing from the border colour by less than this are treated as background
+CROP_TOLERANCE = 24
+CROP_PADDING = 8
+# Mean saturation (0-255) below which colour carries no information for OCR
+GRAYSCALE_SATURATION = 20
+# Images with at most this many distinct colours (screenshots, flat UI) are encoded as PNG
+PNG_MAX_COLORS = 4096
+JPEG_QUALITY = 85
+
+def _crop_to_content(image):
+    """
+    Crops uniform borders (e.g. the blank margins around a bet slip screenshot) using the
+    top-left pixel as the background colour.
+    """
+    from PIL import Image, ImageChops
+    rgb = image.convert("RGB")
+    background = Image.new("RGB", rgb.size, rgb.getpixel((0, 0)))
+    difference = ImageChops.difference(rgb, background).convert("L")
+    bbox = difference.point(lambda value: 255 if value > CROP_TOLERANCE else 0).getbbox()
+    if not bbox:
+        return image
+    left, top, right, bottom = bbox
+    bbox = (
+        max(left - CROP_PADDING, 0),
+        max(top - CROP_PADDING, 0),
+        min(right + CROP_PADDING, image.width),
+        min(bottom + CROP_PADDING, image.height),
+    )
+    return image.crop(bbox) if bbox != (0, 0, image.width, image.height) else image
+
+def _downscale(image):
+    from PIL import Image
+    long_edge, short_edge = max(image.size), min(image.size)
+    scale = min(MAX_LONG_EDGE / long_edge, MAX_SHORT_EDGE / short_edge, 1.0)
+    if scale >= 1.0:
+        return image
+    size = (max(round(image.width * scale), 1), max(round(image.height * scale), 1))
+    return image.resize(size, Image.LANCZOS)
+
+def _is_low_saturation(image):
+    saturation = image.convert("RGB").convert("HSV").getchannel("S")
+    histogram = saturation.histogram()
+    return sum(value * count for value, count in enumerate(histogram)) / max(sum(histogram), 1) < GRAYSCALE_SATURATION
+
+def preprocess_image(image_bytes, fallback_mime_type="image/png"):
+    """
+    Prepares an uploaded image for the vision model: applies the EXIF orientation, crops
+    uniform borders, caps the resolution at what the API actually uses, converts near
+    monochrome images to grayscale and re-encodes as PNG (flat screenshots) or JPEG (photos).
+
+    Parameters:
+        image_bytes (bytes): Raw bytes of the uploaded file.
+        fallback_mime_type (str): MIME type to report if the image cannot be decoded.
+
+    Returns:
+        dict: {"data": bytes, "mime_type": str, "detail": "low" | "high", "size": (width, height),
+               "original_bytes": int, "processed_bytes": int}
+    """
+    from PIL import Image, ImageOps
+    try:
+        original = Image.open(io.BytesIO(image_bytes))
+        image = ImageOps.exif_transpose(original)
+    except Exception:
+        # Not decodable by Pillow: send the upload as-is
+        return {
+            "data": image_bytes,
+            "mime_type": fallback_mime_type,
+            "detail": "high",
+            "size": None,
+            "original_bytes": len(image_bytes),
+            "processed_bytes": len(image_bytes),
+        }
+
+    if image.mode not in ("RGB", "L"):
+        # Flatten transparency onto white so cropping and JPEG encoding see the visible image
+        rgba = image.convert("RGBA")
+        image = Image.new("RGB", rgba.size, (255, 255, 255))
+        image.paste(rgba, mask=rgba.getchannel("A"))
+
+    image = _downscale(_crop_to_content(image))
+    if image.mode == "RGB" and _is_low_saturation(image):
+        image = image.convert("L")
+
+    buffer = io.BytesIO()
+    if image.getcolors(maxcolors=PNG_MAX_COLORS) is not None:
+        image.save(buffer, format="PNG", optimize=True)
+        mime_type = "image/png"
+    else:
+        image.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+        mime_type = "image/jpeg"
+    data = buffer.getvalue()
+
+    # Nothing was cropped or scaled and re-encoding didn't help: send the original upload
+    if len(data) >= len(image_bytes) and image.size == original.size and original.format in ("PNG", "JPEG"):
+        data = image_bytes
+        mime_type = Image.MIME[original.format]
+
+    return {
+        "data": data,
+        "mime_type": mime_type,
+        "detail": "low" if max(image.size) <= LOW_DETAIL_EDGE else "high",
+        "size": image.size,
+        "original_bytes": len(image_bytes),
+        "processed_bytes": len(data),
+    }
+
+def format_bytes(num_bytes):
+    for unit in ("B", "KB", "MB"):
+        if num_bytes < 1024 or unit == "MB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
@@ -0,0 +1,98 @@
+# Pluggable JSON decoding for upstream payloads: msgspec or orjson when installed, stdlib otherwise
+# (plus the compact encoding the caches store payloads in)
+
+import json
+from typing import Any, Optional
+import streamlit as st
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# In order of preference for `json.decoder = "auto"`
+OPTIONAL_DECODERS = (("msgspec", msgspec), ("orjson", orjson))
+
+# Compiled msgspec decoders per schema (schemas are module-level constants)
+_partial_decoders = {}
+
+def available_decoders():
+    return [name for name, module in OPTIONAL_DECODERS if module is not None] + ["stdlib"]
+
+def configured_decoder():
+    """
+    Returns the decoder set with `json.decoder` in secrets.toml ("auto" by default: the fastest
+    one installed). A configured decoder that isn't installed falls back to the fastest available.
+    """
+    name = st.secrets.get("json", {}).get("decoder", "auto")
+    available = available_decoders()
+    return name if name in available else available[0]
+
+def fields(*names):
+    """
+    Schema for an object keeping only the named fields (decoded as-is).
+    """
+    return {name: None for name in names}
+
+def _struct_type(schema, path="Payload"):
+    """
+    Translates a schema into msgspec types: objects become Structs with only the schema's
+    fields, so the decoder skips every other field without materializing it.
+    """
+    if schema is None:
+        return Any
+    if isinstance(schema, list):
+        return list[_struct_type(schema[0], path)]
+    struct = msgspec.defstruct(
+        path,
+        [(name, Optional[_struct_type(sub_schema, name)], None) for name, sub_schema in schema.items()],
+    )
+    return struct
+
+def _partial_decoder(schema):
+    compiled = _partial_decoders.get(id(schema))
+    if compiled is None or compiled[0] is not schema:
+        compiled = (schema, msgspec.json.Decoder(Optional[_struct_type(schema)]))
+        _partial_decoders[id(schema)] = compiled
+    return compiled[1]
+
+def decode_json(content, schema=None, decoder=None):
+    """
+    Decodes a JSON payload.
+
+    With msgspec, a schema enables partial decoding: only the fields it names are materialized
+    (fields it names but the payload lacks come back as None). Other decoders always decode the
+    whole payload. A schema is None (keep the value as decoded), a dict {field: schema} (an
+    object keeping only those fields) or a one-element list [schema] (an array of such values).
+
+    Parameters:
+        content (bytes): Raw response body.
+        schema: Optional schema of the fields the caller uses.
+        decoder (str): "msgspec", "orjson" or "stdlib" (default: configured_decoder()).
+
+    Returns:
+        Decoded payload (dicts and lists).
+    """
+    decoder = decoder or configured_decoder()
+    if decoder == "msgspec":
+        if schema is not None:
+            try:
+                return msgspec.to_builtins(_partial_decoder(schema).decode(content))
+            except msgspec.ValidationError:
+                # Unexpected shape (e.g. an error object): decode everything and let the caller handle it
+                pass
+        return msgspec.json.decode(content)
+    if decoder == "orjson":
+        return orjson.loads(content)
+    return json.loads(content)
+
+def encode_json(value):
+    """
+    Encodes a value as compact JSON bytes (orjson when installed), as the caches store it.
+    """
+    return orjson.dumps(value) if orjson is not None else json.dumps(value, separators=(",", ":")).encode("utf-8")
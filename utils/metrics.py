@@ -0,0 +1,244 @@
+# Lightweight process-wide instrumentation: counters and timers with Prometheus-style export
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Number of recent samples kept per timer for quantiles
+TIMER_WINDOW = 2048
+QUANTILES = (0.5, 0.95, 0.99)
+METRIC_PREFIX = "specta_"
+
+class MetricsRegistry:
+    """
+    Thread-safe registry of counters and timers keyed by metric name and labels.
+    Timers keep a rolling window of recent samples (for quantiles) plus an all-time sum and count.
+    """
+
+    def __init__(self, timer_window=TIMER_WINDOW):
+        self.timer_window = timer_window
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counters = {}
+            self.timers = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def increment(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            timer = self.timers.get(key)
+            if timer is None:
+                timer = self.timers[key] = {"samples": deque(maxlen=self.timer_window), "sum": 0.0, "count": 0}
+            timer["samples"].append(seconds)
+            timer["sum"] += seconds
+            timer["count"] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counter_value(self, name, **labels):
+        with self.lock:
+            return self.counters.get(self._key(name, labels), 0)
+
+    def samples(self, name, **labels):
+        with self.lock:
+            timer = self.timers.get(self._key(name, labels))
+            return list(timer["samples"]) if timer else []
+
+    def counter_entries(self, name):
+        """
+        Returns [(labels dict, value)] for every label set of a counter.
+        """
+        with self.lock:
+            return [(dict(labels), value) for (metric, labels), value in self.counters.items() if metric == name]
+
+    def counters_by_label(self, name, label):
+        """
+        Sums a counter over all label sets, grouped by one label.
+
+        Returns:
+            dict: {label value: total}
+        """
+        totals = {}
+        for labels, value in self.counter_entries(name):
+            group = labels.get(label)
+            totals[group] = totals.get(group, 0) + value
+        return totals
+
+    def timer_summaries(self, name):
+        """
+        Returns {labels: {"count", "sum", "p50", "p95", "p99"}} for every label set of a timer.
+        """
+        summaries = {}
+        with self.lock:
+            items = [(labels, dict(timer), list(timer["samples"])) for (metric, labels), timer in self.timers.items() if metric == name]
+        for labels, timer, samples in items:
+            summary = {"count": timer["count"], "sum": timer["sum"]}
+            for quantile in QUANTILES:
+                summary[f"p{int(quantile * 100)}"] = _quantile(samples, quantile)
+            summaries[labels] = summary
+        return summaries
+
+    def render_prometheus(self):
+        """
+        Renders all metrics in the Prometheus text exposition format.
+        Counters are exported as `<name>_total`, timers as summaries in seconds.
+        """
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            timers = sorted((key, dict(timer), list(timer["samples"])) for key, timer in self.timers.items())
+
+        declared = set()
+        for (name, labels), value in counters:
+            metric = f"{METRIC_PREFIX}{name}_total"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+        for (name, labels), timer, samples in timers:
+            metric = f"{METRIC_PREFIX}{name}"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} summary")
+                declared.add(metric)
+            for quantile in QUANTILES:
+                value = _quantile(samples, quantile)
+                lines.append(f"{metric}{_format_labels(labels + (('quantile', str(quantile)),))} {value if value is not None else 'NaN'}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {timer['sum']}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {timer['count']}")
+        return "\n".join(lines) + "\n"
+
+def _quantile(samples, quantile):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * quantile
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = ",".join(f'{key}="{value.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for key, value in labels)
+    return "{" + escaped + "}"
+
+# Process-wide registry shared by all sessions
+REGISTRY = MetricsRegistry()
+
+def increment(name, value=1, **labels):
+    REGISTRY.increment(name, value, **labels)
+
+def observe(name, seconds, **labels):
+    REGISTRY.observe(name, seconds, **labels)
+
+def timer(name, **labels):
+    """
+    Context manager timing the enclosed block into the named timer.
+
+    Example:
+        with metrics.timer("broadcast_stage_seconds", stage="render"):
+            ...
+    """
+    return REGISTRY.timer(name, **labels)
+
+def record_cache_lookup(cache, hit):
+    increment("cache_lookups", cache=cache, result="hit" if hit else "miss")
+
+def record_llm_usage(call, usage):
+    """
+    Records token usage from the `usage` block of a chat completion.
+
+    Parameters:
+        call (str): Which LLM call the usage belongs to (e.g. "broadcast").
+        usage: The completion's usage object (may be None).
+    """
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    increment("llm_tokens", usage.prompt_tokens or 0, call=call, kind="prompt")
+    increment("llm_tokens", usage.completion_tokens or 0, call=call, kind="completion")
+    increment("llm_tokens", (getattr(details, "cached_tokens", 0) or 0) if details else 0, call=call, kind="cached")
+
+def cache_hit_rates():
+    """
+    Returns {cache: (hits, misses, hit_rate)} from the recorded cache lookups.
+    """
+    rates = {}
+    for labels, value in REGISTRY.counter_entries("cache_lookups"):
+        hits, misses = rates.get(labels["cache"], (0, 0))
+        if labels["result"] == "hit":
+            hits += value
+        else:
+            misses += value
+        rates[labels["cache"]] = (hits, misses)
+    return {cache: (hits, misses, hits / (hits + misses)) for cache, (hits, misses) in rates.items()}
+
+def error_rates(name):
+    """
+    Returns {group: (errors, total, error_rate)} for a request counter labelled with `outcome`,
+    grouped by its first non-outcome label (e.g. endpoint or call).
+    """
+    totals = {}
+    for labels, value in REGISTRY.counter_entries(name):
+        group = next((v for k, v in sorted(labels.items()) if k != "outcome"), "")
+        errors, total = totals.get(group, (0, 0))
+        totals[group] = (errors + (value if labels.get("outcome") == "error" else 0), total + value)
+    return {group: (errors, total, errors / total if total else 0.0) for group, (errors, total) in totals.items()}
+
+def write_metrics_file(path):
+    """
+    Writes the Prometheus text export to a file (atomically, so scrapers never read a partial file).
+    """
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as file:
+        file.write(REGISTRY.render_prometheus())
+    os.replace(temp_path, path)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = REGISTRY.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """
+    Serves the Prometheus text export at http://<host>:<port>/metrics on a background thread.
+
+    Returns:
+        ThreadingHTTPServer: The running server.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
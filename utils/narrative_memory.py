@@ -0,0 +1,105 @@
+# Bounded per-session memory of what earlier broadcast updates already covered
+
+import re
+from collections import deque
+
+# Approximate token budget of the rendered memory (~4 characters per token)
+NARRATIVE_MEMORY_TOKENS = 200
+CHARS_PER_TOKEN = 4
+# Entries kept per section before the oldest are dropped
+MAX_STORYLINES = 6
+MAX_STATS = 12
+MAX_ODDS = 5
+MAX_ENTRY_CHARS = 110
+
+STAT_PATTERN = re.compile(
+    r"\d[\d,.]*(?:st|nd|rd|th)?\+?\s*(?:-\s*)?(?:total\s+|receiving\s+|rushing\s+|passing\s+|scrimmage\s+)?"
+    r"(?:yards?|yds|touchdowns?|tds?|receptions?|catch(?:es)?|carries|completions?|attempts|"
+    r"interceptions?|sacks?|tackles|targets|fantasy points|points)\b",
+    re.IGNORECASE,
+)
+ODDS_PATTERN = re.compile(r"(?<![\w.])[+-]\d{3,4}\b")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+MARKDOWN = re.compile(r"<[^>]+>|[*_`#⭐]")
+
+def _clip(text):
+    text = " ".join(text.split())
+    return text if len(text) <= MAX_ENTRY_CHARS else text[: MAX_ENTRY_CHARS - 1].rstrip() + "…"
+
+def _nearest_player(sentence, position, player_names):
+    """
+    Returns the player whose name (or last name) is mentioned closest before position.
+    """
+    nearest, nearest_at = None, -1
+    for name in player_names:
+        for alias in (name, name.split()[-1]):
+            at = sentence.rfind(alias, 0, position)
+            if at > nearest_at:
+                nearest, nearest_at = name, at
+    return nearest
+
+def _remember(entries, entry):
+    # Re-mentioning something moves it to the most recent position
+    if entry in entries:
+        entries.remove(entry)
+    entries.append(entry)
+
+class NarrativeMemory:
+    """
+    Compact record of storylines already told, stats already cited and odds already reported
+    during a broadcast. It is updated from each generated update (no extra LLM calls) and
+    rendered into a fixed token budget for the next prompt, so the model can avoid repeating
+    itself without being sent the whole transcript.
+
+    Parameters:
+        token_budget (int): Approximate token budget of the rendered memory.
+    """
+
+    def __init__(self, token_budget=NARRATIVE_MEMORY_TOKENS):
+        self.token_budget = token_budget
+        self.storylines = deque(maxlen=MAX_STORYLINES)
+        self.stats = deque(maxlen=MAX_STATS)
+        self.odds = deque(maxlen=MAX_ODDS)
+
+    def update(self, broadcast_content, player_names=(), sportsbooks=()):
+        """
+        Records what a generated broadcast update covered.
+
+        Parameters:
+            broadcast_content (str): Text generated for the update.
+            player_names (iterable): Names of players in the play context, used to attribute stats.
+            sportsbooks (iterable): Sportsbook names in the play context, used to spot odds mentions.
+        """
+        sentences = [sentence.strip() for sentence in SENTENCE_SPLIT.split(MARKDOWN.sub("", broadcast_content)) if sentence.strip()]
+        if not sentences:
+            return
+        _remember(self.storylines, _clip(sentences[0]))
+
+        player_names = [name for name in player_names if name]
+        sportsbooks = [book for book in sportsbooks if book]
+        for sentence in sentences:
+            for match in STAT_PATTERN.finditer(sentence):
+                player = _nearest_player(sentence, match.start(), player_names)
+                _remember(self.stats, _clip(f"{player}: {match.group(0)}" if player else match.group(0)))
+            if ODDS_PATTERN.search(sentence) or any(book in sentence for book in sportsbooks):
+                _remember(self.odds, _clip(sentence))
+
+    def render(self):
+        """
+        Renders the memory within the token budget, dropping the oldest entries first.
+
+        Returns:
+            str: Compact text for the prompt ("None yet." when empty).
+        """
+        sections = [
+            ("Storylines already told", list(self.storylines)),
+            ("Stats already cited", list(self.stats)),
+            ("Odds already reported", list(self.odds)),
+        ]
+        while True:
+            text = "\n".join(f"- {title}: " + " | ".join(entries) for title, entries in sections if entries)
+            if len(text) <= self.token_budget * CHARS_PER_TOKEN:
+                return text or "None yet."
+            # Trim the oldest entry of the longest section
+            longest = max(sections, key=lambda section: len(" | ".join(section[1])))
+            longest[1].pop(0)
@@ -1,10 +1,18 @@
-from pydantic import BaseModel, Field
-from typing import Any, Dict, Optional
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from utils.records import BettingOdds, PlayerStatFacts, PlayRecord
 
-class PlayContext(BaseModel):
-    game_info: Dict[str, Any] = Field(..., description="Information about the game")
-    play_info: Dict[str, Any] = Field(..., description="Details of the current play")
-    player_box_scores: Optional[Dict[str, Any]] = Field(None, description="Game stats for players involved in the play")
-    player_season_stats: Optional[Dict[str, Any]] = Field(None, description="Season stats for players involved in the play")
-    betting_odds: Optional[Dict[str, Any]] = Field(None, description="Live betting odds and props")
-    preferences: Optional[Dict[str, Any]] = Field(None, description="User preferences for broadcast customization")
+@dataclass(slots=True)
+class PlayContext:
+    # Information about the game (game-state digest, see utils/game_state.py)
+    game_info: Dict[str, Any]
+    # Details of the current play
+    play_info: PlayRecord
+    # Stat facts of the players involved in the play (see utils/stats_engine.py)
+    player_stats: Tuple[PlayerStatFacts, ...] = ()
+    # Live betting odds and props
+    betting_odds: Optional[BettingOdds] = None
+    # User preferences for broadcast customization
+    preferences: Optional[Dict[str, Any]] = None
+    # What earlier updates in the broadcast already covered
+    broadcast_memory: Optional[str] = None
@@ -1,5 +1,7 @@
 # Helper functions preparing play context attributes
 
+from utils.records import BettingOdds, GameOdds, PlayerProp
+
 def prepare_user_preferences(priority_players, tone, image_results):
     return {
         "priority_players": priority_players,
@@ -13,18 +15,8 @@ def prepare_game_info(game_key, game_data):
         "game_data": game_data,
     }
 
-def prepare_player_season_stats(season_stats):
-    return {
-        "player_season_stats": season_stats,
-    }
-
-def prepare_player_box_scores(box_scores):
-    return {
-        "player_box_scores": box_scores,
-    }
-
 def prepare_betting_odds(in_game_betting_odds, player_props):
-    return {
-        "in_game_betting_odds": in_game_betting_odds,
-        "player_props": player_props,
-    }
+    return BettingOdds(
+        game_odds=tuple(GameOdds.from_api(odds) for odds in in_game_betting_odds or []),
+        player_props=tuple(PlayerProp.from_api(prop) for prop in player_props or []),
+    )
@@ -0,0 +1,105 @@
+# Rule-based play importance tiers deciding how much work each broadcast update gets
+
+import re
+
+# No LLM call: the update is rendered from the play-by-play fields
+TIER_TEMPLATE = "template"
+# Short LLM update with the player box scores only
+TIER_SHORT = "short"
+# Full context (box scores, season stats, props, odds) and a full-length update
+TIER_FULL = "full"
+TIERS = (TIER_TEMPLATE, TIER_SHORT, TIER_FULL)
+
+# Stoppages and administrative plays
+TEMPLATE_PLAY_TYPES = {"Timeout", "Period", "TwoMinuteWarning", "Official", "Kneel", "Spike"}
+# A timeout only when the play is one ("Timeout #2 by KC ..."), not a play run after one
+TEMPLATE_DESCRIPTION = re.compile(
+    r"^\s*timeout\b|\b(kneels|spiked? the ball|end of (?:quarter|half|game)|two-minute warning)\b", re.IGNORECASE
+)
+# Plays that change possession or the scoreboard
+BIG_PLAY_TYPES = {"PassIntercepted", "Interception", "Fumble", "FumbleLost", "FieldGoal", "Safety", "BlockedKick", "Sack"}
+BIG_PLAY_DESCRIPTION = re.compile(r"\b(intercepted|fumbles|touchdown|safety|blocked|field goal is good)\b", re.IGNORECASE)
+BIG_GAIN_YARDS = 20
+
+ROUTINE_PLAY_INSTRUCTIONS = (
+    "This is a routine play: keep the update to one or two short sentences about what happened."
+)
+
+def classify_play(play, involved_player_ids=(), priority_player_ids=()):
+    """
+    Tiers a play by importance from its play-by-play fields.
+
+    - full: scoring plays, turnovers, sacks, kicks that score or are blocked, gains of
+      BIG_GAIN_YARDS or more, third/fourth-down conversions and stops, and any play
+      involving a priority player (selected or from an uploaded image)
+    - template: timeouts, quarter ends, two-minute warnings, kneels, spikes, incomplete passes
+      on early downs, and penalties other than big-yardage or third/fourth-down ones
+    - short: everything else (routine runs and passes, punts, kickoffs)
+
+    Parameters:
+        play (PlayRecord): The play.
+        involved_player_ids (iterable): PlayerIDs involved in the play.
+        priority_player_ids (iterable): PlayerIDs the user prioritized.
+
+    Returns:
+        str: TIER_TEMPLATE, TIER_SHORT or TIER_FULL.
+    """
+    description = play.description
+    play_type = play.type
+
+    if play.is_scoring_play or play_type in BIG_PLAY_TYPES or BIG_PLAY_DESCRIPTION.search(description):
+        return TIER_FULL
+    if set(involved_player_ids) & set(priority_player_ids):
+        return TIER_FULL
+    if play_type in TEMPLATE_PLAY_TYPES or TEMPLATE_DESCRIPTION.search(description):
+        return TIER_TEMPLATE
+    if play_type == "PassIncomplete" and play.down not in (3, 4):
+        return TIER_TEMPLATE
+    if play_type == "Kickoff":
+        return TIER_SHORT
+    if abs(play.yards_gained) >= BIG_GAIN_YARDS:
+        return TIER_FULL
+    if play.down in (3, 4) and play_type not in ("Punt", "FieldGoal", "ExtraPoint"):
+        # Conversions and stops on the money downs both matter
+        return TIER_FULL
+    if play_type == "Penalty":
+        return TIER_TEMPLATE
+    return TIER_SHORT
+
+# Cross-game ranking (multi-game mode): points per tier plus bonuses for what makes a play worth
+# cutting to, like a RedZone channel would
+TIER_RANK = {TIER_TEMPLATE: 0, TIER_SHORT: 10, TIER_FULL: 40}
+RANK_BONUSES = {"scoring": 50, "priority_player": 30, "red_zone": 20, "close_late": 15, "big_gain": 10}
+RED_ZONE_YARDS = 20
+CLOSE_GAME_POINTS = 8
+LATE_QUARTERS = {"4", "OT"}
+
+def rank_play(play, tier, game_info, involved_player_ids=(), priority_player_ids=()):
+    """
+    Scores a play for ordering updates across games (higher first): its tier, plus bonuses for
+    scoring, priority players, snaps in the red zone, one-score games in the fourth quarter or
+    overtime, and big gains.
+
+    Parameters:
+        play (PlayRecord): The play.
+        tier (str): The play's tier (see classify_play).
+        game_info (dict): Game-state digest of the play's game (see utils/game_state.py).
+        involved_player_ids (iterable): PlayerIDs involved in the play.
+        priority_player_ids (iterable): PlayerIDs the user prioritized.
+
+    Returns:
+        int: The play's rank.
+    """
+    rank = TIER_RANK[tier]
+    if play.is_scoring_play:
+        rank += RANK_BONUSES["scoring"]
+    if set(involved_player_ids) & set(priority_player_ids):
+        rank += RANK_BONUSES["priority_player"]
+    if play.yard_line is not None and play.yard_line <= RED_ZONE_YARDS and play.yard_line_territory == play.opponent:
+        rank += RANK_BONUSES["red_zone"]
+    margin = abs((game_info.get("AwayScore") or 0) - (game_info.get("HomeScore") or 0))
+    if str(game_info.get("Quarter")) in LATE_QUARTERS and margin <= CLOSE_GAME_POINTS:
+        rank += RANK_BONUSES["close_late"]
+    if abs(play.yards_gained) >= BIG_GAIN_YARDS:
+        rank += RANK_BONUSES["big_gain"]
+    return rank
@@ -0,0 +1,88 @@
+# Deterministic broadcast sentences for common play types (no LLM call)
+
+import re
+
+ORDINALS = {1: "first", 2: "second", 3: "third", 4: "fourth"}
+QUARTER_NAMES = {"1": "1st quarter", "2": "1st half", "3": "3rd quarter", "4": "4th quarter", "OT": "overtime"}
+
+PENALTY_PATTERN = re.compile(
+    r"PENALTY on (?P<team>[A-Z]{2,3})(?:-(?P<player>[^,]+))?,\s*(?P<foul>[^,]+),\s*(?P<yards>\d+) yards?",
+    re.IGNORECASE,
+)
+TIMEOUT_PATTERN = re.compile(r"Timeout #(?P<number>\d) by (?P<team>[A-Z]{2,3})", re.IGNORECASE)
+INCOMPLETE_PATTERN = re.compile(
+    r"^(?P<passer>.+?) pass incomplete(?: (?P<direction>(?:short|deep) (?:left|middle|right)))?(?: intended for (?P<target>.+?))?\.?$",
+    re.IGNORECASE,
+)
+
+def _score_line(game_info):
+    return f"{game_info['AwayTeam']} {game_info['AwayScore']}, {game_info['HomeTeam']} {game_info['HomeScore']}"
+
+def _penalty(play, game_info):
+    match = PENALTY_PATTERN.search(play.description)
+    if not match:
+        return None
+    offender = f" ({match['player'].strip()})" if match["player"] else ""
+    declined = " The penalty is declined." if "declined" in play.description.lower() else ""
+    return f"Flag on the field: {match['foul'].strip().lower()} on {match['team']}{offender}, {match['yards']} yards.{declined}"
+
+def _timeout(play, game_info):
+    match = TIMEOUT_PATTERN.search(play.description)
+    team = match["team"] if match else play.team
+    if not team:
+        return "Timeout on the field."
+    remaining = (game_info.get("TimeoutsLeft") or {}).get(team)
+    number = ORDINALS.get(int(match["number"]), match["number"]) if match else None
+    sentence = f"{team} calls its {number} timeout of the half." if number else f"{team} calls timeout."
+    if remaining is not None:
+        sentence += f" {remaining} left." if remaining else " That's their last one."
+    return sentence
+
+def _period(play, game_info):
+    quarter = str(play.quarter or game_info.get("Quarter") or "")
+    period = QUARTER_NAMES.get(quarter, f"quarter {quarter}" if quarter else "the period")
+    return f"That's the end of the {period}. {_score_line(game_info)}."
+
+def _two_minute_warning(play, game_info):
+    return f"Two-minute warning. {_score_line(game_info)}."
+
+def _incomplete(play, game_info):
+    match = INCOMPLETE_PATTERN.match(play.description.strip())
+    if not match:
+        return None
+    target = f" for {match['target']}" if match["target"] else ""
+    direction = f" {match['direction'].lower()}" if match["direction"] else ""
+    return f"{match['passer']}'s pass{direction}{target} falls incomplete."
+
+def _kneel(play, game_info):
+    return f"The quarterback takes a knee. {_score_line(game_info)}."
+
+def _spike(play, game_info):
+    return "The quarterback spikes it to stop the clock."
+
+TEMPLATES = {
+    "Penalty": _penalty,
+    "Timeout": _timeout,
+    "Period": _period,
+    "TwoMinuteWarning": _two_minute_warning,
+    "PassIncomplete": _incomplete,
+    "Kneel": _kneel,
+    "Spike": _spike,
+}
+
+def render_play_template(play, game_info):
+    """
+    Renders a natural one-sentence update for common play types from the play-by-play fields.
+
+    Parameters:
+        play (PlayRecord): The play.
+        game_info (dict): Game-state digest (see utils/game_state.py).
+
+    Returns:
+        str: The update, falling back to the play description when the play type has no
+             template or its description doesn't have the expected shape. A combined play
+             (budget batching) is preceded by the descriptions of the plays it stands for.
+    """
+    template = TEMPLATES.get(play.type)
+    sentence = template(play, game_info) if template else None
+    return " ".join(filter(None, (*play.preceding_plays, sentence or play.description)))
@@ -0,0 +1,123 @@
+# Local fuzzy matching of player names read from images against the game rosters
+
+import difflib
+import re
+import unicodedata
+
+NAME_SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "v"}
+# Minimum similarity for a misspelled name to match a roster name
+FUZZY_CUTOFF = 0.85
+
+# Common given-name nicknames mapped to a canonical form (both sides normalize to the same key)
+NICKNAMES = {
+    "alex": "alexander", "andy": "andrew", "ben": "benjamin", "bob": "robert", "bobby": "robert",
+    "cam": "cameron", "chris": "christopher", "dan": "daniel", "danny": "daniel", "dave": "david",
+    "drew": "andrew", "ed": "edward", "eddie": "edward", "gabe": "gabriel", "greg": "gregory",
+    "jake": "jacob", "jim": "james", "jimmy": "james", "joe": "joseph", "joey": "joseph",
+    "jon": "jonathan", "josh": "joshua", "ken": "kenneth", "kenny": "kenneth", "matt": "matthew",
+    "mike": "michael", "nate": "nathan", "nick": "nicholas", "pat": "patrick", "rob": "robert",
+    "sam": "samuel", "steve": "stephen", "steven": "stephen", "ted": "theodore", "tom": "thomas",
+    "tommy": "thomas", "tony": "anthony", "will": "william", "zach": "zachary", "zack": "zachary",
+}
+
+def normalize_name(name):
+    """
+    Normalizes a player name for matching: strips accents, punctuation, parenthesized
+    qualifiers (team/position) and suffixes, lowercases, and handles "Last, First".
+
+    Returns:
+        list: Name tokens, e.g. "Patrick Mahomes II (KC)" -> ["patrick", "mahomes"]
+    """
+    name = re.sub(r"\(.*?\)", " ", name)
+    if name.count(",") == 1:
+        last, first = name.split(",")
+        name = f"{first} {last}"
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii").lower()
+    name = name.replace(".", " ").replace("'", "").replace("-", " ")
+    tokens = [token for token in re.split(r"[^a-z]+", name) if token]
+    while len(tokens) > 1 and tokens[-1] in NAME_SUFFIXES:
+        tokens.pop()
+    return tokens
+
+def _canonical_first(token):
+    return NICKNAMES.get(token, token)
+
+class RosterIndex:
+    """
+    Index of roster names supporting exact, nickname, initial + last name, unique last name
+    and fuzzy (misspelling) lookups.
+
+    Parameters:
+        players (dict): Roster with player names as keys and PlayerIDs as values.
+    """
+
+    def __init__(self, players):
+        self.players = players
+        self.by_full = {}
+        self.by_canonical = {}
+        self.by_initial = {}
+        self.by_last = {}
+        for roster_name in players:
+            tokens = normalize_name(roster_name)
+            if not tokens:
+                continue
+            first, last = tokens[0], tokens[-1]
+            self.by_full.setdefault(" ".join(tokens), set()).add(roster_name)
+            self.by_canonical.setdefault(f"{_canonical_first(first)} {last}", set()).add(roster_name)
+            self.by_initial.setdefault(f"{first[0]} {last}", set()).add(roster_name)
+            self.by_last.setdefault(last, set()).add(roster_name)
+
+    @staticmethod
+    def _unique(candidates):
+        return next(iter(candidates)) if candidates and len(candidates) == 1 else None
+
+    def match(self, name):
+        """
+        Returns the roster name matching a name read from an image, or None if there is no
+        unambiguous match.
+        """
+        tokens = normalize_name(name)
+        if not tokens:
+            return None
+        first, last = tokens[0], tokens[-1]
+        if len(tokens) == 1:
+            return self._unique(self.by_last.get(last))
+
+        for candidates in (
+            self.by_full.get(" ".join(tokens)),
+            self.by_canonical.get(f"{_canonical_first(first)} {last}"),
+            self.by_initial.get(f"{first[0]} {last}") if len(first) == 1 else None,
+        ):
+            if candidates:
+                return self._unique(candidates)
+
+        # Misspellings: closest full name, then closest last name when the first name agrees
+        close = difflib.get_close_matches(" ".join(tokens), self.by_full, n=2, cutoff=FUZZY_CUTOFF)
+        if close:
+            return self._unique(self.by_full[close[0]])
+        for close_last in difflib.get_close_matches(last, self.by_last, n=1, cutoff=FUZZY_CUTOFF):
+            candidates = {
+                roster_name for roster_name in self.by_last[close_last]
+                if normalize_name(roster_name)[0][0] == first[0]
+            }
+            return self._unique(candidates)
+        return None
+
+def match_players(names, players):
+    """
+    Matches player names read from an image against the roster.
+
+    Parameters:
+        names (list): Raw player names returned by the vision model.
+        players (dict): Roster with player names as keys and PlayerIDs as values.
+
+    Returns:
+        dict: Matched players with roster names as keys and PlayerIDs as values.
+    """
+    index = RosterIndex(players)
+    matched = {}
+    for name in names:
+        roster_name = index.match(name)
+        if roster_name is not None:
+            matched[roster_name] = players[roster_name]
+    return matched
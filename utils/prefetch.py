@@ -0,0 +1,58 @@
+# Uses the idle wait between play-by-play polls to fetch what the next play will need
+
+from functools import partial
+from sports_data import (
+    LIVE_ENDPOINTS,
+    fetch_live_snapshot,
+    fetch_season_stats,
+    fetch_team_players,
+    store_live_snapshot
+)
+from llm_interface import broadcast_prompt_prefix
+from utils import metrics
+from utils.concurrency import map_concurrently
+
+# Concurrent requests made by one prefetch
+PREFETCH_WORKERS = 4
+
+def prefetch_next_play(score_id, season_code, game_data, as_of_sequence=None, timeout=None):
+    """
+    Speculatively prepares the next play's context while the broadcast waits for it, so that
+    only the play-by-play fetch, the play-specific work and the LLM call are left on its
+    critical path:
+    - refreshes the session's box score, odds and props snapshots
+    - warms the shared season stats and roster caches (both teams' players)
+    - pre-renders the static part of the broadcast prompt
+
+    A failed task, or one still running after timeout (it then finishes in the background and
+    only warms the shared caches), is only counted: the next play fetches that data on demand
+    instead.
+
+    Parameters:
+        score_id (int): The ScoreID of the game.
+        season_code (str): Season code used for season stats.
+        game_data (dict): Game-state digest of the latest poll (see utils/game_state.py).
+        as_of_sequence (int): Latest play sequence of the game; the snapshots predate any later play.
+        timeout (float): Seconds the prefetch may take (None: no limit).
+
+    Returns:
+        None
+    """
+    tasks = [("live_snapshot", endpoint, partial(fetch_live_snapshot, endpoint, score_id)) for endpoint in LIVE_ENDPOINTS]
+    tasks.append(("season_stats", season_code, partial(fetch_season_stats, season_code)))
+    tasks.extend(
+        ("roster", team, partial(fetch_team_players, team))
+        for team in (game_data.get("AwayTeam"), game_data.get("HomeTeam")) if team
+    )
+
+    results = map_concurrently(lambda task: task[2](), tasks, max_workers=PREFETCH_WORKERS, timeout=timeout)
+    for (kind, key, _), (payload, error) in zip(tasks, results):
+        if error is not None:
+            metrics.increment("prefetch_tasks", task=kind, outcome="timeout" if isinstance(error, TimeoutError) else "error")
+            continue
+        if kind == "live_snapshot":
+            # Session state is only written from the script thread
+            store_live_snapshot(key, score_id, payload, as_of_sequence)
+        metrics.increment("prefetch_tasks", task=kind, outcome="ok")
+
+    broadcast_prompt_prefix()
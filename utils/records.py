@@ -0,0 +1,276 @@
+# Compact typed records for the play, player and odds data a broadcast update uses, parsed once
+# from the SportsDataIO JSON, with a fast serializer for the LLM prompt
+
+from dataclasses import dataclass, fields
+from operator import attrgetter
+
+ORDINAL_DOWNS = {1: "1st", 2: "2nd", 3: "3rd", 4: "4th"}
+# API field names that don't follow the snake_case -> PascalCase convention
+API_NAME_OVERRIDES = {"fantasy_points_ppr": "FantasyPointsPPR"}
+
+def api_name(field_name):
+    """
+    Returns the SportsDataIO field name of a record attribute (e.g. passing_yards -> PassingYards).
+    """
+    return API_NAME_OVERRIDES.get(field_name) or "".join(part.title() for part in field_name.split("_"))
+
+# Numbers are formatted with "g" so whole floats read as integers (12.0 -> 12); stats and odds
+# stay well below the 6 significant digits where it would switch to exponent notation
+
+@dataclass(slots=True)
+class StatLine:
+    """
+    One player's stats: a play's stat line, the player's box score or their season stats.
+    Only the stats the broadcast uses are kept; missing stats are 0.
+    """
+    player_id: int
+    name: str
+    team: str | None = None
+    position: str | None = None
+    season: int | None = None
+    season_type: int | None = None
+    played: int = 0
+    started: int = 0
+    passing_attempts: int = 0
+    passing_completions: int = 0
+    passing_yards: float = 0
+    passing_touchdowns: int = 0
+    passing_interceptions: int = 0
+    passing_rating: float = 0
+    rushing_attempts: int = 0
+    rushing_yards: float = 0
+    rushing_touchdowns: int = 0
+    receiving_targets: int = 0
+    receptions: int = 0
+    receiving_yards: float = 0
+    receiving_touchdowns: int = 0
+    fumbles_lost: int = 0
+    solo_tackles: int = 0
+    assisted_tackles: int = 0
+    sacks: float = 0
+    interceptions: int = 0
+    passes_defended: int = 0
+    field_goals_attempted: int = 0
+    field_goals_made: int = 0
+    extra_points_made: int = 0
+    punts: int = 0
+    punt_yards: float = 0
+    kick_return_yards: float = 0
+    punt_return_yards: float = 0
+    fantasy_points: float = 0
+    fantasy_points_ppr: float = 0
+
+    @classmethod
+    def from_api(cls, data, with_season=False):
+        """
+        Parameters:
+            data (dict): A PlayStats, PlayerGames or player season stats row.
+            with_season (bool): Keep Season/SeasonType (season stats rows).
+        """
+        get = data.get
+        season, season_type = (get("Season"), get("SeasonType")) if with_season else (None, None)
+        # Positional arguments in field order (the hot path when building play contexts)
+        return cls(
+            get("PlayerID"), get("Name"), get("Team"), get("Position"), season, season_type,
+            *[get(key) or 0 for key in STAT_KEYS],
+        )
+
+    def to_prompt(self):
+        """
+        Serializes the line as "Name (Team, Position): Stat value, ..." with zero stats left out.
+        """
+        details = ", ".join([part for part in (self.team, self.position) if part])
+        header = f"{self.name} ({details})" if details else self.name
+        if self.season is not None:
+            header += f" [Season {self.season}, SeasonType {self.season_type}]"
+        stats = ", ".join([f"{key} {value:g}" for key, value in zip(STAT_KEYS, _stat_values(self)) if value])
+        return f"{header}: {stats or 'no stats'}"
+
+STAT_NAMES = tuple(field.name for field in fields(StatLine))[6:]
+STAT_KEYS = tuple(api_name(name) for name in STAT_NAMES)
+_stat_values = attrgetter(*STAT_NAMES)
+# Fields StatLine.from_api reads (used to decode only these, see sports_data.PARTIAL_SCHEMAS)
+STAT_LINE_API_FIELDS = ("PlayerID", "Name", "Team", "Position", "Season", "SeasonType", *STAT_KEYS)
+
+@dataclass(slots=True)
+class PlayRecord:
+    """
+    A play from the play-by-play feed.
+    """
+    play_id: int
+    sequence: int
+    quarter: str | None
+    minutes: int | None
+    seconds: int | None
+    team: str | None
+    opponent: str | None
+    down: int | None
+    distance: int | None
+    yard_line: int | None
+    yard_line_territory: str | None
+    type: str
+    yards_gained: int
+    description: str
+    is_scoring_play: bool
+    stats: tuple[StatLine, ...] = ()
+    # Descriptions of earlier plays folded into this update (see batch_plays_for_budget)
+    preceding_plays: tuple[str, ...] = ()
+
+    # Scalar fields from_api reads (PlayStats are StatLines)
+    API_FIELDS = (
+        "PlayID", "Sequence", "QuarterName", "TimeRemainingMinutes", "TimeRemainingSeconds", "Team", "Opponent",
+        "Down", "Distance", "YardLine", "YardLineTerritory", "Type", "YardsGained", "Description", "IsScoringPlay",
+    )
+
+    @classmethod
+    def from_api(cls, data):
+        return cls(
+            play_id=data.get("PlayID"),
+            sequence=data.get("Sequence"),
+            quarter=data.get("QuarterName"),
+            minutes=data.get("TimeRemainingMinutes"),
+            seconds=data.get("TimeRemainingSeconds"),
+            team=data.get("Team"),
+            opponent=data.get("Opponent"),
+            down=data.get("Down"),
+            distance=data.get("Distance"),
+            yard_line=data.get("YardLine"),
+            yard_line_territory=data.get("YardLineTerritory"),
+            type=data.get("Type") or "",
+            yards_gained=data.get("YardsGained") or 0,
+            description=data.get("Description") or "",
+            is_scoring_play=bool(data.get("IsScoringPlay")),
+            stats=tuple(StatLine.from_api(stat) for stat in data.get("PlayStats") or []),
+            preceding_plays=tuple(data.get("PrecedingPlays") or ()),
+        )
+
+    def to_prompt(self):
+        """
+        Serializes the play as bullet points for the broadcast prompt.
+        """
+        clock = f"Q{self.quarter} {self.minutes}:{str(self.seconds).zfill(2)}" if self.quarter else "Unknown"
+        situation = f"{ORDINAL_DOWNS[self.down]} & {self.distance}" if self.down in ORDINAL_DOWNS else "No down"
+        lines = [
+            f"- Description: {self.description}",
+            f"- Type: {self.type}, Yards Gained: {self.yards_gained}, Scoring Play: {'yes' if self.is_scoring_play else 'no'}",
+            f"- Team: {self.team} (vs {self.opponent}), {situation} at the {self.yard_line_territory} {self.yard_line}, {clock}",
+        ]
+        lines.extend(f"- Player Stats: {stat.to_prompt()}" for stat in self.stats)
+        if self.preceding_plays:
+            lines.append("- Preceding Plays: " + " | ".join(self.preceding_plays))
+        return "\n".join(lines)
+
+@dataclass(slots=True)
+class PlayerStatFacts:
+    """
+    Derived stat facts of one player involved in a play (see utils/stats_engine.py).
+    """
+    player_id: int
+    name: str
+    team: str | None
+    position: str | None
+    play: tuple[str, ...] = ()
+    game: tuple[str, ...] = ()
+    season: tuple[str, ...] = ()
+    season_label: str = "season"
+    milestones: tuple[str, ...] = ()
+    leads: tuple[str, ...] = ()
+
+    def to_prompt(self):
+        details = ", ".join([part for part in (self.team, self.position) if part])
+        parts = [f"this play {', '.join(self.play)}" if self.play else "no stats on this play"]
+        if self.game:
+            parts.append(f"today {', '.join(self.game)}")
+        if self.season:
+            parts.append(f"this {self.season_label} incl. today {', '.join(self.season)}")
+        if self.milestones:
+            parts.append(f"milestones: {'; '.join(self.milestones)}")
+        if self.leads:
+            parts.append(f"{'; '.join(self.leads)}")
+        return f"{self.name} ({details}): " + " | ".join(parts)
+
+def format_player_stat_facts(facts):
+    """
+    Serializes player stat facts as bullet points for the broadcast prompt.
+    """
+    return "\n".join(f"- {player.to_prompt()}" for player in facts) or "None available."
+
+@dataclass(slots=True)
+class GameOdds:
+    """
+    The latest live game line of one sportsbook.
+    """
+    sportsbook: str
+    updated: str | None
+    home_money_line: int | None
+    away_money_line: int | None
+    home_point_spread: float | None
+    away_point_spread: float | None
+    over_under: float | None
+
+    @classmethod
+    def from_api(cls, data):
+        return cls(
+            sportsbook=data.get("Sportsbook"),
+            updated=data.get("Updated"),
+            home_money_line=data.get("HomeMoneyLine"),
+            away_money_line=data.get("AwayMoneyLine"),
+            home_point_spread=data.get("HomePointSpread"),
+            away_point_spread=data.get("AwayPointSpread"),
+            over_under=data.get("OverUnder"),
+        )
+
+    def to_prompt(self, away_team, home_team):
+        if None in (self.away_point_spread, self.home_point_spread, self.away_money_line, self.home_money_line, self.over_under):
+            return f"{self.sportsbook}: line unavailable (updated {self.updated})"
+        return (
+            f"{self.sportsbook}: spread {away_team} {self.away_point_spread:+g} / {home_team} {self.home_point_spread:+g}, "
+            f"moneyline {away_team} {self.away_money_line:+g} / {home_team} {self.home_money_line:+g}, "
+            f"O/U {self.over_under:g} (updated {self.updated})"
+        )
+
+@dataclass(slots=True)
+class PlayerProp:
+    """
+    A player prop line from one sportsbook.
+    """
+    player_id: int
+    name: str
+    description: str
+    sportsbook: str | None
+    over_under: float | None
+    over_payout: int | None
+    under_payout: int | None
+
+    @classmethod
+    def from_api(cls, data):
+        return cls(
+            player_id=data.get("PlayerID"),
+            name=data.get("Name"),
+            description=data.get("Description"),
+            sportsbook=data.get("Sportsbook"),
+            over_under=data.get("OverUnder"),
+            over_payout=data.get("OverPayout"),
+            under_payout=data.get("UnderPayout"),
+        )
+
+    def to_prompt(self):
+        if None in (self.over_under, self.over_payout, self.under_payout):
+            return f"{self.name} {self.description} {self.over_under} ({self.sportsbook})"
+        return (
+            f"{self.name} {self.description} {self.over_under:g} "
+            f"({self.sportsbook}: over {self.over_payout:+g} / under {self.under_payout:+g})"
+        )
+
+@dataclass(slots=True)
+class BettingOdds:
+    """
+    Live game lines (latest per sportsbook) and player props for the players in a play.
+    """
+    game_odds: tuple[GameOdds, ...] = ()
+    player_props: tuple[PlayerProp, ...] = ()
+
+    def to_prompt(self, away_team, home_team):
+        lines = [f"- Game Line: {odds.to_prompt(away_team, home_team)}" for odds in self.game_odds]
+        lines.extend(f"- Player Prop: {prop.to_prompt()}" for prop in self.player_props)
+        return "\n".join(lines) or "None available."
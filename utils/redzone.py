@@ -0,0 +1,350 @@
+# Multi-game ("RedZone") broadcasts: one scheduler follows several games, ranks their new plays
+# against each other and generates the updates on the shared LLM pool
+
+import time
+from dataclasses import dataclass
+import pytz
+import streamlit as st
+import utils.utils_functions as uf
+from functools import partial
+from sports_data import (
+    clear_live_snapshots,
+    fetch_live_snapshot,
+    fetch_season_stats,
+    filter_new_plays,
+    get_current_replay_time,
+    get_play_by_play,
+    get_players_by_team,
+    store_live_snapshot,
+)
+from utils import metrics
+from utils.concurrency import map_concurrently
+from utils.game_state import digest_from_play_by_play
+from utils.play_importance import TIER_FULL, TIER_TEMPLATE, classify_play, rank_play
+from utils.records import PlayRecord
+
+# Games (and rosters) fetched concurrently per poll
+REDZONE_FETCH_WORKERS = 8
+# LLM updates per poll across all followed games; lower-ranked plays get template updates
+REDZONE_LLM_UPDATES_PER_POLL = 4
+# ... once the session's LLM budget runs low
+REDZONE_LLM_UPDATES_PER_POLL_LOW_BUDGET = 1
+
+@dataclass(slots=True)
+class GameFeed:
+    """
+    A followed game: its players (names to PlayerIDs, as in single-game mode) and the last
+    play already covered.
+    """
+    score_id: int
+    label: str
+    players: dict
+    last_sequence: int | None = None
+
+def game_label(game):
+    return f"{game['AwayTeam']} vs {game['HomeTeam']}"
+
+def fetch_team_rosters(teams):
+    """
+    Fetches the rosters of several teams concurrently.
+
+    Returns:
+        dict: Team to its list of players (empty when the roster couldn't be fetched).
+    """
+    teams = sorted(set(teams))
+    results = map_concurrently(get_players_by_team, teams, max_workers=REDZONE_FETCH_WORKERS)
+    return {team: players or [] for team, (players, _) in zip(teams, results)}
+
+def build_game_feeds(games, rosters):
+    """
+    Parameters:
+        games (list): Schedule entries of the games to follow.
+        rosters (dict): Team to its list of players (see fetch_team_rosters).
+
+    Returns:
+        dict: ScoreID to GameFeed.
+    """
+    return {
+        game["ScoreID"]: GameFeed(
+            score_id=game["ScoreID"],
+            label=game_label(game),
+            players={p["Name"]: p["PlayerID"] for p in rosters.get(game["HomeTeam"], []) + rosters.get(game["AwayTeam"], [])},
+        )
+        for game in games
+    }
+
+def poll_game_feeds(feeds):
+    """
+    Fetches the play-by-play of every followed game concurrently (one poll for all of them).
+
+    Returns:
+        list: (feed, play_data) pairs; play_data is None when the fetch failed.
+    """
+    feeds = list(feeds)
+    results = map_concurrently(lambda feed: get_play_by_play(feed.score_id), feeds, max_workers=REDZONE_FETCH_WORKERS)
+    return [(feed, play_data) for feed, (play_data, _) in zip(feeds, results)]
+
+def start_redzone_broadcast(feeds, broadcast_container):
+    """
+    Starts following several games: records the latest play of each so that only plays from
+    now on get updates.
+
+    Parameters:
+        feeds (dict): ScoreID to GameFeed (see build_game_feeds).
+        broadcast_container (Streamlit container): UI container for displaying broadcasts.
+    """
+    st.session_state.broadcasting = True
+    with broadcast_container:
+        with st.spinner("Fetching play-by-play data..."):
+            with metrics.timer("broadcast_stage_seconds", stage="pbp_fetch"):
+                polled = poll_game_feeds(feeds.values())
+
+        following = {}
+        for feed, play_data in polled:
+            if play_data and play_data["Plays"]:
+                feed.last_sequence = max(play["Sequence"] for play in play_data["Plays"])
+                following[feed.score_id] = feed
+        if not following:
+            st.error("Failed to fetch initial play-by-play data for the selected games. Ending broadcast.")
+            st.session_state.broadcasting = False
+            return
+
+        st.session_state.redzone_feeds = following
+        st.session_state.narrative_memories = {}
+        st.session_state.pending_enrichments = []
+        clear_live_snapshots()
+        skipped = [feed.label for feed in feeds.values() if feed.score_id not in following]
+        if skipped:
+            st.warning(f"No play-by-play yet for {', '.join(skipped)}; these games are not followed.")
+        st.success(
+            f"RedZone is following {len(following)} games: {', '.join(feed.label for feed in following.values())}. "
+            "Hit 'Stop RedZone Broadcast' to stop the broadcast and update your selections."
+        )
+
+def rank_new_plays(polled):
+    """
+    Collects the new plays of every followed game, tiers them and ranks them across games.
+    Only the REDZONE_LLM_UPDATES_PER_POLL best-ranked plays keep an LLM tier; the others are
+    downgraded to template updates.
+
+    Parameters:
+        polled (list): (feed, play_data) pairs from poll_game_feeds.
+
+    Returns:
+        list: Plays to publish, best first, as dicts with "feed", "play" (PlayRecord),
+              "game_data" (game-state digest), "involved_player_ids", "tier" and "rank".
+    """
+    priority_ids = uf.priority_player_ids()
+    candidates = []
+    for feed, play_data in polled:
+        if not play_data:
+            continue
+        new_plays = filter_new_plays(play_data, feed.last_sequence)
+        if not new_plays:
+            continue
+        feed.last_sequence = max(play["Sequence"] for play in new_plays)
+        game_data = digest_from_play_by_play(play_data)
+        for play in new_plays:
+            play = PlayRecord.from_api(play)
+            involved_player_ids = uf.get_involved_players(play, feed.players)
+            tier = classify_play(play, involved_player_ids, priority_ids)
+            candidates.append({
+                "feed": feed, "play": play, "game_data": game_data, "involved_player_ids": involved_player_ids, "tier": tier,
+                "rank": rank_play(play, tier, game_data, involved_player_ids, priority_ids),
+            })
+
+    # Stable sort: equally ranked plays keep their game and sequence order
+    candidates.sort(key=lambda candidate: candidate["rank"], reverse=True)
+    llm_slots = (
+        REDZONE_LLM_UPDATES_PER_POLL if uf.get_session_ledger().budget_mode() == "normal"
+        else REDZONE_LLM_UPDATES_PER_POLL_LOW_BUDGET
+    )
+    for candidate in candidates:
+        if candidate["tier"] != TIER_TEMPLATE:
+            if llm_slots:
+                llm_slots -= 1
+            else:
+                candidate["tier"] = TIER_TEMPLATE
+                metrics.increment("redzone_downgrades")
+        metrics.increment("broadcast_play_tiers", tier=candidate["tier"])
+    return candidates
+
+def fetch_candidate_data(candidates, season_code):
+    """
+    Fetches the live snapshots (box score, odds, props) and season stats the ranked plays' tiers
+    need, concurrently and once per game, so that building their contexts reads them instead of
+    fetching play by play. Workers only fetch: the snapshots are stored on the script thread,
+    and a failed fetch is left to the play's on-demand fetch, which reports it.
+
+    Parameters:
+        candidates (list): Ranked plays from rank_new_plays.
+        season_code (str): Season code used for season stats.
+    """
+    tasks = {}
+    for candidate in candidates:
+        if candidate["tier"] == TIER_TEMPLATE:
+            continue
+        score_id = candidate["feed"].score_id
+        involved = bool(candidate["involved_player_ids"])
+        if involved:
+            tasks[("box_score", score_id)] = partial(fetch_live_snapshot, "box_score", score_id)
+        if candidate["tier"] == TIER_FULL:
+            tasks[("odds", score_id)] = partial(fetch_live_snapshot, "odds", score_id)
+            if involved:
+                tasks[("props", score_id)] = partial(fetch_live_snapshot, "props", score_id)
+                tasks[("season_stats", season_code)] = partial(fetch_season_stats, season_code)
+
+    keys = list(tasks)
+    results = map_concurrently(lambda key: tasks[key](), keys, max_workers=REDZONE_FETCH_WORKERS)
+    for (endpoint, key), (payload, error) in zip(keys, results):
+        if error is not None:
+            metrics.increment("redzone_fetches", task=endpoint, outcome="error")
+            continue
+        if endpoint != "season_stats":
+            store_live_snapshot(endpoint, key, payload)
+        metrics.increment("redzone_fetches", task=endpoint, outcome="ok")
+
+def poll_redzone(season_code, broadcast_container):
+    """
+    One scheduler cycle over every followed game: polls them concurrently, ranks the new plays
+    across games, fetches the data their contexts need concurrently, generates the LLM updates
+    on the shared LLM pool and renders the updates best first. Finished games stop being followed.
+
+    Parameters:
+        season_code (str): Season code used for season stats.
+        broadcast_container (Streamlit container): UI container for displaying broadcasts.
+
+    Returns:
+        None
+    """
+    with metrics.timer("broadcast_stage_seconds", stage="replay_clock"):
+        current_time = get_current_replay_time()
+    if current_time is None:
+        # Already reported: keep following the games and retry after the poll interval
+        metrics.increment("broadcast_poll_errors")
+        time.sleep(uf.POLL_INTERVAL_SECONDS)
+        return
+    current_time = current_time.astimezone(pytz.timezone("US/Eastern"))
+
+    feeds = st.session_state.redzone_feeds
+    poll_started = time.perf_counter()
+    with metrics.timer("broadcast_stage_seconds", stage="pbp_fetch"):
+        polled = poll_game_feeds(feeds.values())
+    metrics.increment("broadcast_polls")
+
+    with broadcast_container:
+        for feed, play_data in polled:
+            if play_data is None:
+                metrics.increment("redzone_poll_errors")
+            elif play_data["Score"].get("IsOver") and not filter_new_plays(play_data, feed.last_sequence):
+                st.info(f"{feed.label} is final and no longer followed.")
+                del feeds[feed.score_id]
+        if not feeds:
+            st.info("All followed games are over. Ending broadcast.")
+            st.session_state.broadcasting = False
+            return
+
+        candidates = rank_new_plays(polled)
+        if not candidates:
+            # Nothing new: wait out the poll interval rather than polling again straight away
+            wait_started = time.perf_counter()
+            uf.apply_enrichments(timeout=uf.POLL_INTERVAL_SECONDS)
+            time.sleep(max(0.0, uf.POLL_INTERVAL_SECONDS - (time.perf_counter() - wait_started)))
+            return
+
+        with st.spinner("Generating broadcast updates..."):
+            fetch_candidate_data(candidates, season_code)
+            # LLM updates run on the shared pool while the next contexts are built and the
+            # template updates rendered
+            for candidate in candidates:
+                candidate["play_context"] = uf.fetch_play_context(
+                    candidate["feed"].score_id, candidate["play"], candidate["game_data"], season_code,
+                    candidate["feed"].players, candidate["tier"],
+                )
+                if candidate["tier"] != TIER_TEMPLATE:
+                    candidate["content"] = uf.submit_broadcast_content(
+                        candidate["play_context"], st.session_state.broadcast_temp, candidate["tier"]
+                    )
+
+            for candidate in candidates:
+                play_context = candidate["play_context"]
+                content = candidate.get("content")
+                broadcast_content = (
+                    uf.broadcast_content_result(content) if content is not None
+                    else uf.generate_broadcast_content(play_context, st.session_state.broadcast_temp, TIER_TEMPLATE)
+                )
+                formatted_update = uf.finish_broadcast_update(current_time, play_context, broadcast_content, candidate["tier"])
+                uf.publish_play_update(
+                    f"##### {candidate['feed'].label}\n{formatted_update}",
+                    current_time, play_context, candidate["tier"], poll_started,
+                )
+        uf.export_metrics()
+
+        with st.spinner("Waiting for next play..."):
+            wait_started = time.perf_counter()
+            # This poll's plays used the live snapshots; the next plays get fresh ones
+            clear_live_snapshots()
+            uf.apply_enrichments(timeout=max(0.0, uf.POLL_INTERVAL_SECONDS - (time.perf_counter() - wait_started)))
+            time.sleep(max(0.0, uf.POLL_INTERVAL_SECONDS - (time.perf_counter() - wait_started)))
+
+def redzone_broadcast(games_on_date, season_code):
+    """
+    RedZone view: pick several games and/or a fantasy roster (which follows every game its
+    players are in and prioritizes their plays), then run one broadcast covering all of them.
+
+    Parameters:
+        games_on_date (list): Schedule entries of the selected date.
+        season_code (str): Season code used for season stats.
+    """
+    st.write("### RedZone Broadcast")
+    st.caption("Follow several games at once: the most important plays across all of them get the full updates.")
+
+    games = {game["ScoreID"]: game for game in games_on_date}
+    rosters = fetch_team_rosters([team for game in games_on_date for team in (game["HomeTeam"], game["AwayTeam"])])
+    roster_players = {
+        f"{p['Name']} ({p['Position']}, {p['Team']})": p
+        for players in rosters.values() for p in players
+    }
+
+    selected_games = st.multiselect(
+        "Games to follow:", options=list(games), format_func=lambda score_id: game_label(games[score_id])
+    )
+    fantasy_roster = st.multiselect(
+        "Fantasy roster (optional):",
+        options=sorted(roster_players),
+        help="Follows every game your players are in, and their plays are prioritized.",
+    )
+    st.session_state.selected_players = {name: roster_players[name]["PlayerID"] for name in fantasy_roster}
+    roster_teams = {roster_players[name]["Team"] for name in fantasy_roster}
+    score_ids = list(dict.fromkeys(
+        selected_games + [score_id for score_id, game in games.items() if {game["HomeTeam"], game["AwayTeam"]} & roster_teams]
+    ))
+
+    st.session_state.input_prompt = uf.user_prompt()
+    st.session_state.broadcast_temp = uf.temperature_broadcast()
+    st.session_state.enrich_updates = uf.enrich_updates_toggle()
+
+    st.divider()
+    broadcast_container = st.container(border=True, height=550)
+    with broadcast_container:
+        st.header("RedZone Broadcast")
+
+    if not score_ids:
+        with broadcast_container:
+            st.info("Select games or a fantasy roster to follow.")
+        return
+
+    if st.button("Start RedZone Broadcast", key="start_redzone"):
+        start_redzone_broadcast(build_game_feeds([games[score_id] for score_id in score_ids], rosters), broadcast_container)
+    else:
+        with broadcast_container:
+            st.info(f"{len(score_ids)} games selected. Press 'Start RedZone Broadcast'.")
+
+    if st.session_state.broadcasting:
+        if st.button("Stop RedZone Broadcast", key="stop_redzone"):
+            st.session_state.broadcasting = False
+            with broadcast_container:
+                st.info("Broadcast has been stopped.")
+
+    while st.session_state.broadcasting == True and st.session_state.redzone_feeds:
+        poll_redzone(season_code, broadcast_container)
@@ -0,0 +1,301 @@
+# Key/value backends shared by sessions and, beyond the in-process one, by Streamlit worker processes
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+import streamlit as st
+from utils import metrics
+from utils.json_decoding import available_decoders, decode_json, encode_json
+from utils.sqlite_database import SQLiteDatabase
+
+DEFAULT_SQLITE_PATH = os.path.join(".cache", "shared.sqlite3")
+DEFAULT_REDIS_URL = "redis://127.0.0.1:6379/0"
+# Entries kept by the in-process backend before the least recently used ones are evicted
+MEMORY_MAX_ENTRIES = 4096
+# Seconds a backend operation may take before it's treated as failed
+BACKEND_TIMEOUT_SECONDS = 2
+# Seconds between purges of expired rows by the SQLite backend
+SQLITE_PURGE_INTERVAL_SECONDS = 60
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+class MemoryBackend:
+    """
+    In-process backend: shared by the sessions of one server process only. Values are kept as
+    Python objects (callers must not mutate what they get back).
+    """
+    name = "memory"
+    serializes = False
+
+    def __init__(self, max_entries=MEMORY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] is not None and entry[0] < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl_seconds=None, only_if_absent=False):
+        """
+        Stores value, optionally only if the key is absent. Returns whether it was stored.
+        """
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds else None
+        with self.lock:
+            entry = self.entries.get(key)
+            if only_if_absent and entry is not None and (entry[0] is None or entry[0] >= time.monotonic()):
+                return False
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return True
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+class SQLiteBackend:
+    """
+    Backend in a SQLite database (WAL mode, one connection per thread): shared by the worker
+    processes of one host. Expired rows are purged every SQLITE_PURGE_INTERVAL_SECONDS by the
+    writes (live payloads and leases expire within seconds and would otherwise pile up).
+
+    Parameters:
+        path (str): Database file (its directory is created if needed).
+    """
+    name = "sqlite"
+    serializes = True
+
+    def __init__(self, path):
+        self.path = path
+        self.database = SQLiteDatabase(path, BACKEND_TIMEOUT_SECONDS)
+        self.database.connection().execute(
+            "CREATE TABLE IF NOT EXISTS shared (key TEXT PRIMARY KEY, expires_at REAL, value BLOB NOT NULL)"
+        )
+        self.purge_expired()
+
+    def purge_expired(self):
+        self.purged_at = time.time()
+        self.database.connection().execute("DELETE FROM shared WHERE expires_at <= ?", (self.purged_at,))
+
+    def get(self, key):
+        row = self.database.connection().execute(
+            "SELECT value FROM shared WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl_seconds=None, only_if_absent=False):
+        now = time.time()
+        if now - self.purged_at >= SQLITE_PURGE_INTERVAL_SECONDS:
+            self.purge_expired()
+        expires_at = now + ttl_seconds if ttl_seconds else None
+        if not only_if_absent:
+            self.database.connection().execute("INSERT OR REPLACE INTO shared (key, expires_at, value) VALUES (?, ?, ?)", (key, expires_at, value))
+            return True
+        # Take over the key only if it's missing or expired
+        cursor = self.database.connection().execute(
+            "INSERT INTO shared (key, expires_at, value) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET expires_at = excluded.expires_at, value = excluded.value "
+            "WHERE shared.expires_at IS NOT NULL AND shared.expires_at <= ?",
+            (key, expires_at, value, now),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key):
+        self.database.connection().execute("DELETE FROM shared WHERE key = ?", (key,))
+
+class RedisProtocolError(Exception):
+    pass
+
+class RedisBackend:
+    """
+    Backend on a server speaking the Redis protocol (Redis, Valkey, or the local stand-in in
+    benchmarks/standin_redis.py): shared by worker processes across hosts. Only GET, SET (with
+    PX/NX) and DEL are used; every thread keeps its own connection.
+
+    Parameters:
+        url (str): redis://[:password@]host[:port][/db]
+    """
+    name = "redis"
+    serializes = True
+
+    def __init__(self, url):
+        parsed = urlparse(url)
+        self.address = (parsed.hostname or "127.0.0.1", parsed.port or 6379)
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.local = threading.local()
+        self.command("PING")
+
+    def _connect(self):
+        connection = socket.create_connection(self.address, timeout=BACKEND_TIMEOUT_SECONDS)
+        self.local.connection, self.local.reader = connection, connection.makefile("rb")
+        try:
+            if self.password:
+                self._send("AUTH", self.password)
+            if self.db:
+                self._send("SELECT", self.db)
+        except RedisProtocolError:
+            self._disconnect()
+            raise
+
+    def _disconnect(self):
+        connection, reader = getattr(self.local, "connection", None), getattr(self.local, "reader", None)
+        self.local.connection = self.local.reader = None
+        for stream in (reader, connection):
+            if stream is not None:
+                try:
+                    stream.close()
+                except OSError:
+                    pass
+
+    def _send(self, *args):
+        parts = [str(arg).encode("utf-8") if not isinstance(arg, bytes) else arg for arg in args]
+        payload = b"*%d\r\n" % len(parts) + b"".join(b"$%d\r\n%s\r\n" % (len(part), part) for part in parts)
+        self.local.connection.sendall(payload)
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self.local.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by the server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode("utf-8")
+        if kind == b"-":
+            raise RedisProtocolError(rest.decode("utf-8"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            return None if length < 0 else self.local.reader.read(length + 2)[:-2]
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise RedisProtocolError(f"Unexpected reply: {line!r}")
+
+    def command(self, *args):
+        """
+        Sends one command and returns its reply, reconnecting once if the connection dropped.
+        """
+        for attempt in range(2):
+            try:
+                if getattr(self.local, "connection", None) is None:
+                    self._connect()
+                return self._send(*args)
+            except (OSError, ConnectionError):
+                self._disconnect()
+                if attempt:
+                    raise
+
+    def get(self, key):
+        return self.command("GET", key)
+
+    def set(self, key, value, ttl_seconds=None, only_if_absent=False):
+        args = ["SET", key, value]
+        if ttl_seconds:
+            args += ["PX", max(int(ttl_seconds * 1000), 1)]
+        if only_if_absent:
+            args.append("NX")
+        return self.command(*args) is not None
+
+    def delete(self, key):
+        self.command("DEL", key)
+
+def open_backend(config):
+    """
+    Opens the backend described by a `shared_backend` secrets section.
+    """
+    backend_type = config.get("type", "memory")
+    if backend_type == "memory":
+        return MemoryBackend()
+    if backend_type == "sqlite":
+        return SQLiteBackend(config.get("path", DEFAULT_SQLITE_PATH))
+    if backend_type == "redis":
+        return RedisBackend(config.get("url", DEFAULT_REDIS_URL))
+    raise ValueError(f"Unknown shared backend type: {backend_type}")
+
+def get_shared_backend():
+    """
+    Returns the process-wide backend configured with `shared_backend` in secrets.toml: "memory"
+    (default: shared by this process's sessions only), "sqlite" or "redis". A backend that
+    can't be opened falls back to memory.
+    """
+    config = dict(st.secrets.get("shared_backend", {}))
+    key = (config.get("type", "memory"), config.get("path"), config.get("url"))
+    with _backends_lock:
+        if key not in _backends:
+            try:
+                _backends[key] = open_backend(config)
+            except (OSError, sqlite3.Error, RedisProtocolError, ValueError) as e:
+                metrics.increment("shared_backend_errors", backend=key[0], operation="open")
+                st.warning(f"Shared cache backend unavailable ({e}); using this process's memory instead.")
+                _backends[key] = MemoryBackend()
+        return _backends[key]
+
+class SharedCache:
+    """
+    Named cache on the shared backend. Values must be JSON-serializable (they are stored as
+    JSON by the backends shared across processes). Lookups are recorded as
+    `cache_lookups{cache=<name>}`; backend errors are counted and treated as misses.
+
+    Parameters:
+        name (str): Cache name, used as the key prefix and in metrics.
+        ttl_seconds (float): Seconds an entry stays valid (None: until evicted).
+    """
+
+    def __init__(self, name, ttl_seconds=None):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+
+    def _call(self, backend, operation, *args, **kwargs):
+        try:
+            return getattr(backend, operation)(*args, **kwargs)
+        except (OSError, sqlite3.Error, RedisProtocolError, ConnectionError):
+            metrics.increment("shared_backend_errors", backend=backend.name, operation=operation)
+            return None
+
+    def get(self, key, default=None):
+        value = self.peek(key)
+        metrics.record_cache_lookup(self.name, hit=value is not None)
+        return default if value is None else value
+
+    def peek(self, key):
+        """
+        Like get, without recording the lookup (for polling a key another process will fill).
+        """
+        backend = get_shared_backend()
+        value = self._call(backend, "get", f"{self.name}:{key}")
+        if value is None or not backend.serializes:
+            return value
+        return decode_json(value, decoder=available_decoders()[0])
+
+    def put(self, key, value, ttl_seconds=None):
+        backend = get_shared_backend()
+        stored = encode_json(value) if backend.serializes else value
+        self._call(backend, "set", f"{self.name}:{key}", stored, ttl_seconds or self.ttl_seconds)
+
+    def acquire(self, key, ttl_seconds):
+        """
+        Takes a lease on key for ttl_seconds (so only one process does some work, e.g. an
+        upstream poll). Returns whether this caller got it; a failing backend grants it.
+        """
+        backend = get_shared_backend()
+        acquired = self._call(backend, "set", f"{self.name}:lease:{key}", b"1", ttl_seconds, only_if_absent=True)
+        return acquired is not False
+
+    def release(self, key):
+        self._call(get_shared_backend(), "delete", f"{self.name}:lease:{key}")
@@ -0,0 +1,109 @@
+# Persistent on-disk store for slow-changing upstream data, shared by sessions, worker processes and restarts
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import streamlit as st
+from utils import metrics
+from utils.json_decoding import available_decoders, decode_json, encode_json
+from utils.sqlite_database import SQLiteDatabase
+
+DEFAULT_STORE_PATH = os.path.join(".cache", "snapshots.sqlite3")
+# Bump when the stored layout changes; rows written by other versions are ignored and replaced
+STORE_FORMAT_VERSION = 1
+# Seconds a writer waits for another process's write lock before giving up
+LOCK_TIMEOUT_SECONDS = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    key TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    payload BLOB NOT NULL
+)
+"""
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def snapshot_key(url, params=None):
+    """
+    Returns the store key of a request. Hashed, so API keys in the parameters never reach the disk.
+    """
+    request = url + "?" + "&".join(f"{name}={value}" for name, value in sorted((params or {}).items()))
+    return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+class SnapshotStore:
+    """
+    SQLite-backed key/value store of decoded JSON payloads with a version and an expiry per
+    entry. The database runs in WAL mode so several Streamlit worker processes can read it while
+    one writes; every thread gets its own connection. Storage errors are counted and treated as
+    misses so the caller falls back to the network.
+
+    Parameters:
+        path (str): Database file (its directory is created if needed).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.database = SQLiteDatabase(path, LOCK_TIMEOUT_SECONDS)
+        self.database.connection().execute(SCHEMA)
+        self.purge_expired()
+
+    def get(self, key, version):
+        """
+        Returns (payload, expires_at) for an unexpired entry stored with this version, else None.
+        """
+        try:
+            row = self.database.connection().execute(
+                "SELECT payload, expires_at FROM snapshots WHERE key = ? AND version = ? AND expires_at > ?",
+                (key, f"{STORE_FORMAT_VERSION}:{version}", time.time()),
+            ).fetchone()
+        except sqlite3.Error:
+            metrics.increment("snapshot_store_errors", operation="get")
+            row = None
+        metrics.record_cache_lookup("snapshot_store", hit=row is not None)
+        if row is None:
+            return None
+        return decode_json(row[0], decoder=available_decoders()[0]), row[1]
+
+    def put(self, key, payload, ttl_seconds, version):
+        """
+        Stores a payload for ttl_seconds under this version (replacing any previous entry).
+        """
+        stored_at = time.time()
+        try:
+            self.database.connection().execute(
+                "INSERT OR REPLACE INTO snapshots (key, version, stored_at, expires_at, payload) VALUES (?, ?, ?, ?, ?)",
+                (key, f"{STORE_FORMAT_VERSION}:{version}", stored_at, stored_at + ttl_seconds, encode_json(payload)),
+            )
+        except sqlite3.Error:
+            metrics.increment("snapshot_store_errors", operation="put")
+
+    def purge_expired(self):
+        try:
+            self.database.connection().execute("DELETE FROM snapshots WHERE expires_at <= ?", (time.time(),))
+        except sqlite3.Error:
+            metrics.increment("snapshot_store_errors", operation="purge")
+
+def get_snapshot_store():
+    """
+    Returns the process-wide store configured with `snapshot_store` in secrets.toml (enabled by
+    default at DEFAULT_STORE_PATH), or None when it is disabled or can't be opened.
+    """
+    config = st.secrets.get("snapshot_store", {})
+    if not config.get("enabled", True):
+        return None
+    path = config.get("path", DEFAULT_STORE_PATH)
+    with _stores_lock:
+        if path not in _stores:
+            try:
+                _stores[path] = SnapshotStore(path)
+            except (OSError, sqlite3.Error) as e:
+                metrics.increment("snapshot_store_errors", operation="open")
+                st.warning(f"Snapshot store unavailable ({e}); slow-changing data will be fetched from the API.")
+                _stores[path] = None
+        return _stores[path]
@@ -0,0 +1,31 @@
+# SQLite databases shared by the sessions, threads and worker processes of one host
+
+import os
+import sqlite3
+import threading
+
+class SQLiteDatabase:
+    """
+    A SQLite database file in WAL mode, so several worker processes can read it while one
+    writes. Every thread gets its own connection (autocommit).
+
+    Parameters:
+        path (str): Database file (its directory is created if needed).
+        timeout (float): Seconds a writer waits for another process's write lock.
+    """
+
+    def __init__(self, path, timeout):
+        self.path = path
+        self.timeout = timeout
+        self.local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection().execute("PRAGMA journal_mode=WAL")
+
+    def connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self.local.connection = connection
+        return connection
@@ -0,0 +1,294 @@
+# Derived player stat facts for broadcast prompts (play deltas, game and season totals, milestones,
+# team leads), computed on NumPy arrays indexed by PlayerID instead of leaving the model to work
+# them out from raw PlayerGames and season stats rows
+
+from dataclasses import dataclass
+from operator import attrgetter
+import numpy as np
+from utils.caching import LRUCache
+from utils.records import STAT_KEYS, STAT_NAMES, PlayerStatFacts
+
+STAT_COLUMNS = {name: column for column, name in enumerate(STAT_NAMES)}
+
+# Stats shown in game and season totals, in display order (zero stats are left out)
+TOTAL_STATS = (
+    ("passing_completions", "cmp"), ("passing_attempts", "att"), ("passing_yards", "pass yds"),
+    ("passing_touchdowns", "pass TD"), ("passing_interceptions", "INT thrown"),
+    ("rushing_attempts", "car"), ("rushing_yards", "rush yds"), ("rushing_touchdowns", "rush TD"),
+    ("receptions", "rec"), ("receiving_targets", "tgt"), ("receiving_yards", "rec yds"), ("receiving_touchdowns", "rec TD"),
+    ("solo_tackles", "solo tkl"), ("sacks", "sacks"), ("interceptions", "INT"), ("passes_defended", "PD"),
+    ("field_goals_made", "FGM"), ("field_goals_attempted", "FGA"), ("extra_points_made", "XPM"),
+    ("fumbles_lost", "fumbles lost"), ("fantasy_points_ppr", "PPR pts"),
+)
+# Counting stats whose every increment is worth an ordinal ("2nd rushing TD today, 9th of the season");
+# fractional totals (half sacks) are counted instead ("1.5 sacks today, 7.5 this season")
+ORDINAL_STATS = (
+    ("passing_touchdowns", "passing TD"), ("rushing_touchdowns", "rushing TD"), ("receiving_touchdowns", "receiving TD"),
+    ("passing_interceptions", "interception thrown"), ("interceptions", "interception"), ("sacks", "sack"),
+    ("field_goals_made", "field goal"), ("fumbles_lost", "lost fumble"),
+)
+# Threshold milestones: (stat, label, first threshold, step) crossed by the play in the game...
+GAME_MILESTONES = (
+    ("passing_yards", "passing yards", 300, 100), ("rushing_yards", "rushing yards", 100, 50),
+    ("receiving_yards", "receiving yards", 100, 50), ("receptions", "receptions", 10, 5),
+)
+# ... and in the season (today included)
+SEASON_MILESTONES = (
+    ("passing_yards", "passing yards", 1000, 1000), ("rushing_yards", "rushing yards", 500, 500),
+    ("receiving_yards", "receiving yards", 500, 500), ("receptions", "receptions", 50, 25),
+)
+# Categories of team and game leaders
+LEADER_STATS = (
+    ("passing_yards", "passing yards"), ("rushing_yards", "rushing yards"), ("receiving_yards", "receiving yards"),
+    ("receptions", "receptions"), ("sacks", "sacks"), ("solo_tackles", "solo tackles"),
+)
+SEASON_TYPES = {1: "season", 2: "preseason", 3: "postseason"}
+
+def _columns(stats):
+    return np.array([STAT_COLUMNS[stat] for stat, *_ in stats])
+
+TOTAL_COLUMNS = _columns(TOTAL_STATS)
+TOTAL_LABELS = tuple(label for _, label in TOTAL_STATS)
+ORDINAL_COLUMNS = _columns(ORDINAL_STATS)
+GAME_MILESTONE_COLUMNS = _columns(GAME_MILESTONES)
+SEASON_MILESTONE_COLUMNS = _columns(SEASON_MILESTONES)
+LEADER_COLUMNS = _columns(LEADER_STATS)
+
+# Tables built per payload: a live box score snapshot is shared by every play of its poll and
+# the season stats by every session
+_tables = LRUCache("stat_tables", max_entries=64)
+
+@dataclass(slots=True)
+class StatTable:
+    """
+    Stat rows as a (players x STAT_NAMES) float array, sorted by PlayerID.
+    """
+    player_ids: np.ndarray
+    names: np.ndarray
+    teams: np.ndarray
+    positions: np.ndarray
+    values: np.ndarray
+    season_types: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Builds the table from PlayerGames, season stats or PlayStats rows. Rows of the same
+        player (e.g. a passer and a fumble in one play) are summed.
+        """
+        rows = [row for row in rows if row.get("PlayerID") is not None]
+        player_ids = np.array([row["PlayerID"] for row in rows], dtype=np.int64)
+        values = np.array([[row.get(key) or 0 for key in STAT_KEYS] for row in rows], dtype=np.float64).reshape(len(rows), len(STAT_KEYS))
+        unique_ids, first, inverse = np.unique(player_ids, return_index=True, return_inverse=True)
+        summed = np.zeros((len(unique_ids), len(STAT_KEYS)))
+        np.add.at(summed, inverse, values)
+        column = lambda key: np.array([rows[index].get(key) for index in first], dtype=object)
+        return cls(unique_ids, column("Name"), column("Team"), column("Position"), summed, column("SeasonType"))
+
+    @classmethod
+    def from_stat_lines(cls, stat_lines):
+        """
+        Builds the table from StatLines (e.g. a PlayRecord's stats).
+        """
+        values = attrgetter(*STAT_NAMES)
+        return cls.from_rows([
+            {"PlayerID": line.player_id, "Name": line.name, "Team": line.team, "Position": line.position,
+             **dict(zip(STAT_KEYS, values(line)))}
+            for line in stat_lines
+        ])
+
+    def lookup(self, player_ids):
+        """
+        Returns the rows of player_ids (zeros for players missing from the table) and a mask of
+        the players found.
+        """
+        player_ids = np.asarray(player_ids, dtype=np.int64)
+        if not len(self.player_ids):
+            return np.zeros((len(player_ids), len(STAT_NAMES))), np.zeros(len(player_ids), dtype=bool), np.zeros(len(player_ids), dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.player_ids, player_ids), len(self.player_ids) - 1)
+        found = self.player_ids[positions] == player_ids
+        return np.where(found[:, None], self.values[positions], 0.0), found, positions
+
+def stat_table(kind, key, rows):
+    """
+    Returns the StatTable of a payload's rows, built once per payload object.
+
+    Parameters:
+        kind (str): "game" or "season".
+        key: Identifies the payload source (ScoreID or season code).
+        rows (list): The payload's rows.
+    """
+    cached = _tables.get((kind, key))
+    if cached is not None and cached[0] is rows:
+        return cached[1]
+    table = StatTable.from_rows(rows)
+    _tables.put((kind, key), (rows, table))
+    return table
+
+def _number(value):
+    return f"{value:g}"
+
+def _ordinal(value):
+    value = int(value)
+    suffix = "th" if 10 <= value % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(value % 10, "th")
+    return f"{value}{suffix}"
+
+def _whole(value):
+    return float(value).is_integer()
+
+def _stat_parts(row, signed=False):
+    """
+    Formats a player's non-zero TOTAL_STATS ("87 rec yds", or "+23 rec yds" when signed).
+    """
+    values = row[TOTAL_COLUMNS]
+    return tuple(
+        f"{'+' if signed and value > 0 else ''}{_number(value)} {label}"
+        for value, label in zip(values, TOTAL_LABELS) if value
+    )
+
+def _milestone_level(values, first, step):
+    return np.where(values >= first, np.floor((values - first) / step) + 1, 0)
+
+def _crossed(before, after, milestones):
+    """
+    Returns the thresholds each player crossed from before to after (players x milestones,
+    NaN where none was crossed).
+    """
+    first = np.array([milestone[2] for milestone in milestones], dtype=np.float64)
+    step = np.array([milestone[3] for milestone in milestones], dtype=np.float64)
+    level = _milestone_level(after, first, step)
+    crossed = level > _milestone_level(before, first, step)
+    return np.where(crossed, first + (level - 1) * step, np.nan)
+
+def _leaders(game_table, positions, totals):
+    """
+    Returns, per leader category, the PlayerID leading each team and the game (0 when nobody
+    has the stat yet), with the box score rows at positions replaced by the players' totals
+    after the play.
+    """
+    values = game_table.values[:, LEADER_COLUMNS]
+    if len(positions):
+        values = values.copy()
+        values[positions] = totals[:, LEADER_COLUMNS]
+    leaders = {"game": np.where(values.max(axis=0) > 0, game_table.player_ids[values.argmax(axis=0)], 0)} if len(values) else {}
+    for team in set(game_table.teams) - {None}:
+        team_values = np.where((game_table.teams == team)[:, None], values, -np.inf)
+        leaders[team] = np.where(team_values.max(axis=0) > 0, game_table.player_ids[team_values.argmax(axis=0)], 0)
+    return leaders
+
+def _season_prior(season_table, rows, found, positions, game_before, games_before):
+    """
+    Returns the players' season stats without the current game. Season rows are expected to
+    exclude the game in progress; a row whose Played count exceeds the games its team completed
+    before this one already holds part of it, so the box score before the play is taken out of it.
+    """
+    if not games_before:
+        return rows
+    teams = season_table.teams[positions] if len(season_table.player_ids) else np.full(len(found), None)
+    limit = np.array([games_before.get(team, np.inf) for team in teams], dtype=np.float64)
+    includes_game = found & (rows[:, STAT_COLUMNS["played"]] > limit)
+    return np.where(includes_game[:, None], np.maximum(rows - game_before, 0), rows)
+
+def compute_player_stat_facts(player_ids, play_stats, game_rows, season_rows=None, game_key=None, season_key=None,
+                              game_includes_play=True, games_before=None):
+    """
+    Computes the stat facts of the players involved in a play, all players at once.
+
+    The play's delta is its own PlayStats (exact even when several plays share one box score
+    snapshot). Game totals come from the box score snapshot, plus the delta when the snapshot
+    was taken before the play (prefetched between polls); season totals add them to the season
+    stats without the current game (see _season_prior).
+
+    Parameters:
+        player_ids (list): PlayerIDs involved in the play, in prompt order.
+        play_stats (tuple): The play's StatLines (PlayRecord.stats).
+        game_rows (list): The game's PlayerGames rows (box score snapshot).
+        season_rows (list): The season stats rows (None or empty: no season facts).
+        game_key: ScoreID of the box score (reuses its table across the poll's plays).
+        season_key: Season code of the season stats (reuses its table across sessions).
+        game_includes_play (bool): Whether the box score snapshot already counts the play.
+        games_before (dict): Team -> games completed before this one (see
+                             game_state.team_games_before); None: trust the season rows to
+                             exclude the current game.
+
+    Returns:
+        tuple: PlayerStatFacts per involved player found in the box score or the play.
+    """
+    if not player_ids:
+        return ()
+    player_ids = list(dict.fromkeys(player_ids))
+    play_table = StatTable.from_stat_lines(play_stats or ())
+    game_table = stat_table("game", game_key, game_rows) if game_key is not None else StatTable.from_rows(game_rows or [])
+    delta, in_play, play_positions = play_table.lookup(player_ids)
+    game_snapshot, in_game, game_positions = game_table.lookup(player_ids)
+    if game_includes_play:
+        # Counts the play even if the box score doesn't list the player yet
+        game_after = np.maximum(game_snapshot, delta)
+        game_before = np.maximum(game_after - delta, 0)
+    else:
+        game_before = game_snapshot
+        game_after = game_snapshot + delta
+
+    season_table = None
+    if season_rows:
+        season_table = stat_table("season", season_key, season_rows) if season_key is not None else StatTable.from_rows(season_rows)
+        season_prior, in_season, season_positions = season_table.lookup(player_ids)
+        season_prior = _season_prior(season_table, season_prior, in_season, season_positions, game_before, games_before)
+        season_after = season_prior + game_after
+        season_before = season_prior + game_before
+        season_crossed = _crossed(season_before[:, SEASON_MILESTONE_COLUMNS], season_after[:, SEASON_MILESTONE_COLUMNS], SEASON_MILESTONES)
+    game_crossed = _crossed(game_before[:, GAME_MILESTONE_COLUMNS], game_after[:, GAME_MILESTONE_COLUMNS], GAME_MILESTONES)
+    ordinal_hits = delta[:, ORDINAL_COLUMNS] > 0
+    leaders = _leaders(game_table, game_positions[in_game], game_after[in_game])
+
+    facts = []
+    for index, player_id in enumerate(player_ids):
+        if not (in_game[index] or in_play[index]):
+            continue
+        source, position = (game_table, game_positions[index]) if in_game[index] else (play_table, play_positions[index])
+        team = source.teams[position]
+        season_label = "season"
+        if season_table is not None and in_season[index]:
+            season_label = SEASON_TYPES.get(season_table.season_types[season_positions[index]], "season")
+
+        milestones = []
+        for hit, column, (_, label) in zip(ordinal_hits[index], ORDINAL_COLUMNS, ORDINAL_STATS):
+            if not hit:
+                continue
+            today = game_after[index, column]
+            milestone = f"{_ordinal(today)} {label} today" if _whole(today) else f"{_number(today)} {label}s today"
+            if season_table is not None:
+                season = season_after[index, column]
+                milestone += f", {_ordinal(season)} of the {season_label}" if _whole(season) else f", {_number(season)} this {season_label}"
+            milestones.append(milestone)
+        milestones.extend(
+            f"passed {_number(threshold)} {milestone[1]} today"
+            for threshold, milestone in zip(game_crossed[index], GAME_MILESTONES) if not np.isnan(threshold)
+        )
+        if season_table is not None:
+            milestones.extend(
+                f"passed {_number(threshold)} {milestone[1]} this {season_label}"
+                for threshold, milestone in zip(season_crossed[index], SEASON_MILESTONES) if not np.isnan(threshold)
+            )
+
+        leads = []
+        for column, (_, label) in enumerate(LEADER_STATS):
+            value = _number(game_after[index, LEADER_COLUMNS[column]])
+            if "game" in leaders and leaders["game"][column] == player_id:
+                leads.append(f"leads the game in {label} ({value})")
+            elif team in leaders and leaders[team][column] == player_id:
+                leads.append(f"leads {team} in {label} ({value})")
+
+        facts.append(PlayerStatFacts(
+            player_id=player_id,
+            name=source.names[position],
+            team=team,
+            position=source.positions[position],
+            play=_stat_parts(delta[index], signed=True),
+            game=_stat_parts(game_after[index]),
+            season=_stat_parts(season_after[index]) if season_table is not None else (),
+            season_label=season_label,
+            milestones=tuple(milestones),
+            leads=tuple(leads),
+        ))
+    return tuple(facts)
@@ -0,0 +1,138 @@
+# LLM token and cost accounting per session, per game and per prompt template version
+
+import hashlib
+import threading
+import streamlit as st
+from utils import metrics
+
+# USD per 1M tokens
+MODEL_PRICES = {
+    "gpt-4o-mini": {"prompt": 0.15, "cached": 0.075, "completion": 0.60},
+}
+
+# Fraction of the session budget after which updates are shortened
+SHORT_UPDATES_AT = 0.8
+# Plays buffered into one update once the session budget is exhausted
+BUDGET_BATCH_SIZE = 3
+# Completion token cap for shortened updates
+SHORT_UPDATE_MAX_TOKENS = 80
+SHORT_UPDATE_INSTRUCTIONS = (
+    "Budget mode: keep this update to one or two short sentences and only mention the most important detail."
+)
+
+def prompt_template_version(*templates):
+    """
+    Returns a short, stable version id for a set of prompt templates (changes whenever a template is edited).
+    """
+    digest = hashlib.sha1("\x1e".join(templates).encode("utf-8")).hexdigest()
+    return digest[:10]
+
+def completion_cost(model, prompt_tokens, completion_tokens, cached_tokens=0):
+    # Completions report dated model names (e.g. gpt-4o-mini-2024-07-18)
+    prices = next((MODEL_PRICES[name] for name in sorted(MODEL_PRICES, key=len, reverse=True) if model.startswith(name)), None)
+    if prices is None:
+        return 0.0
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    return (uncached * prices["prompt"] + cached_tokens * prices["cached"] + completion_tokens * prices["completion"]) / 1_000_000
+
+def _empty_totals():
+    return {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "cost_usd": 0.0}
+
+def _add(totals, prompt_tokens, completion_tokens, cached_tokens, cost):
+    totals["calls"] += 1
+    totals["prompt_tokens"] += prompt_tokens
+    totals["completion_tokens"] += completion_tokens
+    totals["cached_tokens"] += cached_tokens
+    totals["cost_usd"] += cost
+
+class TokenLedger:
+    """
+    Accumulates token usage and cost, rolled up overall and per game, call type and prompt template version.
+
+    Parameters:
+        token_budget (int): Optional budget in total tokens.
+        cost_budget (float): Optional budget in USD.
+    """
+
+    def __init__(self, token_budget=None, cost_budget=None):
+        self.token_budget = token_budget
+        self.cost_budget = cost_budget
+        self.lock = threading.Lock()
+        self.totals = _empty_totals()
+        self.by_game = {}
+        self.by_call = {}
+        self.by_template = {}
+
+    def record(self, call, model, prompt_tokens, completion_tokens, cached_tokens=0, score_id=None, template_version=None):
+        cost = completion_cost(model, prompt_tokens, completion_tokens, cached_tokens)
+        with self.lock:
+            _add(self.totals, prompt_tokens, completion_tokens, cached_tokens, cost)
+            for rollup, key in (
+                (self.by_game, score_id),
+                (self.by_call, call),
+                (self.by_template, f"{call}:{template_version}" if template_version else None),
+            ):
+                if key is not None:
+                    _add(rollup.setdefault(key, _empty_totals()), prompt_tokens, completion_tokens, cached_tokens, cost)
+        return cost
+
+    def budget_used(self):
+        """
+        Returns the fraction of the tightest configured budget that has been used (0.0 when unbudgeted).
+        """
+        used = 0.0
+        if self.token_budget:
+            used = max(used, (self.totals["prompt_tokens"] + self.totals["completion_tokens"]) / self.token_budget)
+        if self.cost_budget:
+            used = max(used, self.totals["cost_usd"] / self.cost_budget)
+        return used
+
+    def budget_mode(self):
+        """
+        Returns how updates should be generated given the budget:
+        "normal", "short" (past SHORT_UPDATES_AT of the budget) or "batched" (budget exhausted).
+        """
+        used = self.budget_used()
+        if used >= 1.0:
+            return "batched"
+        if used >= SHORT_UPDATES_AT:
+            return "short"
+        return "normal"
+
+# Process-wide ledger across all sessions (per-game rollups here reflect total viewer spend)
+PROCESS_LEDGER = TokenLedger()
+
+def new_session_ledger():
+    """
+    Creates a session ledger using the optional `[llm_budget]` settings in secrets.toml
+    (`session_tokens` and/or `session_usd`).
+    """
+    budget = st.secrets.get("llm_budget", {})
+    return TokenLedger(token_budget=budget.get("session_tokens"), cost_budget=budget.get("session_usd"))
+
+def get_session_ledger():
+    if "token_ledger" not in st.session_state:
+        st.session_state.token_ledger = new_session_ledger()
+    return st.session_state.token_ledger
+
+def record_completion(call, completion, score_id=None, template_version=None):
+    """
+    Records the usage block of a chat completion in the metrics registry, the session ledger
+    and the process-wide ledger.
+
+    Parameters:
+        call (str): LLM call type ("broadcast", "game_summary", "image_analysis").
+        completion: Chat completion returned by the OpenAI client.
+        score_id (int): Game the call belongs to, if any.
+        template_version (str): Prompt template version (see prompt_template_version).
+    """
+    usage = getattr(completion, "usage", None)
+    if usage is None:
+        return
+    metrics.record_llm_usage(call, usage)
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+    args = (call, completion.model, usage.prompt_tokens or 0, usage.completion_tokens or 0, cached_tokens, score_id, template_version)
+    cost = PROCESS_LEDGER.record(*args)
+    metrics.increment("llm_cost_microdollars", round(cost * 1_000_000), call=call)
+    get_session_ledger().record(*args)
@@ -0,0 +1,266 @@
+# Server-sent events feed of broadcast updates for clients outside the Streamlit UI (mobile,
+# second screens): one asyncio server per process, fed by the broadcast engine of every session
+
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+from collections import OrderedDict, deque
+from urllib.parse import parse_qs, unquote, urlparse
+from utils import metrics
+from utils.play_templates import render_play_template
+
+# Events kept per channel so reconnecting clients can resume (Last-Event-ID)
+CHANNEL_HISTORY = 200
+# Events queued for a slow client before it is disconnected
+SUBSCRIBER_QUEUE_SIZE = 500
+# Seconds between keep-alive comments on idle streams (below typical proxy idle timeouts)
+KEEPALIVE_SECONDS = 15
+# Client reconnection delay sent with every stream (milliseconds)
+RETRY_MILLISECONDS = 3000
+# Generic game events remembered per game to drop the copies other sessions publish
+DEDUPE_KEYS_PER_CHANNEL = 1000
+
+def game_channel(score_id):
+    return f"game:{score_id}"
+
+def profile_channel(profile_id):
+    return f"profile:{profile_id}"
+
+def profile_feed_key(profile_id, secret):
+    """
+    Returns the credential of a profile's stream: an HMAC-SHA256 of the profile id signed with
+    the server's profile secret, so each subscriber can only open their own profile.
+    """
+    return hmac.new(secret.encode("utf-8"), str(profile_id).encode("utf-8"), hashlib.sha256).hexdigest()
+
+class UpdateFeed:
+    """
+    Publish/subscribe hub for update events. Sessions publish from any thread; subscribers are
+    served by the asyncio loop of the feed server.
+
+    Channels are "game:<ScoreID>" (generic updates anyone following the game can use, published
+    once per play however many sessions cover it) and "profile:<profile id>" (the personalized
+    updates generated for one subscriber profile).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.history = {}
+        self.dedupe_keys = {}
+        self.subscribers = {}
+        self.next_event_id = 1
+        self.loop = None
+
+    def publish(self, channel, event_type, data, dedupe_key=None):
+        """
+        Publishes an event to a channel.
+
+        Parameters:
+            channel (str): Channel name (see game_channel / profile_channel).
+            event_type (str): SSE event name.
+            data (dict): JSON-serializable payload.
+            dedupe_key: Drops the event if one with the same key was already published here.
+
+        Returns:
+            int: The event id, or None if it was a duplicate.
+        """
+        with self.lock:
+            if dedupe_key is not None:
+                seen = self.dedupe_keys.setdefault(channel, OrderedDict())
+                if dedupe_key in seen:
+                    return None
+                seen[dedupe_key] = True
+                if len(seen) > DEDUPE_KEYS_PER_CHANNEL:
+                    seen.popitem(last=False)
+            event = (self.next_event_id, event_type, json.dumps(data, separators=(",", ":"), default=str))
+            self.next_event_id += 1
+            self.history.setdefault(channel, deque(maxlen=CHANNEL_HISTORY)).append(event)
+            queues = list(self.subscribers.get(channel, ()))
+        metrics.increment("update_feed_events", channel=channel.split(":")[0])
+        if queues and self.loop is not None:
+            self.loop.call_soon_threadsafe(self._deliver, queues, event)
+        return event[0]
+
+    def _deliver(self, queues, event):
+        for queue in queues:
+            if queue.full():
+                # Too far behind: end its stream (the client resumes from Last-Event-ID on reconnect)
+                metrics.increment("update_feed_dropped_subscribers")
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+            else:
+                queue.put_nowait(event)
+
+    def subscribe(self, channel, last_event_id=None):
+        """
+        Registers a subscriber queue (on the feed loop) and returns it with the channel's events
+        after last_event_id.
+        """
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self.lock:
+            self.subscribers.setdefault(channel, set()).add(queue)
+            backlog = [event for event in self.history.get(channel, ()) if last_event_id is not None and event[0] > last_event_id]
+        return queue, backlog
+
+    def unsubscribe(self, channel, queue):
+        with self.lock:
+            self.subscribers.get(channel, set()).discard(queue)
+
+    def subscriber_count(self):
+        with self.lock:
+            return sum(len(queues) for queues in self.subscribers.values())
+
+FEED = UpdateFeed()
+
+def _format_event(event):
+    event_id, event_type, data = event
+    return f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n".encode("utf-8")
+
+async def _write_response(writer, status, body, content_type="text/plain"):
+    body = body.encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+        f"Access-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n".encode("utf-8") + body
+    )
+    await writer.drain()
+
+async def _stream(writer, feed, channel, last_event_id):
+    queue, backlog = feed.subscribe(channel, last_event_id)
+    metrics.increment("update_feed_connections")
+    try:
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+            b"Connection: keep-alive\r\nX-Accel-Buffering: no\r\nAccess-Control-Allow-Origin: *\r\n\r\n"
+            + f"retry: {RETRY_MILLISECONDS}\n\n".encode("utf-8")
+            + b"".join(_format_event(event) for event in backlog)
+        )
+        await writer.drain()
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                writer.write(b": keep-alive\n\n")
+            else:
+                if event is None:
+                    break
+                writer.write(_format_event(event))
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        feed.unsubscribe(channel, queue)
+
+def _handler(feed, token, profile_secret):
+    async def handle(reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if len(request_line) < 2 or request_line[0] != "GET":
+                await _write_response(writer, "405 Method Not Allowed", "Only GET is supported.\n")
+                return
+            url = urlparse(request_line[1])
+            query = parse_qs(url.query)
+            parts = [part for part in url.path.split("/") if part]
+            if parts == ["healthz"]:
+                await _write_response(writer, "200 OK", json.dumps({"subscribers": feed.subscriber_count()}), "application/json")
+                return
+            if token and not hmac.compare_digest(query.get("token", [""])[0], token):
+                await _write_response(writer, "401 Unauthorized", "Missing or invalid token.\n")
+                return
+            if len(parts) != 3 or parts[0] != "feed" or parts[1] not in ("games", "profiles"):
+                await _write_response(writer, "404 Not Found", "Use /feed/games/<ScoreID> or /feed/profiles/<profile>.\n")
+                return
+            profile_id = unquote(parts[2])
+            if parts[1] == "profiles":
+                # Personalized updates (bet slips, rosters) only go to the profile's own key holder
+                if not profile_secret:
+                    await _write_response(writer, "403 Forbidden", "Profile streams are disabled (no profile secret configured).\n")
+                    return
+                key = query.get("key", [""])[0]
+                if not hmac.compare_digest(key, profile_feed_key(profile_id, profile_secret)):
+                    await _write_response(writer, "403 Forbidden", "Missing or invalid profile key.\n")
+                    return
+            channel = game_channel(parts[2]) if parts[1] == "games" else profile_channel(profile_id)
+            last_event_id = headers.get("last-event-id") or query.get("last_event_id", [None])[0]
+            await _stream(writer, feed, channel, int(last_event_id) if last_event_id and last_event_id.isdigit() else None)
+        except (ConnectionError, UnicodeDecodeError):
+            pass
+        finally:
+            writer.close()
+    return handle
+
+def start_update_feed_server(port, host="127.0.0.1", token=None, profile_secret=None, feed=FEED):
+    """
+    Serves the feed over server-sent events on a background asyncio loop (one loop for all
+    connections, so an idle subscriber costs a queue and a socket rather than a thread):
+
+    - GET /feed/games/<ScoreID>: generic updates of a game
+    - GET /feed/profiles/<profile>?key=<profile_feed_key>: personalized updates of a subscriber
+      profile (only served when profile_secret is set)
+    - GET /healthz: subscriber count
+
+    Parameters:
+        port (int): Port to bind (0 picks a free port).
+        host (str): Interface to bind (local only by default).
+        token (str): If set, streams require ?token=<token>.
+        profile_secret (str): Server secret signing the profile keys (see profile_feed_key).
+        feed (UpdateFeed): Hub to serve.
+
+    Returns:
+        asyncio.Server: The running server (its bound port is server.sockets[0].getsockname()[1]).
+    """
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(_handler(feed, token, profile_secret), host, port))
+    feed.loop = loop
+    threading.Thread(target=loop.run_forever, name="update-feed", daemon=True).start()
+    return server
+
+def play_event(play_context):
+    """
+    Generic event of a play: the play, the game score after it and its template text (no
+    personalization, so it's the same for every session following the game).
+    """
+    play, game = play_context.play_info, play_context.game_info
+    return {
+        "score_id": game.get("ScoreID"),
+        "play_id": play.play_id,
+        "sequence": play.sequence,
+        "quarter": play.quarter,
+        "time_remaining": f"{play.minutes}:{play.seconds:02d}" if play.minutes is not None and play.seconds is not None else None,
+        "team": play.team,
+        "type": play.type,
+        "yards_gained": play.yards_gained,
+        "description": play.description,
+        "is_scoring_play": play.is_scoring_play,
+        "score": {game.get("AwayTeam"): game.get("AwayScore"), game.get("HomeTeam"): game.get("HomeScore")},
+        "text": render_play_template(play, game),
+    }
+
+def publish_play_events(profile_id, play_context, formatted_update, tier, event_type="update"):
+    """
+    Publishes a play's generic event to its game's channel (once, whichever session gets
+    there first) and the session's formatted update to its profile's channel.
+
+    Parameters:
+        profile_id (str): Subscriber profile the update was generated for.
+        play_context (PlayContext): The play's context.
+        formatted_update (str): The update as rendered in the app (markdown).
+        tier (str): The play's importance tier.
+        event_type (str): "update", or "enriched" when it replaces an earlier update of the play.
+    """
+    event = play_event(play_context)
+    FEED.publish(game_channel(event["score_id"]), "play", event, dedupe_key=(event["play_id"], event["sequence"]))
+    if profile_id:
+        FEED.publish(profile_channel(profile_id), event_type, {
+            "score_id": event["score_id"], "play_id": event["play_id"], "sequence": event["sequence"],
+            "tier": tier, "markdown": formatted_update,
+        })
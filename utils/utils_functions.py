@@ -2,36 +2,60 @@ import streamlit as st
 import time
 import pytz
 import datetime
+from concurrent.futures import wait
+from urllib.parse import quote, urlencode
 from utils.auth import authenticate
 from sports_data import (
     get_play_by_play,
     filter_new_plays,
-    get_player_box_scores,
-    get_player_season_stats,
+    get_game_player_stats,
+    get_season_player_stats,
+    get_nfl_schedule,
     get_latest_in_game_odds,
     get_current_replay_time,
-    get_player_props
+    get_player_props,
+    clear_live_snapshots,
+    discard_live_snapshot,
+    live_snapshot_covers
 )
 from utils.play_context_helpers import (
     prepare_user_preferences,
-    prepare_player_season_stats,
-    prepare_player_box_scores,
     prepare_betting_odds
 )
-from llm_interface import generate_broadcast, load_prompt_template
+from llm_interface import broadcast_prompt_prefix, complete_broadcast, generate_broadcast, load_prompt_template
 from utils.play_context import PlayContext
+from utils.records import PlayRecord
+from utils import metrics
+from utils.circuit_breaker import breaker_states
+from utils.concurrency import submit_llm_call
+from utils.game_state import digest_from_play_by_play, team_games_before
+from utils.narrative_memory import NarrativeMemory
+from utils.play_importance import ROUTINE_PLAY_INSTRUCTIONS, TIER_FULL, TIER_SHORT, TIER_TEMPLATE, TIERS, classify_play
+from utils.play_templates import render_play_template
+from utils.prefetch import prefetch_next_play
+from utils.update_feed import profile_feed_key, publish_play_events, start_update_feed_server
+from utils.token_accounting import (
+    BUDGET_BATCH_SIZE,
+    SHORT_UPDATE_INSTRUCTIONS,
+    SHORT_UPDATE_MAX_TOKENS,
+    get_session_ledger,
+    new_session_ledger
+)
+
+# Seconds to wait between play-by-play polls
+POLL_INTERVAL_SECONDS = 3
 
-def prepare_play_context(game_data, play_data, player_box_scores, player_season_stats, betting_odds, preferences):
+def prepare_play_context(game_data, play_data, player_stats, betting_odds, preferences, broadcast_memory=None):
     """
     Prepares a PlayContext object from individual data components.
 
     Parameters:
         game_data (dict): Game information.
-        play_data (dict): Play details.
-        player_box_scores (dict): Box scores for players involved.
-        player_season_stats (dict): Season stats for players involved.
-        betting_odds (dict): Betting odds data.
+        play_data (PlayRecord): Play details.
+        player_stats (tuple): PlayerStatFacts of the players involved (see utils/stats_engine.py).
+        betting_odds (BettingOdds): Betting odds data.
         preferences (dict): User preferences.
+        broadcast_memory (str): Rendered narrative memory of earlier updates.
 
     Returns:
         PlayContext: A fully populated PlayContext object.
@@ -39,10 +63,10 @@ def prepare_play_context(game_data, play_data, player_box_scores, player_season_
     return PlayContext(
         game_info=game_data,
         play_info=play_data,
-        player_box_scores=player_box_scores,
-        player_season_stats=player_season_stats,
+        player_stats=player_stats,
         betting_odds=betting_odds,
         preferences=preferences,
+        broadcast_memory=broadcast_memory,
     )
 
 # Initialize session state variables
@@ -61,18 +85,36 @@ def initialize_session_state():
         st.session_state.last_sequence = None
     if "game_summary" not in st.session_state:
         st.session_state.game_summary = None
+    if "summary_state" not in st.session_state:
+        st.session_state.summary_state = None  # last summary and the game snapshot it was built from
     if "selected_players" not in st.session_state:
         st.session_state.selected_players = None
     if "input_prompt" not in st.session_state:
         st.session_state.input_prompt = None
     if "image_results" not in st.session_state:
         st.session_state.image_results = {'players':{}, 'image_type':'', 'description':'', 'image_name':''}
+    if "image_results_key" not in st.session_state:
+        st.session_state.image_results_key = None  # analysis key of image_results (see infer_image_contents)
     if "broadcast_data_prompt" not in st.session_state:
         st.session_state.broadcast_data_prompt = load_prompt_template("broadcast_data_prompt.txt")
     if "broadcast_instructions_prompt" not in st.session_state:
         st.session_state.broadcast_instructions_prompt = load_prompt_template("broadcast_instructions_prompt.txt")
     if "broadcast_temp" not in st.session_state:
         st.session_state.broadcast_temp = 0.7
+    if "token_ledger" not in st.session_state:
+        st.session_state.token_ledger = new_session_ledger()
+    if "pending_plays" not in st.session_state:
+        st.session_state.pending_plays = []
+    if "narrative_memories" not in st.session_state:
+        st.session_state.narrative_memories = {}  # NarrativeMemory per ScoreID
+    if "enrich_updates" not in st.session_state:
+        st.session_state.enrich_updates = False
+    if "live_snapshots" not in st.session_state:
+        st.session_state.live_snapshots = {}  # box score, odds and props shared by the plays of a poll
+    if "pending_enrichments" not in st.session_state:
+        st.session_state.pending_enrichments = []  # template updates waiting on their LLM rewrite
+    if "redzone_feeds" not in st.session_state:
+        st.session_state.redzone_feeds = {}  # games followed in RedZone mode (see utils/redzone.py)
 
 
 # Function to handle sign-out
@@ -168,9 +210,19 @@ def temperature_broadcast():
     )
     return temperature_broadcast
 
+# Background LLM enrichment of template updates
+def enrich_updates_toggle():
+    enrich_updates = st.toggle(
+        "Rewrite quick updates (timeouts, penalties, incompletions) with the LLM in the background",
+        value=False, key="enrich_updates_toggle"
+    )
+    return enrich_updates
+
 # image upload
 def image_upload():
-    image_upload = st.file_uploader("Upload an image (e.g., bet slip, fantasy roster)", type=["jpg", "png"])
+    image_upload = st.file_uploader(
+        "Upload images (e.g., bet slips, fantasy rosters)", type=["jpg", "jpeg", "png"], accept_multiple_files=True
+    )
     return image_upload
 
 def get_involved_players(play, players_dict):
@@ -178,21 +230,37 @@ def get_involved_players(play, players_dict):
     Identifies players involved in the current play based on the play description.
 
     Parameters:
-        play (dict): The play information from play-by-play data.
+        play (PlayRecord): The play.
         players_dict (dict): Dictionary of players with names as keys and PlayerIDs as values.
 
     Returns:
         list: List of involved PlayerIDs.
     """
-    description = play.get("Description", "")
+    description = play.description
     involved_player_ids = [
         player_id for player_name, player_id in players_dict.items()
         if player_name.split(" (")[0] in description
     ]
     return involved_player_ids
 
+def narrative_memory_for(score_id):
+    """
+    Returns the session's narrative memory of a game (each followed game keeps its own).
+    """
+    return st.session_state.narrative_memories.setdefault(score_id, NarrativeMemory())
+
+def remember_broadcast_update(broadcast_content, play_context: PlayContext):
+    """
+    Records what a generated update covered in the narrative memory of its game.
+    """
+    player_names = {stat.name for stat in play_context.play_info.stats}
+    player_names.update(player.name for player in play_context.player_stats)
+    player_names.update(player.split(" (")[0] for player in play_context.preferences.get("priority_players") or {})
+    sportsbooks = {odds.sportsbook for odds in play_context.betting_odds.game_odds} if play_context.betting_odds else set()
+    narrative_memory_for(play_context.game_info.get("ScoreID")).update(broadcast_content, player_names, sportsbooks)
+
 # Format Broadcast Updates
-def write_broadcast_update(current_time, play_context: PlayContext, broadcast_temp: float) -> str:
+def format_broadcast_update(current_time, play_context: PlayContext, broadcast_content: str) -> str:
     """
     Format broadcast updates with a star icon for priority players.
     Highlights player names by removing team and position details.
@@ -204,10 +272,11 @@ def write_broadcast_update(current_time, play_context: PlayContext, broadcast_te
 
     # Extract key game details
     score = f"{play_context.game_info['AwayScore']} - {play_context.game_info['HomeScore']}"
-    time_remaining = f"{ordinals_quarter.get(play_context.play_info['QuarterName'], play_context.play_info['QuarterName'])} Quarter, {play_context.play_info['TimeRemainingMinutes']}:{str(play_context.play_info['TimeRemainingSeconds']).zfill(2)} remaining"
-    ball_location = f"{play_context.play_info['YardLineTerritory']} {play_context.play_info['YardLine']}-yard line"
-    possession = play_context.play_info['Team']
-    down = f"{ordinals_down.get(play_context.play_info['Down'])} & {play_context.play_info['Distance']}"
+    play = play_context.play_info
+    time_remaining = f"{ordinals_quarter.get(play.quarter, play.quarter)} Quarter, {play.minutes}:{str(play.seconds).zfill(2)} remaining"
+    ball_location = f"{play.yard_line_territory} {play.yard_line}-yard line"
+    possession = play.team
+    down = f"{ordinals_down.get(play.down)} & {play.distance}"
 
     # Format the key game details into bullet points
     game_details = (
@@ -218,12 +287,6 @@ def write_broadcast_update(current_time, play_context: PlayContext, broadcast_te
         f"- **Down**: {down}"
     )
 
-    # Generate broadcast content from the LLM
-    broadcast_content = generate_broadcast(
-        play_context,
-        temperature=broadcast_temp
-    )
-
     # Extract player names without team/position details
     for player in play_context.preferences['priority_players']:
         player_name = player.split(" (")[0]
@@ -240,42 +303,414 @@ def write_broadcast_update(current_time, play_context: PlayContext, broadcast_te
     )
     return formatted_update
 
-def generate_involved_player_stats(score_id, play, season_code, players):
+def broadcast_options(broadcast_temp: float, tier: str = TIER_FULL) -> dict:
+    """
+    Returns the generate_broadcast (or complete_broadcast) arguments of an LLM tier: a full
+    update, or a shortened one for routine plays and once the session's LLM budget runs low.
+    """
+    if tier == TIER_FULL and get_session_ledger().budget_mode() == "normal":
+        return {"temperature": broadcast_temp}
+    return {
+        "temperature": broadcast_temp,
+        "max_tokens": SHORT_UPDATE_MAX_TOKENS,
+        "extra_instructions": ROUTINE_PLAY_INSTRUCTIONS if tier == TIER_SHORT else SHORT_UPDATE_INSTRUCTIONS,
+    }
+
+def generate_broadcast_content(play_context: PlayContext, broadcast_temp: float, tier: str = TIER_FULL) -> str:
+    """
+    Generates the text of a play's update. The play's importance tier decides between no LLM
+    call (template), a short update or a full one.
+    """
+    if tier == TIER_TEMPLATE:
+        return render_play_template(play_context.play_info, play_context.game_info)
+    return generate_broadcast(play_context, **broadcast_options(broadcast_temp, tier))
+
+def submit_broadcast_content(play_context: PlayContext, broadcast_temp: float, tier: str = TIER_FULL):
+    """
+    Starts a play's LLM update on the shared LLM pool. The worker makes no Streamlit calls:
+    collect the result with broadcast_content_result on the script thread.
+
+    Returns:
+        Future: Resolves to the broadcast content, or raises the LLM error.
+    """
+    # Rendered here: the worker only reads it from session state
+    broadcast_prompt_prefix()
+    return submit_llm_call(complete_broadcast, play_context, **broadcast_options(broadcast_temp, tier))
+
+def broadcast_content_result(future) -> str:
+    """
+    Returns the content of a submitted LLM update, showing its error if it failed.
+    """
+    try:
+        return future.result()
+    except Exception as e:
+        st.error(f"Failed to generate broadcast: {e}")
+        return "Error generating broadcast."
+
+def finish_broadcast_update(current_time, play_context: PlayContext, broadcast_content: str, tier: str = TIER_FULL) -> str:
+    """
+    Records a generated update in its game's narrative memory and formats it.
+    """
+    if tier != TIER_TEMPLATE and broadcast_content != "Error generating broadcast.":
+        remember_broadcast_update(broadcast_content, play_context)
+
+    return format_broadcast_update(current_time, play_context, broadcast_content)
+
+def write_broadcast_update(current_time, play_context: PlayContext, broadcast_temp: float, tier: str = TIER_FULL) -> str:
+    """
+    Generates and formats the broadcast update for a play.
+    """
+    broadcast_content = generate_broadcast_content(play_context, broadcast_temp, tier)
+    return finish_broadcast_update(current_time, play_context, broadcast_content, tier)
+
+def generate_involved_player_stats(score_id, play, season_code, players, tier=TIER_FULL):
     involved_player_ids = get_involved_players(play, players)
-    box_scores = {}
-    season_stats = {}
+    game_player_stats = []
+    season_player_stats = None
+    games_before = None
     player_props = {}
-    if involved_player_ids:
-        box_scores = get_player_box_scores(score_id, involved_player_ids)
-        season_stats = get_player_season_stats(involved_player_ids, season_code)
-        player_props = get_player_props(score_id, involved_player_ids)
+    if involved_player_ids and tier != TIER_TEMPLATE:
+        game_player_stats = get_game_player_stats(score_id)
+        # Season stats and props only feed full-length updates
+        if tier == TIER_FULL:
+            season_player_stats = get_season_player_stats(season_code)
+            # Tells season rows that already count this game apart (see stats_engine._season_prior)
+            games_before = team_games_before(get_nfl_schedule(season_code), score_id)
+            player_props = get_player_props(score_id, involved_player_ids)
+
+    return game_player_stats, season_player_stats, games_before, player_props, involved_player_ids
+
+def _stats_engine():
+    # NumPy is only loaded once a play needs stat facts (preload_dependencies warms it)
+    from utils import stats_engine
+    return stats_engine
+
+def build_play_context(play, game_data, game_player_stats, season_player_stats, player_props, latest_betting_odds, involved_player_ids, season_code=None, game_stats_include_play=True,
+                       games_before=None):
+    """
+    Derives the involved players' stat facts, parses the odds into records and assembles the
+    PlayContext for a play.
 
-    return box_scores, season_stats, player_props, involved_player_ids
+    Parameters:
+        play (PlayRecord): The play.
+        game_data (dict): Game-state digest for the current poll (see utils/game_state.py).
+        game_player_stats (list): PlayerGames rows of the game's box score.
+        season_player_stats (list): Season stats rows of every player (None or empty: no season facts).
+        player_props (list): Player props for players involved.
+        latest_betting_odds (list): Latest in-game betting odds.
+        involved_player_ids (list): PlayerIDs involved in the play.
+        season_code (str): Season code of season_player_stats.
+        game_stats_include_play (bool): False if the box score was prefetched before the play.
+        games_before (dict): Team -> games completed before this one, from the schedule.
 
-def filter_non_relevant_data(data):
+    Returns:
+        PlayContext: A fully populated PlayContext object.
+    """
+    # only pass through uploaded image results if they are relevant to the current play
+    if any(player in list(st.session_state.image_results['players'].values()) for player in involved_player_ids):
+        play_relevant_image_results = st.session_state.image_results
+    else:
+        play_relevant_image_results = None
+
+    return prepare_play_context(
+        game_data=game_data,
+        play_data=play,
+        player_stats=_stats_engine().compute_player_stat_facts(
+            involved_player_ids, play.stats, game_player_stats, season_player_stats,
+            game_key=game_data.get("ScoreID"), season_key=season_code,
+            game_includes_play=game_stats_include_play, games_before=games_before,
+        ) if game_player_stats or play.stats else (),
+        betting_odds=prepare_betting_odds(latest_betting_odds, player_props),
+        preferences=prepare_user_preferences(st.session_state.selected_players, st.session_state.input_prompt, play_relevant_image_results),
+        broadcast_memory=narrative_memory_for(game_data.get("ScoreID")).render(),
+    )
+
+def batch_plays_for_budget(new_plays):
     """
-    Filters out entries with zero or null values from a nested dictionary.
-    
+    Once the session's LLM budget is exhausted, buffers plays so that one combined update is
+    generated per BUDGET_BATCH_SIZE plays (or sooner on a scoring play). Otherwise returns the
+    plays unchanged.
+
     Parameters:
-        data (dict): The nested data dictionary to filter.
+        new_plays (list): New plays from the latest poll.
 
     Returns:
-        dict: Filtered data dictionary.
+        list: Plays to generate updates for. A combined play is the latest play with the
+              descriptions of the buffered plays under "PrecedingPlays" and all the plays it
+              stands for under "BatchedPlays".
     """
-    if not isinstance(data, dict):
-        return data  # Return non-dict values as is
+    if get_session_ledger().budget_mode() != "batched":
+        return new_plays
 
-    filtered_data = {}
-    for key, value in data.items():
-        if isinstance(value, dict):
-            # Recursively filter nested dictionaries
-            filtered_value = filter_non_relevant_data(value)
-            if filtered_value:  # Include only non-empty filtered results
-                filtered_data[key] = filtered_value
-        elif value not in (0, None):
-            filtered_data[key] = value
+    pending = st.session_state.pending_plays + new_plays
+    if len(pending) < BUDGET_BATCH_SIZE and not any(play.get("IsScoringPlay") for play in pending):
+        st.session_state.pending_plays = pending
+        return []
 
-    return filtered_data
+    st.session_state.pending_plays = []
+    combined_play = dict(pending[-1])
+    combined_play["PrecedingPlays"] = [play.get("Description") for play in pending[:-1]]
+    combined_play["BatchedPlays"] = pending
+    return [combined_play]
+
+def llm_budget_notice():
+    """
+    Tells the user when their session's LLM budget has degraded the broadcast.
+    """
+    ledger = get_session_ledger()
+    budget_mode = ledger.budget_mode()
+    if budget_mode == "short":
+        st.info(f"LLM budget {ledger.budget_used():.0%} used: broadcast updates are shortened.")
+    elif budget_mode == "batched":
+        st.warning(f"LLM budget exhausted: plays are combined into one update every {BUDGET_BATCH_SIZE} plays.")
+
+def priority_player_ids():
+    """
+    Returns the PlayerIDs the user prioritized, selected directly or detected in uploaded images.
+    """
+    return set((st.session_state.selected_players or {}).values()) | set(st.session_state.image_results["players"].values())
+
+def render_broadcast_update(formatted_update):
+    """
+    Renders a formatted broadcast update as a chat message.
+
+    Returns:
+        Streamlit placeholder: The message body, so the update can be replaced later.
+    """
+    message = st.chat_message("ai").empty()
+    message.markdown(formatted_update, unsafe_allow_html=True)
+    return message
+
+def enrich_template_update(placeholder, current_time, play_context: PlayContext):
+    """
+    Starts a short LLM rewrite of a template update in the background; apply_enrichments swaps
+    it into the placeholder once it completes. Skipped once the session's LLM budget runs low.
+    """
+    if get_session_ledger().budget_mode() != "normal":
+        return
+    broadcast_prompt_prefix()
+    future = submit_llm_call(
+        complete_broadcast,
+        play_context,
+        temperature=st.session_state.broadcast_temp,
+        max_tokens=SHORT_UPDATE_MAX_TOKENS,
+        extra_instructions=ROUTINE_PLAY_INSTRUCTIONS,
+    )
+    st.session_state.pending_enrichments.append({
+        "future": future, "placeholder": placeholder, "current_time": current_time, "play_context": play_context,
+    })
+
+def apply_enrichments(timeout=0):
+    """
+    Replaces template updates with their LLM rewrites that have completed, waiting up to
+    timeout seconds for the outstanding ones. A failed rewrite leaves the template update.
+    """
+    pending = st.session_state.pending_enrichments
+    if not pending:
+        return
+    done, _ = wait([enrichment["future"] for enrichment in pending], timeout=timeout)
+    for enrichment in pending:
+        if enrichment["future"] not in done:
+            continue
+        if enrichment["future"].exception() is not None:
+            metrics.increment("broadcast_enrichments", outcome="error")
+            continue
+        broadcast_content = enrichment["future"].result()
+        remember_broadcast_update(broadcast_content, enrichment["play_context"])
+        formatted_update = format_broadcast_update(enrichment["current_time"], enrichment["play_context"], broadcast_content)
+        enrichment["placeholder"].markdown(formatted_update, unsafe_allow_html=True)
+        if update_feed_enabled():
+            publish_play_events(st.session_state.username, enrichment["play_context"], formatted_update, TIER_TEMPLATE, "enriched")
+        metrics.increment("broadcast_enrichments", outcome="ok")
+    st.session_state.pending_enrichments = [enrichment for enrichment in pending if enrichment["future"] not in done]
+
+def generate_play_update(score_id, play, game_data, season_code, players, current_time, poll_started=None):
+    """
+    Runs the play-to-update path for a single play: classifies its importance, fetches the
+    player stats and betting odds that tier needs, builds the play context, generates the
+    update and renders it.
+
+    Parameters:
+        score_id (int): The ScoreID of the game.
+        play (dict): The play information from play-by-play data.
+        game_data (dict): Game-state digest for the current poll (see utils/game_state.py).
+        season_code (str): Season code used for season stats.
+        players (dict): Dictionary of players with names as keys and PlayerIDs as values.
+        current_time (datetime): Current (replay) time in Eastern Time.
+        poll_started (float): perf_counter() at the start of the poll that ingested the play,
+                              used to record play-to-update latency.
+
+    Returns:
+        None
+    """
+    # Route routine plays and stoppages to cheaper paths. A combined play (see
+    # batch_plays_for_budget) gets the tier of its most important play, not of the last one
+    priority_ids = priority_player_ids()
+    tier = max(
+        (
+            classify_play(member, get_involved_players(member, players), priority_ids)
+            for member in map(PlayRecord.from_api, play.get("BatchedPlays") or [play])
+        ),
+        key=TIERS.index,
+    )
+
+    # Parsed once here; everything downstream works on the compact record
+    play = PlayRecord.from_api(play)
+    metrics.increment("broadcast_play_tiers", tier=tier)
+
+    play_context = fetch_play_context(score_id, play, game_data, season_code, players, tier)
+    formatted_update = write_broadcast_update(
+        current_time=current_time,
+        play_context=play_context,
+        broadcast_temp=st.session_state.broadcast_temp,
+        tier=tier,
+    )
+    publish_play_update(formatted_update, current_time, play_context, tier, poll_started)
+
+def fetch_play_context(score_id, play, game_data, season_code, players, tier):
+    """
+    Fetches the player stats and betting odds a play's tier needs and builds its PlayContext.
+
+    Returns:
+        PlayContext: The play's context.
+    """
+    with metrics.timer("broadcast_stage_seconds", stage="stat_fetch"):
+        game_player_stats, season_player_stats, games_before, player_props, involved_player_ids = generate_involved_player_stats(score_id, play, season_code, players, tier)
+        latest_betting_odds = get_latest_in_game_odds(score_id) if tier == TIER_FULL else []
+        game_stats_include_play = live_snapshot_covers("box_score", score_id, play.sequence)
+
+    with metrics.timer("broadcast_stage_seconds", stage="context_build"):
+        return build_play_context(
+            play, game_data, game_player_stats, season_player_stats, player_props, latest_betting_odds, involved_player_ids, season_code,
+            game_stats_include_play, games_before,
+        )
+
+def publish_play_update(formatted_update, current_time, play_context: PlayContext, tier, poll_started=None):
+    """
+    Renders a formatted update, publishes it to the update feed, starts its background rewrite
+    if it's an enriched template update, and records the play in the metrics.
+    """
+    with metrics.timer("broadcast_stage_seconds", stage="render"):
+        placeholder = render_broadcast_update(formatted_update)
+    if update_feed_enabled():
+        with metrics.timer("broadcast_stage_seconds", stage="feed_publish"):
+            publish_play_events(st.session_state.username, play_context, formatted_update, tier)
+    if tier == TIER_TEMPLATE and st.session_state.enrich_updates:
+        enrich_template_update(placeholder, current_time, play_context)
+
+    metrics.increment("broadcast_plays")
+    if poll_started is not None:
+        metrics.observe("broadcast_play_latency_seconds", time.perf_counter() - poll_started)
+
+def export_metrics():
+    """
+    Writes the metrics file if `metrics.file` is configured in secrets.toml.
+    """
+    metrics_file = st.secrets.get("metrics", {}).get("file")
+    if metrics_file:
+        metrics.write_metrics_file(metrics_file)
+
+@st.cache_resource
+def start_metrics_endpoint(port, host="127.0.0.1"):
+    """
+    Starts the Prometheus-style /metrics endpoint once per server process.
+    """
+    return metrics.start_metrics_server(port, host=host)
+
+def update_feed_enabled():
+    return bool(st.secrets.get("update_feed", {}).get("port"))
+
+@st.cache_resource
+def start_update_feed_endpoint(port, host="127.0.0.1", token=None, profile_secret=None):
+    """
+    Starts the server-sent events update feed once per server process.
+    """
+    return start_update_feed_server(port, host=host, token=token, profile_secret=profile_secret)
+
+def profile_feed_address():
+    """
+    Shows the signed-in user the address of their personalized update stream, when the update
+    feed serves profile streams.
+    """
+    config = st.secrets.get("update_feed", {})
+    if not config.get("port") or not config.get("profile_secret"):
+        return
+    query = {"key": profile_feed_key(st.session_state.username, config["profile_secret"])}
+    if config.get("token"):
+        query["token"] = config["token"]
+    with st.sidebar.expander("Update Feed"):
+        st.caption("Your personalized updates as server-sent events. Keep this address private.")
+        st.code(f"/feed/profiles/{quote(st.session_state.username)}?{urlencode(query)}", language=None)
+
+def metrics_debug_panel():
+    """
+    Sidebar panel showing stage latencies, upstream calls and error rates, LLM token usage
+    and cache hit rates for this server process.
+    """
+    with st.sidebar.expander("Debug Metrics", expanded=True):
+        st.caption("Process-wide metrics since server start.")
+
+        stages = metrics.REGISTRY.timer_summaries("broadcast_stage_seconds")
+        if stages:
+            st.write("**Broadcast stages**")
+            st.dataframe([
+                {"stage": dict(labels)["stage"], "count": summary["count"],
+                 "p50 ms": round(summary["p50"] * 1000, 1), "p95 ms": round(summary["p95"] * 1000, 1)}
+                for labels, summary in sorted(stages.items())
+            ], hide_index=True)
+
+        upstream = metrics.error_rates("upstream_requests")
+        if upstream:
+            latencies = {dict(labels)["endpoint"]: summary for labels, summary in metrics.REGISTRY.timer_summaries("upstream_request_seconds").items()}
+            circuits = breaker_states()
+            stale = metrics.REGISTRY.counters_by_label("stale_served", "endpoint")
+            st.write("**Upstream requests**")
+            st.dataframe([
+                {"endpoint": endpoint, "calls": total, "errors": errors, "error rate": f"{rate:.1%}",
+                 "p95 ms": round(latencies[endpoint]["p95"] * 1000, 1) if endpoint in latencies else None,
+                 "circuit": circuits.get(endpoint), "stale served": stale.get(endpoint, 0)}
+                for endpoint, (errors, total, rate) in sorted(upstream.items())
+            ], hide_index=True)
+
+        llm_calls = metrics.error_rates("llm_requests")
+        if llm_calls:
+            tokens = {}
+            for labels, value in metrics.REGISTRY.counter_entries("llm_tokens"):
+                tokens.setdefault(labels["call"], {})[labels["kind"]] = value
+            st.write("**LLM calls**")
+            st.dataframe([
+                {"call": call, "requests": total, "errors": errors,
+                 "prompt tokens": tokens.get(call, {}).get("prompt", 0),
+                 "completion tokens": tokens.get(call, {}).get("completion", 0),
+                 "cached tokens": tokens.get(call, {}).get("cached", 0)}
+                for call, (errors, total, rate) in sorted(llm_calls.items())
+            ], hide_index=True)
+
+        ledger = get_session_ledger()
+        st.write("**LLM spend (this session)**")
+        st.dataframe([
+            {"game": str(game), "calls": totals["calls"], "prompt tokens": totals["prompt_tokens"],
+             "completion tokens": totals["completion_tokens"], "cached tokens": totals["cached_tokens"],
+             "cost $": round(totals["cost_usd"], 4)}
+            for game, totals in [("total", ledger.totals)] + sorted(ledger.by_game.items(), key=lambda item: str(item[0]))
+        ], hide_index=True)
+        if ledger.by_template:
+            st.dataframe([
+                {"template": template, "calls": totals["calls"],
+                 "avg prompt tokens": totals["prompt_tokens"] // max(totals["calls"], 1),
+                 "cost $": round(totals["cost_usd"], 4)}
+                for template, totals in sorted(ledger.by_template.items())
+            ], hide_index=True)
+
+        caches = metrics.cache_hit_rates()
+        if caches:
+            st.write("**Caches**")
+            st.dataframe([
+                {"cache": cache, "hits": hits, "misses": misses, "hit rate": f"{rate:.1%}"}
+                for cache, (hits, misses, rate) in sorted(caches.items())
+            ], hide_index=True)
+
+        st.download_button("Download metrics", data=metrics.REGISTRY.render_prometheus(), file_name="metrics.prom")
 
 # Start Play-by-Play Broadcast
 def handle_broadcast_start(score_id, replay_api_key, season_code, broadcast_container, players):
@@ -293,48 +728,30 @@ def handle_broadcast_start(score_id, replay_api_key, season_code, broadcast_cont
         None
     """
     st.session_state.broadcasting = True
-    current_time = get_current_replay_time().astimezone(pytz.timezone("US/Eastern"))
+    with metrics.timer("broadcast_stage_seconds", stage="replay_clock"):
+        current_time = get_current_replay_time()
 
     with broadcast_container:
         with st.spinner("Fetching play-by-play data..."):
-            play_data = get_play_by_play(score_id)
-            game_data = play_data["Score"]
-
-        if play_data and play_data["Plays"]:
+            poll_started = time.perf_counter()
+            with metrics.timer("broadcast_stage_seconds", stage="pbp_fetch"):
+                play_data = get_play_by_play(score_id)
+
+        if current_time is not None and play_data and play_data["Plays"]:
+            current_time = current_time.astimezone(pytz.timezone("US/Eastern"))
+            # Computed once per poll and shared by every update generated from it
+            game_data = digest_from_play_by_play(play_data)
             st.session_state.last_sequence = max(play["Sequence"] for play in play_data["Plays"])
+            st.session_state.pending_plays = []
+            st.session_state.narrative_memories = {}
+            st.session_state.pending_enrichments = []
+            clear_live_snapshots()
             st.success("Broadcast is running... Hit 'Stop Play-by-Play Broadcast' button to stop the broadcast and update your selections.")
 
             with st.spinner("Generating play-by-play broadcast..."):
                 latest_play = max(play_data["Plays"], key=lambda x: x["Sequence"])
-
-                # get player stats and betting odds
-                box_scores, season_stats, player_props, involved_player_ids = generate_involved_player_stats(score_id, latest_play, season_code, players)
-                latest_betting_odds = get_latest_in_game_odds(score_id)
-
-                # Filter non-relevant data
-                filtered_box_scores = filter_non_relevant_data(box_scores)
-                filtered_season_stats = filter_non_relevant_data(season_stats)
-
-                # only pass through uploaded image results if they are relevant to the current play
-                if any(player in list(st.session_state.image_results['players'].values()) for player in involved_player_ids):
-                    play_relevant_image_results = st.session_state.image_results
-                else:
-                    play_relevant_image_results = None
-
-                play_context = prepare_play_context(
-                    game_data=game_data,
-                    play_data=latest_play,
-                    player_box_scores=prepare_player_box_scores(filtered_box_scores),
-                    player_season_stats=prepare_player_season_stats(filtered_season_stats),
-                    betting_odds=prepare_betting_odds(latest_betting_odds, player_props),
-                    preferences=prepare_user_preferences(st.session_state.selected_players, st.session_state.input_prompt, play_relevant_image_results),
-                )
-                formatted_update = write_broadcast_update(
-                    current_time=current_time,
-                    play_context=play_context,
-                    broadcast_temp=st.session_state.broadcast_temp,
-                )
-                st.chat_message("ai").markdown(formatted_update, unsafe_allow_html=True)
+                generate_play_update(score_id, latest_play, game_data, season_code, players, current_time, poll_started)
+            export_metrics()
         else:
             st.error("Failed to fetch initial play-by-play data. Ending broadcast.")
             st.session_state.broadcasting = False
@@ -355,58 +772,56 @@ def process_new_plays(score_id, replay_api_key, season_code, broadcast_container
     Returns:
         None
     """
-    current_time = get_current_replay_time().astimezone(pytz.timezone("US/Eastern"))
+    with metrics.timer("broadcast_stage_seconds", stage="replay_clock"):
+        current_time = get_current_replay_time()
 
-    play_data = get_play_by_play(score_id)
-    game_data = play_data["Score"]
+    poll_started = time.perf_counter()
+    with metrics.timer("broadcast_stage_seconds", stage="pbp_fetch"):
+        play_data = get_play_by_play(score_id)
+    metrics.increment("broadcast_polls")
 
     with broadcast_container:
-        if not play_data:
-            st.error("Failed to fetch play-by-play data. Ending broadcast.")
-            st.session_state.broadcasting = False
+        if current_time is None or not play_data:
+            # Already reported by the fetchers: keep broadcasting and retry after the poll interval
+            metrics.increment("broadcast_poll_errors")
+            wait_started = time.perf_counter()
+            apply_enrichments(timeout=POLL_INTERVAL_SECONDS)
+            time.sleep(max(0.0, POLL_INTERVAL_SECONDS - (time.perf_counter() - wait_started)))
             return
+        current_time = current_time.astimezone(pytz.timezone("US/Eastern"))
 
         with st.spinner("Fetching play-by-play data..."):
             new_plays = filter_new_plays(play_data, st.session_state.last_sequence)
 
         if new_plays:
             st.session_state.last_sequence = max(play["Sequence"] for play in new_plays)
-
-            for play in new_plays:
+            # Computed once per poll and shared by every update generated from it
+            game_data = digest_from_play_by_play(play_data)
+
+            plays = batch_plays_for_budget(new_plays)
+            if len(new_plays) > 1 or any(play.get("PrecedingPlays") for play in plays):
+                # A box score prefetched before several plays can't be brought up to date with one
+                # play's stats: fetch one that includes them
+                discard_live_snapshot("box_score", score_id)
+            for play in plays:
                 with st.spinner("Generating broadcast update..."):
-                    
-                    # get player stats and betting odds
-                    box_scores, season_stats, player_props, involved_player_ids = generate_involved_player_stats(score_id, play, season_code, players)
-                    latest_betting_odds = get_latest_in_game_odds(score_id)
-
-                    # Filter non-relevant data
-                    filtered_box_scores = filter_non_relevant_data(box_scores)
-                    filtered_season_stats = filter_non_relevant_data(season_stats)
-
-                    # only pass through uploaded image results if they are relevant to the current play
-                    if any(player in list(st.session_state.image_results['players'].values()) for player in involved_player_ids):
-                        play_relevant_image_results = st.session_state.image_results
-                    else:
-                        play_relevant_image_results = None
-
-                    play_context = prepare_play_context(
-                        game_data=game_data,
-                        play_data=play,
-                        player_box_scores=prepare_player_box_scores(filtered_box_scores),                        
-                        player_season_stats=prepare_player_season_stats(filtered_season_stats),
-                        betting_odds=prepare_betting_odds(latest_betting_odds, player_props),
-                        preferences=prepare_user_preferences(st.session_state.selected_players, st.session_state.input_prompt, play_relevant_image_results),
-                    )
-                    # st.write(play_context.play_info)
-                    # st.write(play_context.player_box_scores)
-                    # st.write(play_context.player_season_stats)
-
-                    formatted_update = write_broadcast_update(
-                        current_time=current_time,
-                        play_context=play_context,
-                        broadcast_temp=st.session_state.broadcast_temp,
-                    )
-                    st.chat_message("ai").markdown(formatted_update, unsafe_allow_html=True)
+                    generate_play_update(score_id, play, game_data, season_code, players, current_time, poll_started)
+            export_metrics()
 
             with st.spinner("Waiting for next play..."):
-                time.sleep(3)
\ No newline at end of file
+                wait_started = time.perf_counter()
+                # This poll's plays used the live snapshots; the next play gets fresh ones
+                clear_live_snapshots()
+                if POLL_INTERVAL_SECONDS > 0:
+                    # Bounded by the poll wait: a slow fetch must not hold back the next poll
+                    with metrics.timer("prefetch_seconds"):
+                        prefetch_next_play(score_id, season_code, game_data, st.session_state.last_sequence,
+                                           timeout=max(0.0, POLL_INTERVAL_SECONDS - (time.perf_counter() - wait_started)))
+                # Background rewrites of template updates land while we wait for the next poll
+                apply_enrichments(timeout=max(0.0, POLL_INTERVAL_SECONDS - (time.perf_counter() - wait_started)))
+                time.sleep(max(0.0, POLL_INTERVAL_SECONDS - (time.perf_counter() - wait_started)))
+        else:
+            # Nothing new: wait out the poll interval rather than polling again straight away
+            wait_started = time.perf_counter()
+            apply_enrichments(timeout=POLL_INTERVAL_SECONDS)
+            time.sleep(max(0.0, POLL_INTERVAL_SECONDS - (time.perf_counter() - wait_started)))